@@ -1,122 +1,28 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import io
-import streamlit.components.v1 as components
 from datetime import date
-from dateutil.relativedelta import relativedelta
-
-# --- 1. DADOS DA TABELA TJ-MG (Fatores Oficiais Acumulados para Ago/2024) ---
-CSV_TJMG = """Data,Fator_Acumulado
-2016-01-01,1.5444224
-2016-02-01,1.5214479
-2016-03-01,1.5071304
-2016-04-01,1.5005285
-2016-05-01,1.4909855
-2016-06-01,1.4765155
-2016-07-01,1.4696089
-2016-08-01,1.4602633
-2016-09-01,1.4557497
-2016-10-01,1.4545860
-2016-11-01,1.4521181
-2016-12-01,1.4511018
-2017-01-01,1.4490735
-2017-02-01,1.4430131
-2017-03-01,1.4395577
-2017-04-01,1.4349661
-2017-05-01,1.4338191
-2017-06-01,1.4286760
-2017-07-01,1.4329747
-2017-08-01,1.4305432
-2017-09-01,1.4309724
-2017-10-01,1.4312584
-2017-11-01,1.4259823
-2017-12-01,1.4234199
-2018-01-01,1.4197288
-2018-02-01,1.4164710
-2018-03-01,1.4139256
-2018-04-01,1.4129367
-2018-05-01,1.4099753
-2018-06-01,1.4039388
-2018-07-01,1.3841456
-2018-08-01,1.3806937
-2018-09-01,1.3806937
-2018-10-01,1.3765639
-2018-11-01,1.3710796
-2018-12-01,1.3745164
-2019-01-01,1.3725944
-2019-02-01,1.3676705
-2019-03-01,1.3603254
-2019-04-01,1.3499302
-2019-05-01,1.3418792
-2019-06-01,1.3398695
-2019-07-01,1.3397357
-2019-08-01,1.3383972
-2019-09-01,1.3367930
-2019-10-01,1.3374614
-2019-11-01,1.3369272
-2019-12-01,1.3297463
-2020-01-01,1.3137189
-2020-02-01,1.3112275
-2020-03-01,1.3090025
-2020-04-01,1.3066504
-2020-05-01,1.3096624
-2020-06-01,1.3129447
-2020-07-01,1.3090175
-2020-08-01,1.3032830
-2020-09-01,1.2986083
-2020-10-01,1.2874080
-2020-11-01,1.2760510
-2020-12-01,1.2640430
-2021-01-01,1.2458531
-2021-02-01,1.2424987
-2021-03-01,1.2323930
-2021-04-01,1.2218851
-2021-05-01,1.2172591
-2021-06-01,1.2056847
-2021-07-01,1.1984937
-2021-08-01,1.1863923
-2021-09-01,1.1760434
-2021-10-01,1.1620978
-2021-11-01,1.1487726
-2021-12-01,1.1392028
-2022-01-01,1.1309468
-2022-02-01,1.1234201
-2022-03-01,1.1122969
-2022-04-01,1.0935966
-2022-05-01,1.0823400
-2022-06-01,1.0774917
-2022-07-01,1.0708524
-2022-08-01,1.0773160
-2022-09-01,1.0806661
-2022-10-01,1.0841356
-2022-11-01,1.0790638
-2022-12-01,1.0749791
-2023-01-01,1.0676125
-2023-02-01,1.0627238
-2023-03-01,1.0546035
-2023-04-01,1.0478969
-2023-05-01,1.0423724
-2023-06-01,1.0386332
-2023-07-01,1.0396729
-2023-08-01,1.0406096
-2023-09-01,1.0385324
-2023-10-01,1.0373913
-2023-11-01,1.0361480
-2023-12-01,1.0351128
-2024-01-01,1.0294509
-2024-02-01,1.0236163
-2024-03-01,1.0153916
-2024-04-01,1.0134660
-2024-05-01,1.0097300
-2024-06-01,1.0051065
-2024-07-01,1.0026000
-2024-08-01,1.0000000
-"""
+from revisional import formatacao
+from revisional.amortizacao import tabela_amortizacao, taxa_implicita, totais_amortizacao
+from revisional.carteira import CAMPOS_CARTEIRA, DIMENSOES
+from revisional.cenarios import ler_datas, ler_taxas, tabela_cenarios, varrer_cenarios
+from revisional.dados import INDICES_POS_LEI
+from revisional.exportacao import exportar_bytes
+from revisional.grafo import grafo_hibrido
+from revisional.memo import chave, estatisticas, memo
+from revisional.relatorio import informacoes_caso, relatorio_bytes, resumo_totais
+from revisional.lei14905 import DATA_CORTE, IndicesPosLei
+from revisional.lote import ler_casos
+from revisional.medicao import etapa, iniciar
+from revisional.series import registro_padrao
+from revisional.tarefas import gerenciador
 
 # Configuração da Página
 st.set_page_config(page_title="Calculadora Revisional Híbrida", layout="wide")
 
+# Tempos e contadores deste rerun (expander de diagnóstico no fim da barra lateral)
+medicao = iniciar()
+
 st.markdown("""
 <style>
 @media print {
@@ -156,47 +62,34 @@ def fmt_pct(valor):
     if isinstance(valor, str): return valor
     return f"{fmt_br(valor)}%"
 
-# --- PROCESSAMENTO DOS DADOS ANTIGOS ---
-@st.cache_data
-def carregar_tabela_tjmg():
-    try:
-        df = pd.read_csv(io.StringIO(CSV_TJMG))
-        df['Data'] = pd.to_datetime(df['Data'], errors='coerce')
-        df['Fator_Acumulado'] = pd.to_numeric(df['Fator_Acumulado'], errors='coerce').fillna(1.0)
-        df = df.dropna(subset=['Data']).sort_values('Data')
-        df['periodo'] = df['Data'].dt.to_period('M')
-        return df
-    except:
-        return pd.DataFrame()
+def mapa_calor(df):
+    valores = df.to_numpy(dtype=float)
+    alfa = (valores - valores.min()) / (np.ptp(valores) or 1.0)
+    estilos = [[f"background-color: rgba(31, 119, 180, {0.1 + 0.6 * a:.2f})" for a in linha] for linha in alfa]
+    return pd.DataFrame(estilos, index=df.index, columns=df.columns)
 
-df_tjmg = carregar_tabela_tjmg()
-
-def calcular_fator_tjmg_parcial(data_venc, data_corte_limite):
-    if df_tjmg.empty: return 1.0
-    p_venc = pd.to_datetime(data_venc).to_period('M')
-    p_corte = pd.to_datetime(data_corte_limite).to_period('M')
-    
-    if p_venc > p_corte: return 1.0
-        
-    linha_corte = df_tjmg[df_tjmg['periodo'] == p_corte]
-    fator_fim = linha_corte['Fator_Acumulado'].iloc[0] if not linha_corte.empty else 1.0
-        
-    linha_venc = df_tjmg[df_tjmg['periodo'] == p_venc]
-    fator_inicio = linha_venc['Fator_Acumulado'].iloc[0] if not linha_venc.empty else 1.0
-        
-    return fator_inicio / fator_fim
+# --- TABELA TJMG (série TJMG_FATORES do registro do processo; meses acrescentados valem a partir do próximo rerun) ---
+tabela_tjmg = registro_padrao().tabela("TJMG_FATORES")
 
-def calcular_pmt_mensal(principal, taxa_mensal_pct, meses, antecipada=False):
-    taxa = taxa_mensal_pct / 100
-    if taxa == 0: return principal / meses
-    pmt = principal * (taxa * (1 + taxa)**meses) / ((1 + taxa)**meses - 1)
-    if antecipada:
-        pmt = pmt / (1 + taxa)
-    return pmt
+# Etapas do cálculo guardadas por sessão; cada nova execução refaz só o que mudou
+if "grafo_calculo" not in st.session_state:
+    st.session_state["grafo_calculo"] = grafo_hibrido()
+grafo_calculo = st.session_state["grafo_calculo"]
 
-@st.cache_data
 def convert_df(df):
-    return df.to_csv(index=False).encode('utf-8')
+    # Exportação em fluxo (revisional.exportacao): sem to_csv nem pickle do DataFrame no cache
+    return exportar_bytes({c: df[c].to_numpy() for c in df.columns}, "csv")
+
+def df_amortizacao(tabela, contrato):
+    linhas = tabela["contrato"] == contrato
+    return pd.DataFrame({
+        "Nº": tabela["parcela"][linhas],
+        "Saldo Devedor": formatacao.fmt_moeda(tabela["saldo_inicial"][linhas]),
+        "Juros": formatacao.fmt_moeda(tabela["juros"][linhas]),
+        "Amortização": formatacao.fmt_moeda(tabela["amortizacao"][linhas]),
+        "Prestação": formatacao.fmt_moeda(tabela["prestacao"][linhas]),
+        "Saldo Final": formatacao.fmt_moeda(tabela["saldo_final"][linhas]),
+    })
 
 # --- INTERFACE LATERAL ---
 st.sidebar.header("📋 Dados do Processo")
@@ -210,6 +103,17 @@ pagamento_antecipado = st.sidebar.checkbox("1ª Parcela paga no ato (Entrada / A
 data_inicio = st.sidebar.date_input("Início Contrato (Venc. 1ª Parcela)", date(2020, 7, 16), format="DD/MM/YYYY")
 valor_parcela_real = st.sidebar.number_input("Parcela Cobrada (R$)", min_value=0.0, value=243.94, step=10.0)
 
+# Taxa que a parcela cobrada realmente embute (inverte a PMT pelo prazo e pelo tipo de série)
+taxa_implicita_contrato = float(taxa_implicita(valor_emprestimo, valor_parcela_real, prazo_meses, pagamento_antecipado))
+taxa_confere = abs(taxa_implicita_contrato - taxa_contrato_mensal) < 0.005
+if taxa_implicita_contrato != taxa_implicita_contrato:
+    st.sidebar.caption("A parcela cobrada não cobre o valor emprestado no prazo: sem taxa implícita.")
+elif taxa_confere:
+    st.sidebar.caption(f"Taxa implícita na parcela cobrada: {fmt_pct(taxa_implicita_contrato)} a.m. (confere)")
+else:
+    st.sidebar.warning(f"A parcela cobrada embute {fmt_pct(taxa_implicita_contrato)} a.m., "
+                       f"não a taxa informada de {fmt_pct(taxa_contrato_mensal)} a.m.")
+
 st.sidebar.header("2. Decisão Judicial")
 taxa_judicial_mensal = st.sidebar.number_input("Nova Taxa Juros (Mensal %)", min_value=0.0, value=4.59, step=0.1)
 data_citacao = st.sidebar.date_input("Data Citação", date(2021, 5, 10), format="DD/MM/YYYY")
@@ -225,8 +129,14 @@ if excluir_str:
     except:
         st.sidebar.error("Erro ao ler parcelas excluídas.")
 
-# DATA DE CORTE AJUSTADA PARA O ACÓRDÃO
-DATA_CORTE = date(2024, 8, 28) 
+# Ponto fixo: cada valor arredondado ao centavo pela regra escolhida (revisional.centavos)
+ARREDONDAMENTOS = {
+    "Sem arredondamento intermediário": None,
+    "Centavo a centavo: meio para cima": "meio_para_cima",
+    "Centavo a centavo: ABNT NBR 5891 (meio par)": "meio_par",
+    "Centavo a centavo: truncar": "truncar",
+}
+arredondamento = ARREDONDAMENTOS[st.sidebar.selectbox("Arredondamento dos Valores", list(ARREDONDAMENTOS))]
 
 st.sidebar.markdown("---")
 
@@ -236,52 +146,37 @@ usar_fatores_exatos = st.sidebar.checkbox("Substituir tabela por Fator Exato do
 if usar_fatores_exatos:
     fator_selic_exato = st.sidebar.number_input("Fator Selic Acumulado (Ex: 1.20916309)", value=1.20916309, format="%.8f")
     fator_ipca_exato = st.sidebar.number_input("Fator IPCA Acumulado (Ex: 1.0662...)", value=1.06620000, format="%.8f")
+    pro_rata_diario = False
 else:
     with st.sidebar.expander("Tabela Mensal (Aproximada)"):
         st.info("Para maior precisão, ative os Fatores Exatos acima.")
-        dados_novos_init = [
-            {"Mes": date(2024, 9, 1),  "IPCA (%)": 0.44, "Selic Meta (%)": 0.84},
-            {"Mes": date(2024, 10, 1), "IPCA (%)": 0.56, "Selic Meta (%)": 0.93},
-            {"Mes": date(2024, 11, 1), "IPCA (%)": 0.39, "Selic Meta (%)": 0.79},
-            {"Mes": date(2024, 12, 1), "IPCA (%)": 0.52, "Selic Meta (%)": 0.93},
-            {"Mes": date(2025, 1, 1),  "IPCA (%)": 0.16, "Selic Meta (%)": 1.01},
-        ]
-        df_init = pd.DataFrame(dados_novos_init)
+        df_init = pd.DataFrame(INDICES_POS_LEI)
         df_init["Mes"] = pd.to_datetime(df_init["Mes"])
         df_novos_indices_input = st.data_editor(
             df_init, num_rows="dynamic",
             column_config={"Mes": st.column_config.DateColumn("Mês Ref.", format="MM/YYYY", step=1)},
             use_container_width=True
         )
-        df_novos_indices_input['periodo'] = df_novos_indices_input['Mes'].dt.to_period('M')
-
-def calcular_fator_ipca_pos(data_inicio_novo, data_fim_calculo):
-    p_ini = pd.to_datetime(data_inicio_novo).to_period('M')
-    p_fim = pd.to_datetime(data_fim_calculo).to_period('M')
-    df_filtrado = df_novos_indices_input[(df_novos_indices_input['periodo'] >= p_ini) & (df_novos_indices_input['periodo'] <= p_fim)]
-    fator = 1.0
-    for idx, row in df_filtrado.iterrows():
-        fator *= (1 + row['IPCA (%)'] / 100)
-    return fator
-
-def calcular_juros_lei_nova_tabela(valor_corrigido_ipca, data_inicio_novo, data_fim_calculo):
-    p_ini = pd.to_datetime(data_inicio_novo).to_period('M')
-    p_fim = pd.to_datetime(data_fim_calculo).to_period('M')
-    df_filtrado = df_novos_indices_input[(df_novos_indices_input['periodo'] >= p_ini) & (df_novos_indices_input['periodo'] <= p_fim)]
-    
-    fator_selic_acumulado = 1.0
-    fator_ipca_acumulado = 1.0
-    for idx, row in df_filtrado.iterrows():
-        fator_selic_acumulado *= (1 + (row['Selic Meta (%)'] / 100))
-        fator_ipca_acumulado *= (1 + (row['IPCA (%)'] / 100))
-        
-    var_selic_pct = (fator_selic_acumulado - 1) * 100
-    var_ipca_pct = (fator_ipca_acumulado - 1) * 100
-    juros_acumulados_pct = max(0, var_selic_pct - var_ipca_pct)
-    
-    valor_juros_reais = valor_corrigido_ipca * (juros_acumulados_pct / 100)
-    return valor_juros_reais, var_selic_pct, var_ipca_pct, juros_acumulados_pct
+        pro_rata_diario = st.checkbox("Pro rata die (Selic por dia útil, IPCA por dia corrido)", value=False)
+
+st.sidebar.markdown("---")
+
+st.sidebar.header("🔀 Comparar Cenários (Opcional)")
+with st.sidebar.expander("Grade de Cenários"):
+    cenarios_taxas = st.text_input("Taxas Judiciais (% a.m.)", value=f"1.0, 1.5, 2.0, {taxa_judicial_mensal}",
+                                   help="Lista (1.5, 2.0, 4.59) ou faixa início:fim:passo (1:5:0.5)")
+    cenarios_citacoes = st.text_input("Datas de Citação", value=data_citacao.strftime('%d/%m/%Y'))
+    cenarios_calculos = st.text_input("Datas Base de Cálculo", value=data_calculo.strftime('%d/%m/%Y'))
+comparar_cenarios = st.sidebar.button("Comparar Cenários")
+
+st.sidebar.markdown("---")
 
+st.sidebar.header("📦 Lote de Contratos (Opcional)")
+with st.sidebar.expander("Arquivo de Casos"):
+    arquivo_lote = st.file_uploader("Casos (CSV ou Parquet)", type=["csv", "parquet"],
+                                    help="Mesmas colunas do cálculo em lote (python -m revisional): valor_emprestimo, "
+                                         "prazo_meses, taxa, valor_parcela, data_inicio, data_citacao, data_calculo")
+calcular_lote = st.sidebar.button("Calcular Lote", disabled=arquivo_lote is None)
 
 # --- PROCESSAMENTO PRINCIPAL ---
 if st.sidebar.button("Calcular Execução", type="primary"):
@@ -290,8 +185,25 @@ if st.sidebar.button("Calcular Execução", type="primary"):
     if nome_cliente: st.write(f"**Cliente:** {nome_cliente}")
         
     # Calculando parcela sem o arredondamento interno
-    parcela_revisada = calcular_pmt_mensal(valor_emprestimo, taxa_judicial_mensal, prazo_meses, antecipada=pagamento_antecipado)
-    diferenca_base = valor_parcela_real - parcela_revisada
+    # Contrato já calculado em qualquer sessão vem do cache do processo (revisional.memo); senão, o grafo
+    # incremental da sessão (revisional.grafo) refaz só as etapas afetadas pelas entradas alteradas
+    entradas = dict(
+        tabela_tjmg=tabela_tjmg, valor_emprestimo=valor_emprestimo, taxa_judicial=taxa_judicial_mensal,
+        prazo_meses=prazo_meses, antecipada=pagamento_antecipado, valor_parcela=valor_parcela_real,
+        data_inicio=data_inicio, data_citacao=data_citacao, data_calculo=data_calculo, data_corte=DATA_CORTE,
+        usar_fatores_exatos=usar_fatores_exatos,
+        fator_ipca_exato=fator_ipca_exato if usar_fatores_exatos else None,
+        fator_selic_exato=fator_selic_exato if usar_fatores_exatos else None,
+        registros_pos_lei=None if usar_fatores_exatos else df_novos_indices_input.to_dict("records"),
+        pro_rata_diario=pro_rata_diario, parcelas_excluidas=parcelas_excluidas, arredondamento=arredondamento,
+    )
+    with etapa("planilha.calculo"):
+        resultado = memo("contratos").obter(
+            chave("planilha", entradas),
+            lambda: grafo_calculo.calcular(("parcela_revisada", "diferenca_base", "valores", "tabela"), **entradas),
+        )
+    parcela_revisada = resultado["parcela_revisada"]
+    diferenca_base = resultado["diferenca_base"]
     
     st.markdown(f"""
     <div class="info-cabecalho">
@@ -306,6 +218,9 @@ if st.sidebar.button("Calcular Execução", type="primary"):
     colA.metric(f"Parcela do Contrato ({fmt_pct(taxa_contrato_mensal)} a.m.)", fmt_moeda(valor_parcela_real))
     colB.metric(f"Parcela Judicial ({fmt_pct(taxa_judicial_mensal)} a.m.)", fmt_moeda(parcela_revisada))
     colC.metric("Indébito Mensal (Diferença)", fmt_moeda(diferenca_base))
+    if taxa_implicita_contrato == taxa_implicita_contrato and not taxa_confere:
+        st.warning(f"Taxa implícita na parcela cobrada: {fmt_pct(taxa_implicita_contrato)} a.m. "
+                   f"(contrato informa {fmt_pct(taxa_contrato_mensal)} a.m.).")
     
     st.divider()
 
@@ -330,124 +245,40 @@ if st.sidebar.button("Calcular Execução", type="primary"):
     * **i (Taxa Judicial Fixada):** {fmt_pct(taxa_judicial_mensal)} a.m. (Fator decimal: {i_dec:.6f})
     * **n (Prazo total):** {prazo_meses} meses
     """)
+
+    # Tabelas completas pelas duas taxas, Price e SAC, numa só chamada vetorizada por sistema
+    with st.expander("📑 Tabelas de Amortização (Taxa do Contrato x Taxa Judicial)"):
+        abas = st.tabs(["Price", "SAC"])
+        for aba, sistema in zip(abas, ("price", "sac")):
+            with etapa("planilha.amortizacao"):
+                tabela_amort = tabela_amortizacao(valor_emprestimo, [taxa_contrato_mensal, taxa_judicial_mensal],
+                                                  prazo_meses, sistema, pagamento_antecipado)
+                juros_totais = totais_amortizacao(tabela_amort)["juros"]
+            with aba:
+                colT1, colT2, colT3 = st.columns(3)
+                colT1.metric(f"Juros pelo Contrato ({fmt_pct(taxa_contrato_mensal)} a.m.)", fmt_moeda(juros_totais[0]))
+                colT2.metric(f"Juros pela Taxa Judicial ({fmt_pct(taxa_judicial_mensal)} a.m.)",
+                             fmt_moeda(juros_totais[1]))
+                colT3.metric("Juros Cobrados a Maior", fmt_moeda(juros_totais[0] - juros_totais[1]))
+                colA1, colA2 = st.columns(2)
+                colA1.markdown("**Taxa do Contrato**")
+                colA1.dataframe(df_amortizacao(tabela_amort, 0), hide_index=True, use_container_width=True)
+                colA2.markdown("**Taxa Judicial**")
+                colA2.dataframe(df_amortizacao(tabela_amort, 1), hide_index=True, use_container_width=True)
     st.divider()
     # ------------------------------------------------
     
-    dados = []
-    totais = {"Principal": 0, "CM": 0, "Juros_1_pct": 0, "Juros_Selic": 0}
-
-    for i in range(1, prazo_meses + 1):
-        vencimento = data_inicio + relativedelta(months=(i-1))
-        if vencimento > data_calculo: break
-
-        dias_cm = (data_calculo - vencimento).days
-        info_tempo_cm = f"{dias_cm}d" if dias_cm > 0 else "0d"
-
-        if i in parcelas_excluidas:
-            dados.append({
-                "Nº": i, "Vencimento": vencimento.strftime("%d/%m/%Y"), "Original": "-", "Tempo CM (Dias)": "-", 
-                "Fator TJMG": "-", "Fator IPCA": "-", "Principal Atualizado": "-", "Taxa 1% (Dias)": "-", 
-                "Juros 1% a.m.": "-", "Taxa (Selic - IPCA)": "-", "Juros Lei 14.905": "-", "Total Devido": "-"
-            })
-            continue 
-            
-        dias_tjmg = 0
-        dias_ipca = 0
-        dias_antigos = 0
-        taxa_antiga_pct = 0.0
-        juros_antigo_val = 0.0
-        juros_novos_val = 0.0
-        info_mora_selic = "-"
-        
-        if vencimento <= DATA_CORTE:
-            fator_tjmg = calcular_fator_tjmg_parcial(vencimento, DATA_CORTE)
-            valor_em_agosto = diferenca_base * fator_tjmg
-            
-            if data_calculo <= DATA_CORTE:
-                dias_tjmg = (data_calculo - vencimento).days
-            else:
-                dias_tjmg = (DATA_CORTE - vencimento).days
-                dias_ipca = (data_calculo - DATA_CORTE).days 
-            
-            inicio_juros_antigo = max(vencimento, data_citacao)
-            if inicio_juros_antigo < DATA_CORTE:
-                dias_antigos = (DATA_CORTE - inicio_juros_antigo).days
-                taxa_antiga_pct = (dias_antigos / 30) * 1.0 
-                juros_antigo_val = valor_em_agosto * (taxa_antiga_pct / 100)
-                
-            saldo_principal_agosto = valor_em_agosto
-            
-            if data_calculo > DATA_CORTE:
-                if usar_fatores_exatos:
-                    fator_ipca = fator_ipca_exato
-                    valor_final_principal = saldo_principal_agosto * fator_ipca
-                    
-                    var_selic_pct = (fator_selic_exato - 1) * 100
-                    var_ipca_pct = (fator_ipca_exato - 1) * 100
-                    juros_acumulados_pct = max(0, var_selic_pct - var_ipca_pct)
-                    juros_novos_val = valor_final_principal * (juros_acumulados_pct / 100)
-                    info_mora_selic = f"{fmt_br(var_selic_pct)}% - {fmt_br(var_ipca_pct)}% = {fmt_br(juros_acumulados_pct)}%"
-                else:
-                    fator_ipca = calcular_fator_ipca_pos(date(2024, 9, 1), data_calculo)
-                    valor_final_principal = saldo_principal_agosto * fator_ipca
-                    juros_novos_val, v_selic, v_ipca, juros_acum = calcular_juros_lei_nova_tabela(valor_final_principal, date(2024, 9, 1), data_calculo)
-                    info_mora_selic = f"{fmt_br(v_selic)}% - {fmt_br(v_ipca)}% = {fmt_br(juros_acum)}%"
-            else:
-                valor_final_principal = saldo_principal_agosto
-                fator_ipca = 1.0
-        else:
-            fator_tjmg = 1.0
-            fator_ipca = fator_ipca_exato if usar_fatores_exatos else 1.0
-            valor_final_principal = diferenca_base * fator_ipca
-
-        total_linha = valor_final_principal + juros_antigo_val + juros_novos_val
-        
-        str_fator_tjmg = f"{fmt_br(fator_tjmg, 4)} ({dias_tjmg}d)" if dias_tjmg > 0 else "-"
-        str_fator_ipca = f"{fmt_br(fator_ipca, 4)}" if dias_ipca > 0 else "-"
-        info_mora_1 = f"{fmt_br(taxa_antiga_pct)}% ({dias_antigos}d)" if dias_antigos > 0 else "-"
-
-        dados.append({
-            "Nº": i, 
-            "Vencimento": vencimento.strftime("%d/%m/%Y"), 
-            "Original": fmt_moeda(diferenca_base), 
-            "Tempo CM (Dias)": info_tempo_cm, 
-            "Fator TJMG": str_fator_tjmg, 
-            "Fator IPCA": str_fator_ipca, 
-            "Principal Atualizado": fmt_moeda(valor_final_principal), 
-            "Taxa 1% (Dias)": info_mora_1, 
-            "Juros 1% a.m.": fmt_moeda(juros_antigo_val), 
-            "Taxa (Selic - IPCA)": info_mora_selic, 
-            "Juros Lei 14.905": fmt_moeda(juros_novos_val), 
-            "Total Devido": fmt_moeda(total_linha)
-        })
-        
-        totais["Principal"] += diferenca_base
-        totais["CM"] += (valor_final_principal - diferenca_base)
-        totais["Juros_1_pct"] += juros_antigo_val
-        totais["Juros_Selic"] += juros_novos_val
-
-    df_res = pd.DataFrame(dados)
+    cronograma, totais = resultado["valores"]
+    # A tabela calculada continua tipada (cronograma); o texto em formato brasileiro
+    # é gerado de uma vez, por coluna, só para a tabela exibida e exportada
+    df_res = pd.DataFrame(resultado["tabela"])
     
     if not df_res.empty:
         
-        # --- A MÁGICA DO HTML SEGURO ---
-        html_tabela = df_res.to_html(index=False)
-        
-        bloco_inquebravel = f"""
-        <div style="page-break-inside: avoid; width: 100%;">
-            <h3 style="font-family: 'Source Sans Pro', sans-serif; color: #1f2937; margin-bottom: 10px;">
-                Memória de Cálculo Parcelada
-            </h3>
-            <style>
-            .dataframe {{ width: 100%; border-collapse: collapse; font-family: 'Source Sans Pro', sans-serif; font-size: 11px; text-align: center; }}
-            .dataframe th {{ background-color: #f0f2f6; border: 1px solid #dcdcdc; padding: 6px; text-align: center; color: #1f2937; }}
-            .dataframe td {{ border: 1px solid #dcdcdc; padding: 4px; color: #1f2937; }}
-            </style>
-            {html_tabela}
-        </div>
-        """
-        st.markdown(bloco_inquebravel, unsafe_allow_html=True)
-        # -------------------------------
+        # Tabela em grade virtualizada; o relatório completo (HTML/PDF) é gerado no servidor
+        st.markdown("### Memória de Cálculo Parcelada")
+        with etapa("planilha.exibicao"):
+            st.dataframe(df_res, hide_index=True, use_container_width=True)
         
         st.divider()
         st.markdown("### 🏛️ Resumo da Condenação a Executar")
@@ -463,22 +294,140 @@ if st.sidebar.button("Calcular Execução", type="primary"):
         st.divider()
         col_btn1, col_btn2 = st.columns(2)
         with col_btn1:
-            csv = convert_df(df_res)
+            with etapa("planilha.exportacao"):
+                csv = convert_df(df_res)
+                # Memória de cálculo com valores numéricos (datas, fatores e valores sem formatação)
+                xlsx = exportar_bytes(cronograma, "xlsx")
             st.download_button("💾 Baixar Tabela (Excel/CSV)", csv, "calculo_judicial.csv", "text/csv", use_container_width=True)
+            st.download_button("📊 Baixar Memória de Cálculo (XLSX)", xlsx, "memoria_calculo.xlsx",
+                               "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                               use_container_width=True)
             
         with col_btn2:
-            html_botao = """
-            <script>
-            function imprimir() { window.parent.print(); }
-            </script>
-            <style>
-            .btn-imprimir {
-                background-color: #2e7d32; color: white; border: none; padding: 0.5rem 1rem;
-                font-size: 16px; border-radius: 8px; cursor: pointer; font-weight: bold;
-                text-align: center; width: 100%; font-family: 'Source Sans Pro', sans-serif; margin-top: 15px;
+            caso_relatorio = {
+                "nome_cliente": nome_cliente, "valor_emprestimo": valor_emprestimo, "prazo_meses": prazo_meses,
+                "taxa": taxa_judicial_mensal, "valor_parcela": valor_parcela_real,
+                "data_citacao": data_citacao, "data_calculo": data_calculo,
             }
-            .btn-imprimir:hover { background-color: #1b5e20; }
-            </style>
-            <button onclick="imprimir()" class="btn-imprimir">🖨️ Imprimir Relatório (PDF)</button>
-            """
-            components.html(html_botao, height=70)
+            informacoes = informacoes_caso(caso_relatorio, parcela_revisada)
+            resumo = resumo_totais(totais)
+            st.download_button("🖨️ Baixar Relatório (PDF)", relatorio_bytes(cronograma, informacoes, resumo, "pdf"),
+                               "relatorio_revisional.pdf", "application/pdf", use_container_width=True)
+            st.download_button("🌐 Baixar Relatório (HTML)", relatorio_bytes(cronograma, informacoes, resumo, "html"),
+                               "relatorio_revisional.html", "text/html", use_container_width=True)
+
+# --- COMPARAÇÃO DE CENÁRIOS ---
+if comparar_cenarios:
+    try:
+        taxas_grade = ler_taxas(cenarios_taxas)
+        citacoes_grade = ler_datas(cenarios_citacoes)
+        calculos_grade = ler_datas(cenarios_calculos)
+    except ValueError as e:
+        st.error(f"Grade de cenários inválida: {e}")
+    else:
+        st.markdown("### 🔀 Comparação de Cenários")
+        if usar_fatores_exatos:
+            st.caption("Os fatores exatos valem para uma única data de cálculo; os cenários usam a tabela mensal padrão.")
+            indices_cenarios = IndicesPosLei.do_registro()
+        else:
+            indices_cenarios = IndicesPosLei.de_registros(df_novos_indices_input.to_dict("records"))
+
+        # Todos os cenários numa só conta vetorizada (taxas x citações x cálculos x parcelas)
+        with etapa("planilha.cenarios"):
+            resultado = varrer_cenarios(
+                tabela_tjmg, valor_emprestimo, valor_parcela_real, prazo_meses, data_inicio,
+                taxas_grade, citacoes_grade, calculos_grade, antecipada=pagamento_antecipado,
+                parcelas_excluidas=parcelas_excluidas, indices_pos_lei=indices_cenarios,
+                pro_rata_diario=pro_rata_diario,
+            )
+        rotulos_calculo = pd.to_datetime(calculos_grade).strftime("%d/%m/%Y")
+        for j, citacao in enumerate(pd.to_datetime(citacoes_grade).strftime("%d/%m/%Y")):
+            st.markdown(f"**Citação em {citacao}** — Total Final por taxa judicial (linhas) e data de cálculo (colunas)")
+            mapa = pd.DataFrame(resultado["Total"][:, j, :], index=[fmt_pct(t) for t in taxas_grade],
+                                columns=rotulos_calculo)
+            st.dataframe(mapa.style.apply(mapa_calor, axis=None).format(fmt_moeda), use_container_width=True)
+
+        df_cenarios = pd.DataFrame(tabela_cenarios(resultado))
+        st.dataframe(df_cenarios, use_container_width=True, hide_index=True)
+        st.download_button("💾 Baixar Cenários (Excel/CSV)", convert_df(df_cenarios), "cenarios_revisional.csv",
+                           "text/csv", use_container_width=True)
+
+# --- LOTE DE CONTRATOS (em segundo plano, revisional.tarefas) ---
+# O lote roda no pool de processos do gerenciador; o script só acompanha o
+# progresso num fragmento que se atualiza sozinho, e o resto da tela segue livre
+if calcular_lote:
+    try:
+        casos_lote = ler_casos(arquivo_lote)
+    except (OSError, ValueError) as e:
+        st.sidebar.error(f"Arquivo de casos inválido: {e}")
+    else:
+        if "tarefa_lote" in st.session_state:
+            gerenciador().esquecer(st.session_state["tarefa_lote"].id)
+        st.session_state["tarefa_lote"] = gerenciador().submeter(casos_lote, "hibrida", arredondamento)
+
+@st.fragment(run_every=1.0)
+def acompanhar_lote():
+    tarefa = st.session_state.get("tarefa_lote")
+    if tarefa is None:
+        return
+    if not tarefa.ativa:
+        # Terminou: o resultado completo sai uma vez, no script inteiro (abaixo)
+        if st.session_state.get("lote_exibido") != tarefa.id:
+            st.session_state["lote_exibido"] = tarefa.id
+            st.rerun()
+        return
+    st.markdown("### 📦 Lote de Contratos")
+    st.progress(tarefa.progresso, text=f"{tarefa.feitos} de {tarefa.total} contratos ({tarefa.decorrido:.0f} s)")
+    colL1, colL2 = st.columns(2)
+    colL1.metric("Total Parcial do Lote", fmt_moeda(tarefa.totais["Total"]))
+    if colL2.button("⏹️ Cancelar Lote"):
+        tarefa.cancelar()
+    parciais = tarefa.colunas(max(tarefa.feitos - 20, 0))
+    if parciais is not None:
+        st.dataframe(parciais.para_pandas(), hide_index=True, use_container_width=True)
+
+acompanhar_lote()
+
+tarefa_lote = st.session_state.get("tarefa_lote")
+if tarefa_lote is not None and not tarefa_lote.ativa:
+    st.markdown("### 📦 Lote de Contratos")
+    if tarefa_lote.estado == "concluida":
+        st.success(f"{tarefa_lote.feitos} contratos calculados em {tarefa_lote.decorrido:.1f} s.")
+    elif tarefa_lote.estado == "cancelada":
+        st.warning(f"Lote cancelado: {tarefa_lote.feitos} de {tarefa_lote.total} contratos calculados.")
+    else:
+        st.error(f"Falha no lote: {tarefa_lote.erro}")
+    if tarefa_lote.feitos:
+        colunas_lote = tarefa_lote.colunas()
+        st.metric("TOTAL DO LOTE", fmt_moeda(tarefa_lote.totais["Total"]))
+        st.dataframe(colunas_lote.para_pandas(), hide_index=True, use_container_width=True)
+        # Totais da carteira por grupo, acumulados pela tarefa bloco a bloco (revisional.carteira)
+        abas_carteira = st.tabs(["Por Cliente", "Por Ano de Início", "Por Ano de Citação"])
+        for aba, dimensao in zip(abas_carteira, DIMENSOES):
+            with aba:
+                agrupado = tarefa_lote.agrupado(dimensao)
+                colunas_carteira = [dimensao, "contratos", "parcelas", *CAMPOS_CARTEIRA,
+                                    "Total_media", "Total_desvio", "Total_min", "Total_max"]
+                st.dataframe(pd.DataFrame(agrupado)[colunas_carteira], hide_index=True, use_container_width=True)
+        # O CSV do lote é gerado uma vez por tarefa, não a cada rerun
+        if st.session_state.get("csv_lote", (None,))[0] != tarefa_lote.id:
+            st.session_state["csv_lote"] = (tarefa_lote.id, exportar_bytes(colunas_lote, "csv"))
+        st.download_button("💾 Baixar Resultados do Lote (CSV)", st.session_state["csv_lote"][1],
+                           "lote_revisional.csv", "text/csv", use_container_width=True)
+
+# --- CACHE COMPARTILHADO (contadores do processo) ---
+for cache in estatisticas():
+    st.sidebar.caption(f"Cache {cache['cache']}: {cache['entradas']}/{cache['limite']} itens, "
+                       f"{cache['acertos']} acertos, {cache['falhas']} falhas")
+
+# --- DIAGNÓSTICO (revisional.medicao: tempos por etapa e contadores desta execução) ---
+with st.sidebar.expander("🩺 Diagnóstico"):
+    st.caption(f"Execução do script até aqui: {medicao.decorrido_ms:,.0f} ms")
+    st.dataframe(pd.DataFrame(medicao.tabela()), hide_index=True, use_container_width=True)
+    contadores = medicao.como_dict()["contadores"]
+    if contadores:
+        st.dataframe(pd.DataFrame({"contador": list(contadores), "valor": list(contadores.values())}),
+                     hide_index=True, use_container_width=True)
+    if tarefa_lote is not None:
+        st.caption("Último lote (soma dos processos)")
+        st.dataframe(pd.DataFrame(tarefa_lote.medicao.tabela()), hide_index=True, use_container_width=True)
@@ -0,0 +1 @@
+"""Benchmarks do cálculo revisional (python -m benchmarks)."""
@@ -0,0 +1,244 @@
+"""
+Benchmarks dos caminhos quentes do cálculo revisional.
+
+Mede as buscas de fatores (TJMG e pós-lei), a PMT, os cronogramas completos
+(regras tjmg e hibrida) e as tabelas Price/SAC sobre carteiras sintéticas de 1,
+100, 10 mil e 1 milhão de parcelas, o tempo de importação a frio e a
+renderização HTML/CSV/PDF.
+
+Uso (na raiz do repositório):
+    python -m benchmarks                        # roda e compara com benchmarks/baseline.json
+    python -m benchmarks --salvar-baseline      # grava os resultados como nova baseline
+    python -m benchmarks --tamanhos 1 100 --saida resultados.json
+
+Sai com código 1 se algum caso ficar mais lento que a baseline além da tolerância.
+A baseline depende da máquina: regrave-a ao trocar de ambiente.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import timeit
+from datetime import date, timedelta
+from pathlib import Path
+
+import numpy as np
+
+from revisional.amortizacao import SISTEMAS, tabela_amortizacao
+from revisional.cronograma import calcular_cronograma_hibrido
+from revisional.dados import tabela_tjmg_fatores, tabela_tjmg_indices
+from revisional.financeiro import calcular_pmt_mensal
+from revisional.indices import ordinais_mes, ordinal_mes
+from revisional.lei14905 import DATA_CORTE, INICIO_POS_LEI, IndicesPosLei, calcular_juros_lei_nova
+from revisional.lote import calcular_caso
+from revisional.relatorio import FORMATOS_RELATORIO, relatorio_bytes
+
+BASELINE = Path(__file__).with_name("baseline.json")
+TAMANHOS = (1, 100, 10_000, 1_000_000)
+TAMANHOS_RENDER = (100, 10_000)
+DATA_CALCULO = date(2025, 6, 30)
+
+
+# --- CARTEIRA SINTÉTICA ---
+def carteira(n_parcelas, semente=2024):
+    """Contratos de até 100 parcelas somando n_parcelas, com inícios entre 2012 e 2023."""
+    prazo = min(n_parcelas, 100)
+    rng = np.random.default_rng(semente)
+    casos = []
+    for k in range(max(1, n_parcelas // prazo)):
+        data_inicio = date(2012, 1, 1) + timedelta(days=int(rng.integers(0, 12 * 365)))
+        # Vencimentos até o cálculo: contratos longos começam cedo o bastante
+        data_inicio = min(data_inicio, date(2025, 6, 1) - timedelta(days=31 * prazo))
+        valor = float(rng.uniform(1_000, 50_000))
+        taxa_contrato = float(rng.uniform(3, 8))
+        antecipada = bool(rng.integers(0, 2))
+        casos.append({
+            "id": k + 1,
+            "valor_emprestimo": valor,
+            "prazo_meses": prazo,
+            "taxa": round(taxa_contrato / 2, 2),
+            "valor_parcela": calcular_pmt_mensal(valor, taxa_contrato, prazo, antecipada=antecipada),
+            "data_inicio": data_inicio,
+            "data_citacao": data_inicio + timedelta(days=int(rng.integers(0, 3 * 365))),
+            "data_calculo": DATA_CALCULO,
+            "antecipada": antecipada,
+            "parcelas_excluidas": [],
+        })
+    return casos
+
+
+# --- CASOS ---
+def casos_unitarios():
+    """Chamadas escalares das funções de busca e das fórmulas (1 item por chamada)."""
+    indices = tabela_tjmg_indices()
+    fatores = tabela_tjmg_fatores()
+    pos_lei = IndicesPosLei.do_registro()
+    vencimento = date(2019, 3, 16)
+    vencimentos = np.datetime64("2012-01-16") + np.arange(10_000) % 4_900
+    return [
+        ("fator_correcao_tjmg", lambda: indices.fator_correcao(vencimento, DATA_CALCULO), 1),
+        ("fator_ate_corte_tjmg", lambda: fatores.fator_ate_corte(vencimento, DATA_CORTE), 1),
+        ("fatores_correcao_tjmg_lote", lambda: indices.fatores_correcao(ordinais_mes(vencimentos),
+                                                                         ordinal_mes(DATA_CALCULO)), 10_000),
+        ("calcular_pmt_mensal", lambda: calcular_pmt_mensal(3921.41, 4.59, 45, antecipada=True), 1),
+        ("indices_pos_lei_fator", lambda: pos_lei.fator(INICIO_POS_LEI, DATA_CALCULO), 1),
+        ("calcular_juros_lei_nova", lambda: calcular_juros_lei_nova(1000.0, 1.0458, 1.0209), 1),
+    ]
+
+
+def casos_cronograma(tamanhos):
+    """Cronograma completo (PMT + parcelas + totais) de cada contrato da carteira."""
+    casos = []
+    for n in tamanhos:
+        contratos = carteira(n)
+        for regra in ("tjmg", "hibrida"):
+            casos.append((f"cronograma_{regra}_{n}", lambda c=contratos, r=regra: [calcular_caso(x, r) for x in c], n))
+    return casos
+
+
+def casos_amortizacao(tamanhos):
+    """Tabelas Price e SAC de todos os contratos da carteira numa só chamada vetorizada."""
+    casos = []
+    for n in tamanhos:
+        contratos = carteira(n)
+        entradas = [np.array([c[k] for c in contratos])
+                    for k in ("valor_emprestimo", "taxa", "prazo_meses", "antecipada")]
+        for sistema in SISTEMAS:
+            casos.append((f"amortizacao_{sistema}_{n}",
+                          lambda e=entradas, s=sistema: tabela_amortizacao(*e[:3], s, e[3]), n))
+    return casos
+
+
+def casos_render(tamanhos):
+    """Tabela de parcelas (memória de cálculo) em HTML e CSV via pandas e o relatório HTML/PDF em fluxo."""
+    try:
+        import pandas as pd
+    except ImportError:
+        return []
+    casos = []
+    tabela = tabela_tjmg_fatores()
+    for n in tamanhos:
+        partes = []
+        for caso in carteira(n):
+            partes.append(calcular_cronograma_hibrido(
+                tabela, 100.0, caso["prazo_meses"], caso["data_inicio"], caso["data_citacao"],
+                caso["data_calculo"], DATA_CORTE, 1.02, 1.04,
+            ))
+        colunas = {k: np.concatenate([np.broadcast_to(p[k], p["parcela"].shape) for p in partes]) for k in partes[0]}
+        df = pd.DataFrame(colunas)
+        casos.append((f"render_html_{n}", lambda d=df: d.to_html(index=False), len(df)))
+        casos.append((f"render_csv_{n}", lambda d=df: d.to_csv(index=False), len(df)))
+        cronograma = {**partes[0], **{k: v for k, v in colunas.items() if isinstance(partes[0][k], np.ndarray)}}
+        for formato in FORMATOS_RELATORIO:
+            casos.append((f"relatorio_{formato}_{n}",
+                          lambda c=cronograma, f=formato: relatorio_bytes(c, formato=f), len(df)))
+    return casos
+
+
+def medir_importacao(repeticoes=5):
+    """Tempo de processo novo: importar revisional e carregar as tabelas (sem cache e com cache em disco)."""
+    codigo = "import revisional; revisional.tabela_tjmg_indices(); revisional.tabela_tjmg_fatores()"
+    raiz = str(Path(__file__).resolve().parent.parent)
+    resultados = {}
+    with tempfile.TemporaryDirectory() as diretorio:
+        for nome, cache, comando in (
+            ("interpretador", "", "pass"),
+            ("importacao_sem_cache", "", codigo),
+            ("importacao_cache_disco", diretorio, codigo),
+        ):
+            env = dict(os.environ, REVISIONAL_CACHE_DIR=cache, PYTHONPATH=raiz)
+            subprocess.run([sys.executable, "-c", comando], env=env, check=True)  # aquece o cache
+            tempos = []
+            for _ in range(repeticoes):
+                inicio = timeit.default_timer()
+                subprocess.run([sys.executable, "-c", comando], env=env, check=True)
+                tempos.append(timeit.default_timer() - inicio)
+            resultados[nome] = {"segundos": min(tempos), "itens": 1}
+    return resultados
+
+
+# --- EXECUÇÃO ---
+def medir(chamada, repeticoes):
+    """Melhor tempo por chamada (s), com número de execuções calibrado como no timeit."""
+    timer = timeit.Timer(chamada)
+    numero, _ = timer.autorange()
+    return min(timer.repeat(repeticoes, numero)) / numero
+
+
+def executar(tamanhos=TAMANHOS, repeticoes=5, importacao=True, render=True, saida=print):
+    casos = casos_unitarios() + casos_cronograma(tamanhos) + casos_amortizacao(tamanhos)
+    if render:
+        casos += casos_render([n for n in TAMANHOS_RENDER if n in tamanhos] or [min(tamanhos)])
+    resultados = {}
+    for nome, chamada, itens in casos:
+        segundos = medir(chamada, repeticoes)
+        resultados[nome] = {"segundos": segundos, "itens": itens}
+        saida(f"{nome:<34} {segundos * 1e3:12.4f} ms  ({segundos / itens * 1e6:10.4f} us/item)")
+    if importacao:
+        for nome, resultado in medir_importacao().items():
+            resultados[nome] = resultado
+            saida(f"{nome:<34} {resultado['segundos'] * 1e3:12.4f} ms")
+    return {
+        "ambiente": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "maquina": platform.machine(),
+            "sistema": platform.platform(),
+        },
+        "casos": resultados,
+    }
+
+
+def comparar(resultados, baseline, tolerancia, piso=1e-6):
+    """
+    Casos mais lentos que a baseline além da tolerância (ex.: 0.5 = 50%).
+    Diferenças absolutas abaixo de `piso` segundos são ruído e não contam.
+    """
+    regressoes = []
+    for nome, atual in resultados["casos"].items():
+        base = baseline.get("casos", {}).get(nome)
+        if base is None:
+            continue
+        razao = atual["segundos"] / base["segundos"]
+        if razao > 1 + tolerancia and atual["segundos"] - base["segundos"] > piso:
+            regressoes.append((nome, base["segundos"], atual["segundos"], razao))
+    return regressoes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Benchmarks do cálculo revisional.")
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=list(TAMANHOS),
+                        help="tamanhos das carteiras sintéticas, em parcelas")
+    parser.add_argument("--repeticoes", type=int, default=5, help="repetições por caso (vale o melhor tempo)")
+    parser.add_argument("--saida", help="grava os resultados em JSON")
+    parser.add_argument("--baseline", default=str(BASELINE), help="baseline para comparação")
+    parser.add_argument("--salvar-baseline", action="store_true", help="grava os resultados como baseline")
+    parser.add_argument("--tolerancia", type=float, default=0.5,
+                        help="aumento relativo tolerado antes de acusar regressão (padrão: 0.5)")
+    parser.add_argument("--sem-importacao", action="store_true", help="não mede a importação a frio")
+    parser.add_argument("--sem-render", action="store_true", help="não mede a renderização HTML/CSV")
+    args = parser.parse_args(argv)
+
+    resultados = executar(args.tamanhos, args.repeticoes, not args.sem_importacao, not args.sem_render)
+    texto = json.dumps(resultados, indent=2, ensure_ascii=False) + "\n"
+    if args.saida:
+        Path(args.saida).write_text(texto, encoding="utf-8")
+    if args.salvar_baseline:
+        Path(args.baseline).write_text(texto, encoding="utf-8")
+        print(f"Baseline gravada em {args.baseline}")
+        return 0
+
+    caminho = Path(args.baseline)
+    if not caminho.exists():
+        print(f"Sem baseline em {caminho}: nada a comparar (use --salvar-baseline).")
+        return 0
+    regressoes = comparar(resultados, json.loads(caminho.read_text(encoding="utf-8")), args.tolerancia)
+    for nome, base, atual, razao in regressoes:
+        print(f"REGRESSÃO {nome}: {base * 1e3:.4f} ms -> {atual * 1e3:.4f} ms ({razao:.2f}x)")
+    if regressoes:
+        return 1
+    print(f"Sem regressões acima de {args.tolerancia:.0%} em relação a {caminho}.")
+    return 0
@@ -0,0 +1 @@
+"""Conferência do núcleo vetorizado contra a lógica original dos scripts (python -m conferencia)."""
@@ -0,0 +1,5 @@
+import sys
+
+from conferencia.diferencial import main
+
+sys.exit(main())
@@ -0,0 +1,242 @@
+"""
+Conferência diferencial: núcleo vetorizado (revisional) x lógica original dos scripts.
+
+Gera contratos aleatórios (com os casos de borda: vencimentos antes de 2016,
+cálculo depois do fim da tabela, série antecipada, parcelas excluídas, fatores
+exatos, dias 29-31, taxa zero) e compara parcela a parcela as duas regras:
+app.py (TJMG + 1% a.m.) e Planilha.py (TJMG + 1% até o corte; IPCA + Selic - IPCA).
+
+Uso (na raiz do repositório):
+    python -m conferencia -n 5000 --processos 8
+    python -m conferencia -n 2000 --semente 7 --saida diferencas.csv
+
+Sai com código 1 se alguma diferença passar da tolerância.
+"""
+import argparse
+import csv
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+
+from conferencia import referencia
+from revisional.cronograma import calcular_cronograma_hibrido, calcular_cronograma_tjmg, totalizar
+from revisional.dados import tabela_tjmg_fatores, tabela_tjmg_indices
+from revisional.financeiro import calcular_pmt, calcular_pmt_mensal
+from revisional.lei14905 import DATA_CORTE, INICIO_POS_LEI, IndicesPosLei
+
+CAMPOS_VALOR = ("valor_corrigido", "juros_1pct", "juros_selic", "total")
+CAMPOS_FATOR = ("fator_tjmg", "fator_ipca")
+CAMPOS_DIAS = ("dias_tjmg", "dias_ipca", "dias_juros_1pct")
+CAMPOS_TOTAIS = ("Principal", "CM", "Juros_1_pct", "Juros_Selic")
+
+
+# --- CONTRATOS ALEATÓRIOS ---
+def _data(rng, inicio, fim):
+    return inicio + timedelta(days=rng.randrange(max(1, (fim - inicio).days)))
+
+
+def gerar_contrato(rng, id_caso):
+    """Um contrato aleatório; cerca de metade dos casos força algum caso de borda."""
+    borda = rng.choice(("comum", "comum", "antes_2016", "apos_tabela", "antes_corte", "fim_de_mes"))
+    if borda == "antes_2016":
+        data_inicio = _data(rng, date(2010, 1, 1), date(2016, 1, 1))
+    elif borda == "fim_de_mes":
+        data_inicio = date(rng.randrange(2014, 2025), rng.randrange(1, 13), 28) + timedelta(days=rng.randrange(4))
+    else:
+        data_inicio = _data(rng, date(2012, 1, 1), date(2025, 6, 1))
+
+    if borda == "apos_tabela":
+        data_calculo = _data(rng, date(2025, 12, 1), date(2028, 1, 1))
+    elif borda == "antes_corte":
+        data_calculo = _data(rng, data_inicio, max(DATA_CORTE, data_inicio + timedelta(days=2)))
+    else:
+        data_calculo = _data(rng, data_inicio, date(2026, 12, 31))
+
+    prazo = rng.randrange(1, 121)
+    excluidas = sorted(rng.sample(range(1, prazo + 1), min(prazo, rng.randrange(1, 4)))) if rng.random() < 0.4 else []
+    exatos = rng.random() < 0.2
+    return {
+        "id": id_caso,
+        "borda": borda,
+        "valor_emprestimo": round(rng.uniform(500, 80_000), 2),
+        "valor_parcela": round(rng.uniform(50, 4_000), 2),
+        "prazo_meses": prazo,
+        "taxa_mensal": 0.0 if rng.random() < 0.05 else round(rng.uniform(0.5, 8), 2),
+        "taxa_anual": 0.0 if rng.random() < 0.05 else round(rng.uniform(6, 60), 2),
+        "antecipada": rng.random() < 0.5,
+        "data_inicio": data_inicio,
+        "data_citacao": _data(rng, data_inicio - timedelta(days=400), data_calculo + timedelta(days=30)),
+        "data_calculo": data_calculo,
+        "parcelas_excluidas": excluidas,
+        "fator_ipca_exato": round(rng.uniform(1.0, 1.12), 8) if exatos else None,
+        "fator_selic_exato": round(rng.uniform(1.0, 1.25), 8) if exatos else None,
+    }
+
+
+def gerar_contratos(n, semente=0):
+    rng = random.Random(semente)
+    return [gerar_contrato(rng, k + 1) for k in range(n)]
+
+
+# --- COMPARAÇÃO ---
+def _diferenca(caso, regra, parcela, campo, ref, rapido):
+    return {"id": caso["id"], "borda": caso["borda"], "regra": regra, "parcela": parcela, "campo": campo,
+            "referencia": ref, "rapido": rapido, "diferenca": abs(ref - rapido)}
+
+
+def _comparar(caso, regra, linhas_ref, totais_ref, cronograma, totais):
+    comparacoes = []
+    if len(linhas_ref) != len(cronograma["parcela"]):
+        return [_diferenca(caso, regra, None, "n_parcelas", len(linhas_ref), len(cronograma["parcela"]))]
+    for k, linha in enumerate(linhas_ref):
+        if linha["excluida"] != bool(cronograma["excluida"][k]):
+            comparacoes.append(_diferenca(caso, regra, linha["parcela"], "excluida",
+                                          linha["excluida"], bool(cronograma["excluida"][k])))
+            continue
+        if linha["excluida"]:
+            continue
+        for campo in CAMPOS_VALOR + CAMPOS_FATOR + CAMPOS_DIAS:
+            if campo in linha:
+                comparacoes.append(_diferenca(caso, regra, linha["parcela"], campo,
+                                              linha[campo], cronograma[campo][k].item()))
+    for campo in CAMPOS_TOTAIS:
+        comparacoes.append(_diferenca(caso, regra, None, campo, totais_ref[campo], totais[campo]))
+    return comparacoes
+
+
+def conferir_contrato(caso):
+    """
+    Roda as duas regras pela referência e pelo núcleo vetorizado.
+    Retorna (comparações campo a campo, regras em que o script original falhou).
+    """
+    comparacoes = []
+    falhas = []
+
+    # app.py: PMT pela taxa anual, 1ª parcela um mês após o início
+    pmt_ref = referencia.calcular_pmt(caso["valor_emprestimo"], caso["taxa_anual"], caso["prazo_meses"])
+    pmt = calcular_pmt(caso["valor_emprestimo"], caso["taxa_anual"], caso["prazo_meses"])
+    comparacoes.append(_diferenca(caso, "app", None, "parcela_revisada", pmt_ref, pmt))
+    diferenca_base = caso["valor_parcela"] - pmt_ref
+    try:
+        linhas_ref, totais_ref = referencia.cronograma_app(
+            diferenca_base, caso["prazo_meses"], caso["data_inicio"], caso["data_citacao"], caso["data_calculo"])
+    except UnboundLocalError:
+        # O original quebra quando o vencimento passa do fim da tabela TJMG
+        falhas.append("app")
+    else:
+        cronograma = calcular_cronograma_tjmg(tabela_tjmg_indices(), diferenca_base, caso["prazo_meses"],
+                                              caso["data_inicio"], caso["data_citacao"], caso["data_calculo"])
+        comparacoes += _comparar(caso, "app", linhas_ref, totais_ref, cronograma, totalizar(cronograma))
+
+    # Planilha.py: PMT mensal (antecipada ou não), 1ª parcela na data de início
+    pmt_ref = referencia.calcular_pmt_mensal(caso["valor_emprestimo"], caso["taxa_mensal"], caso["prazo_meses"],
+                                             antecipada=caso["antecipada"])
+    pmt = calcular_pmt_mensal(caso["valor_emprestimo"], caso["taxa_mensal"], caso["prazo_meses"],
+                              antecipada=caso["antecipada"])
+    comparacoes.append(_diferenca(caso, "planilha", None, "parcela_revisada", pmt_ref, pmt))
+    diferenca_base = caso["valor_parcela"] - pmt_ref
+    linhas_ref, totais_ref = referencia.cronograma_planilha(
+        diferenca_base, caso["prazo_meses"], caso["data_inicio"], caso["data_citacao"], caso["data_calculo"],
+        caso["parcelas_excluidas"], caso["fator_ipca_exato"], caso["fator_selic_exato"])
+
+    usar_fatores_exatos = caso["fator_ipca_exato"] is not None
+    if usar_fatores_exatos:
+        fator_ipca_pos, fator_selic_pos = caso["fator_ipca_exato"], caso["fator_selic_exato"]
+    elif caso["data_calculo"] > DATA_CORTE:
+        fator_ipca_pos, fator_selic_pos = IndicesPosLei.do_registro().fator(INICIO_POS_LEI, caso["data_calculo"])
+    else:
+        fator_ipca_pos = fator_selic_pos = 1.0
+    cronograma = calcular_cronograma_hibrido(
+        tabela_tjmg_fatores(), diferenca_base, caso["prazo_meses"], caso["data_inicio"], caso["data_citacao"],
+        caso["data_calculo"], DATA_CORTE, fator_ipca_pos=fator_ipca_pos, fator_selic_pos=fator_selic_pos,
+        fator_ipca_parcelas_novas=fator_ipca_pos if usar_fatores_exatos else 1.0,
+        parcelas_excluidas=caso["parcelas_excluidas"],
+    )
+    comparacoes += _comparar(caso, "planilha", linhas_ref, totais_ref, cronograma, totalizar(cronograma))
+    return comparacoes, falhas
+
+
+def _tolerancia_do_campo(campo, tolerancia, tolerancia_fator):
+    if campo in CAMPOS_FATOR:
+        return tolerancia_fator
+    if campo in CAMPOS_DIAS or campo in ("n_parcelas", "excluida"):
+        return 0
+    return tolerancia
+
+
+def _conferir_bloco(tarefa):
+    casos, tolerancia, tolerancia_fator = tarefa
+    diferencas = []
+    maximos = {}
+    comparados = 0
+    falhas = {}
+    for caso in casos:
+        comparacoes, falhas_caso = conferir_contrato(caso)
+        for regra in falhas_caso:
+            falhas[regra] = falhas.get(regra, 0) + 1
+        for c in comparacoes:
+            comparados += 1
+            chave = (c["regra"], c["campo"])
+            maximos[chave] = max(maximos.get(chave, 0.0), float(c["diferenca"]))
+            if c["diferenca"] > _tolerancia_do_campo(c["campo"], tolerancia, tolerancia_fator):
+                diferencas.append(c)
+    return diferencas, maximos, comparados, falhas
+
+
+def executar(n, semente=0, processos=None, tolerancia=0.005, tolerancia_fator=1e-10, tamanho_bloco=100):
+    """Confere n contratos aleatórios. Retorna um dict com as diferenças e o resumo."""
+    casos = gerar_contratos(n, semente)
+    blocos = [(casos[i:i + tamanho_bloco], tolerancia, tolerancia_fator) for i in range(0, len(casos), tamanho_bloco)]
+    if processos == 1 or len(blocos) <= 1:
+        resultados = list(map(_conferir_bloco, blocos))
+    else:
+        with ProcessPoolExecutor(max_workers=processos) as executor:
+            resultados = list(executor.map(_conferir_bloco, blocos))
+
+    resumo = {"casos": n, "comparacoes": 0, "diferencas": [], "maximos": {}, "falhas_referencia": {}}
+    for diferencas, maximos, comparados, falhas in resultados:
+        resumo["diferencas"] += diferencas
+        resumo["comparacoes"] += comparados
+        for chave, valor in maximos.items():
+            resumo["maximos"][chave] = max(resumo["maximos"].get(chave, 0.0), valor)
+        for regra, quantidade in falhas.items():
+            resumo["falhas_referencia"][regra] = resumo["falhas_referencia"].get(regra, 0) + quantidade
+    return resumo
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m conferencia",
+                                     description="Conferência diferencial do núcleo vetorizado x scripts originais.")
+    parser.add_argument("-n", "--casos", type=int, default=2000, help="contratos aleatórios (padrão: 2000)")
+    parser.add_argument("--semente", type=int, default=0, help="semente do gerador")
+    parser.add_argument("--processos", type=int, default=os.cpu_count(), help="processos em paralelo")
+    parser.add_argument("--tolerancia", type=float, default=0.005,
+                        help="diferença máxima em valores, R$ (padrão: meio centavo)")
+    parser.add_argument("--tolerancia-fator", type=float, default=1e-10, help="diferença máxima em fatores")
+    parser.add_argument("--saida", help="grava as diferenças acima da tolerância em CSV")
+    args = parser.parse_args(argv)
+
+    resumo = executar(args.casos, args.semente, args.processos, args.tolerancia, args.tolerancia_fator)
+    print(f"{resumo['casos']} contratos, {resumo['comparacoes']} comparações")
+    for (regra, campo), maximo in sorted(resumo["maximos"].items()):
+        print(f"  {regra:<9} {campo:<18} maior diferença: {maximo:.3e}")
+    for regra, quantidade in resumo["falhas_referencia"].items():
+        print(f"  {quantidade} casos em que o script original ({regra}) falha "
+              f"(vencimento após o fim da tabela TJMG): sem referência para comparar")
+
+    diferencas = resumo["diferencas"]
+    if args.saida:
+        with open(args.saida, "w", newline="", encoding="utf-8") as arquivo:
+            escritor = csv.DictWriter(arquivo, fieldnames=["id", "borda", "regra", "parcela", "campo",
+                                                           "referencia", "rapido", "diferenca"])
+            escritor.writeheader()
+            escritor.writerows(diferencas)
+    for d in diferencas[:20]:
+        print(f"DIFERENÇA caso {d['id']} ({d['borda']}) {d['regra']} parcela {d['parcela']} {d['campo']}: "
+              f"{d['referencia']!r} x {d['rapido']!r}")
+    if diferencas:
+        print(f"{len(diferencas)} diferenças acima da tolerância")
+        return 1
+    print("Nenhuma diferença acima da tolerância.")
+    return 0
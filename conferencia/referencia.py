@@ -0,0 +1,314 @@
+"""
+Lógica de referência, extraída sem Streamlit do app.py e do Planilha.py originais
+(laços linha a linha com busca em DataFrame), para conferir o núcleo vetorizado.
+
+As funções de busca são cópias fiéis das originais. As versões *_memo só evitam
+repetir a mesma busca: o resultado original depende apenas dos meses envolvidos
+(os períodos 'M' das datas), então a chave do cache é o mês (ou o par de meses).
+Em buscar_fator_correcao, o fator final só depende do mês do cálculo e o inicial
+só do mês do vencimento: cada metade tem o seu cache.
+"""
+import functools
+import io
+from datetime import date
+
+import pandas as pd
+from dateutil.relativedelta import relativedelta
+
+from revisional.dados import CSV_TJMG_FATORES, CSV_TJMG_INDICES, INDICES_POS_LEI
+
+DATA_CORTE = date(2024, 8, 28)
+
+
+# --- TABELAS (como carregar_tabela_interna / carregar_tabela_tjmg) ---
+@functools.lru_cache(maxsize=None)
+def tabela_app():
+    df = pd.read_csv(io.StringIO(CSV_TJMG_INDICES))
+    df['Data'] = pd.to_datetime(df['Data'], errors='coerce')
+    df['Indice'] = pd.to_numeric(df['Indice'], errors='coerce').fillna(0)
+    df = df.dropna(subset=['Data']).sort_values('Data')
+    df['periodo'] = df['Data'].dt.to_period('M')
+    df['Multiplicador'] = 1 + (df['Indice'] / 100)
+    df['Fator_Acumulado'] = df['Multiplicador'].cumprod()
+    return df
+
+
+@functools.lru_cache(maxsize=None)
+def tabela_planilha():
+    df = pd.read_csv(io.StringIO(CSV_TJMG_FATORES))
+    df['Data'] = pd.to_datetime(df['Data'], errors='coerce')
+    df['Fator_Acumulado'] = pd.to_numeric(df['Fator_Acumulado'], errors='coerce').fillna(1.0)
+    df = df.dropna(subset=['Data']).sort_values('Data')
+    df['periodo'] = df['Data'].dt.to_period('M')
+    return df
+
+
+def tabela_novos_indices(indices=INDICES_POS_LEI):
+    df = pd.DataFrame(indices)
+    df["Mes"] = pd.to_datetime(df["Mes"])
+    df['periodo'] = df['Mes'].dt.to_period('M')
+    return df
+
+
+# --- app.py ---
+def buscar_fator_correcao(df, data_vencimento, data_calculo):
+    if df.empty: return 1.0
+
+    p_venc = pd.to_datetime(data_vencimento).to_period('M')
+    p_calc = pd.to_datetime(data_calculo).to_period('M')
+
+    if p_calc < p_venc:
+        return 1.0
+
+    linha_final = df[df['periodo'] == p_calc]
+    if linha_final.empty:
+        fator_fim = df['Fator_Acumulado'].iloc[-1]
+    else:
+        fator_fim = linha_final['Fator_Acumulado'].iloc[0]
+
+    p_anterior = p_venc - 1
+    linha_inicial = df[df['periodo'] == p_anterior]
+
+    if linha_inicial.empty:
+        primeiro_periodo = df['periodo'].iloc[0]
+        if p_anterior < primeiro_periodo:
+            linha_venc = df[df['periodo'] == p_venc]
+            if not linha_venc.empty:
+                fator_venc = linha_venc['Fator_Acumulado'].iloc[0]
+                taxa_venc = linha_venc['Multiplicador'].iloc[0]
+                fator_inicio = fator_venc / taxa_venc
+            else:
+                fator_inicio = 1.0
+    else:
+        fator_inicio = linha_inicial['Fator_Acumulado'].iloc[0]
+
+    # Vencimento depois do fim da tabela: o original lança UnboundLocalError aqui
+    return fator_fim / fator_inicio
+
+
+def calcular_pmt(principal, taxa_anual, meses):
+    taxa_mensal = (1 + taxa_anual/100)**(1/12) - 1
+    if taxa_mensal == 0: return principal / meses
+    pmt = principal * (taxa_mensal * (1 + taxa_mensal)**meses) / ((1 + taxa_mensal)**meses - 1)
+    return pmt
+
+
+def calcular_juros_mora(valor_atualizado, data_vencimento, data_citacao, data_hoje):
+    inicio_juros = max(data_vencimento, data_citacao)
+    if inicio_juros >= data_hoje: return 0.0
+    dias = (data_hoje - inicio_juros).days
+    return valor_atualizado * (dias / 30) * 0.01
+
+
+# --- Planilha.py ---
+def calcular_fator_tjmg_parcial(df_tjmg, data_venc, data_corte_limite):
+    if df_tjmg.empty: return 1.0
+    p_venc = pd.to_datetime(data_venc).to_period('M')
+    p_corte = pd.to_datetime(data_corte_limite).to_period('M')
+
+    if p_venc > p_corte: return 1.0
+
+    linha_corte = df_tjmg[df_tjmg['periodo'] == p_corte]
+    fator_fim = linha_corte['Fator_Acumulado'].iloc[0] if not linha_corte.empty else 1.0
+
+    linha_venc = df_tjmg[df_tjmg['periodo'] == p_venc]
+    fator_inicio = linha_venc['Fator_Acumulado'].iloc[0] if not linha_venc.empty else 1.0
+
+    return fator_inicio / fator_fim
+
+
+def calcular_pmt_mensal(principal, taxa_mensal_pct, meses, antecipada=False):
+    taxa = taxa_mensal_pct / 100
+    if taxa == 0: return principal / meses
+    pmt = principal * (taxa * (1 + taxa)**meses) / ((1 + taxa)**meses - 1)
+    if antecipada:
+        pmt = pmt / (1 + taxa)
+    return pmt
+
+
+def calcular_fator_ipca_pos(df_novos_indices, data_inicio_novo, data_fim_calculo):
+    p_ini = pd.to_datetime(data_inicio_novo).to_period('M')
+    p_fim = pd.to_datetime(data_fim_calculo).to_period('M')
+    df_filtrado = df_novos_indices[(df_novos_indices['periodo'] >= p_ini) & (df_novos_indices['periodo'] <= p_fim)]
+    fator = 1.0
+    for idx, row in df_filtrado.iterrows():
+        fator *= (1 + row['IPCA (%)'] / 100)
+    return fator
+
+
+def taxas_lei_nova_tabela(df_novos_indices, data_inicio_novo, data_fim_calculo):
+    """Parte de calcular_juros_lei_nova_tabela que não depende do valor."""
+    p_ini = pd.to_datetime(data_inicio_novo).to_period('M')
+    p_fim = pd.to_datetime(data_fim_calculo).to_period('M')
+    df_filtrado = df_novos_indices[(df_novos_indices['periodo'] >= p_ini) & (df_novos_indices['periodo'] <= p_fim)]
+
+    fator_selic_acumulado = 1.0
+    fator_ipca_acumulado = 1.0
+    for idx, row in df_filtrado.iterrows():
+        fator_selic_acumulado *= (1 + (row['Selic Meta (%)'] / 100))
+        fator_ipca_acumulado *= (1 + (row['IPCA (%)'] / 100))
+
+    var_selic_pct = (fator_selic_acumulado - 1) * 100
+    var_ipca_pct = (fator_ipca_acumulado - 1) * 100
+    juros_acumulados_pct = max(0, var_selic_pct - var_ipca_pct)
+    return var_selic_pct, var_ipca_pct, juros_acumulados_pct
+
+
+# --- CACHE POR MÊS ---
+def _mes(data):
+    return data.year, data.month
+
+
+def _periodo(mes):
+    return pd.Period(year=mes[0], month=mes[1], freq='M')
+
+
+@functools.lru_cache(maxsize=None)
+def _fator_fim_app(calc):
+    # Trecho "Buscar Fator Final" de buscar_fator_correcao (só depende do mês do cálculo)
+    df = tabela_app()
+    linha_final = df[df['periodo'] == _periodo(calc)]
+    if linha_final.empty:
+        return df['Fator_Acumulado'].iloc[-1]
+    return linha_final['Fator_Acumulado'].iloc[0]
+
+
+@functools.lru_cache(maxsize=None)
+def _fator_inicio_app(venc):
+    # Trecho "Buscar Fator Inicial" de buscar_fator_correcao (só depende do mês do vencimento)
+    df = tabela_app()
+    p_venc = _periodo(venc)
+    p_anterior = p_venc - 1
+    linha_inicial = df[df['periodo'] == p_anterior]
+    if not linha_inicial.empty:
+        return linha_inicial['Fator_Acumulado'].iloc[0]
+    if p_anterior < df['periodo'].iloc[0]:
+        linha_venc = df[df['periodo'] == p_venc]
+        if not linha_venc.empty:
+            return linha_venc['Fator_Acumulado'].iloc[0] / linha_venc['Multiplicador'].iloc[0]
+        return 1.0
+    raise UnboundLocalError("cannot access local variable 'fator_inicio' where it is not associated with a value")
+
+
+def buscar_fator_correcao_memo(data_vencimento, data_calculo):
+    """buscar_fator_correcao com as duas buscas (fim e início) em cache separado."""
+    if tabela_app().empty: return 1.0
+    if _mes(data_calculo) < _mes(data_vencimento):
+        return 1.0
+    return _fator_fim_app(_mes(data_calculo)) / _fator_inicio_app(_mes(data_vencimento))
+
+
+@functools.lru_cache(maxsize=None)
+def _fator_tjmg_parcial_mes(venc, corte):
+    return calcular_fator_tjmg_parcial(tabela_planilha(), date(*venc, 1), date(*corte, 1))
+
+
+def calcular_fator_tjmg_parcial_memo(data_venc, data_corte_limite):
+    return _fator_tjmg_parcial_mes(_mes(data_venc), _mes(data_corte_limite))
+
+
+@functools.lru_cache(maxsize=None)
+def _pos_lei_mes(ini, fim):
+    df_novos = tabela_novos_indices()
+    return (calcular_fator_ipca_pos(df_novos, date(*ini, 1), date(*fim, 1)),
+            *taxas_lei_nova_tabela(df_novos, date(*ini, 1), date(*fim, 1)))
+
+
+# --- LAÇOS DOS SCRIPTS ---
+def cronograma_app(diferenca_mensal_base, prazo_meses, data_inicio, data_citacao, data_calculo):
+    """Laço do app.py. Retorna (linhas, totais)."""
+    dados = []
+    totais = {"Principal": 0, "CM": 0, "Juros_1_pct": 0, "Juros_Selic": 0}
+    for i in range(1, prazo_meses + 1):
+        vencimento = data_inicio + relativedelta(months=i)
+        if vencimento > data_calculo:
+            break
+
+        fator = buscar_fator_correcao_memo(vencimento, data_calculo)
+        valor_atualizado = diferenca_mensal_base * fator
+        valor_juros = calcular_juros_mora(valor_atualizado, vencimento, data_citacao, data_calculo)
+        total_linha = valor_atualizado + valor_juros
+
+        dados.append({
+            "parcela": i, "vencimento": vencimento, "excluida": False, "fator_tjmg": fator,
+            "valor_corrigido": valor_atualizado, "juros_1pct": valor_juros, "juros_selic": 0.0,
+            "total": total_linha,
+        })
+        totais["Principal"] += diferenca_mensal_base
+        totais["CM"] += (valor_atualizado - diferenca_mensal_base)
+        totais["Juros_1_pct"] += valor_juros
+    return dados, totais
+
+
+def cronograma_planilha(diferenca_base, prazo_meses, data_inicio, data_citacao, data_calculo,
+                        parcelas_excluidas=(), fator_ipca_exato=None, fator_selic_exato=None):
+    """Laço do Planilha.py (fatores exatos quando os dois são informados). Retorna (linhas, totais)."""
+    usar_fatores_exatos = fator_ipca_exato is not None and fator_selic_exato is not None
+    dados = []
+    totais = {"Principal": 0, "CM": 0, "Juros_1_pct": 0, "Juros_Selic": 0}
+    for i in range(1, prazo_meses + 1):
+        vencimento = data_inicio + relativedelta(months=(i-1))
+        if vencimento > data_calculo: break
+
+        if i in parcelas_excluidas:
+            dados.append({"parcela": i, "vencimento": vencimento, "excluida": True})
+            continue
+
+        dias_tjmg = 0
+        dias_ipca = 0
+        dias_antigos = 0
+        juros_antigo_val = 0.0
+        juros_novos_val = 0.0
+
+        if vencimento <= DATA_CORTE:
+            fator_tjmg = calcular_fator_tjmg_parcial_memo(vencimento, DATA_CORTE)
+            valor_em_agosto = diferenca_base * fator_tjmg
+
+            if data_calculo <= DATA_CORTE:
+                dias_tjmg = (data_calculo - vencimento).days
+            else:
+                dias_tjmg = (DATA_CORTE - vencimento).days
+                dias_ipca = (data_calculo - DATA_CORTE).days
+
+            inicio_juros_antigo = max(vencimento, data_citacao)
+            if inicio_juros_antigo < DATA_CORTE:
+                dias_antigos = (DATA_CORTE - inicio_juros_antigo).days
+                taxa_antiga_pct = (dias_antigos / 30) * 1.0
+                juros_antigo_val = valor_em_agosto * (taxa_antiga_pct / 100)
+
+            saldo_principal_agosto = valor_em_agosto
+
+            if data_calculo > DATA_CORTE:
+                if usar_fatores_exatos:
+                    fator_ipca = fator_ipca_exato
+                    valor_final_principal = saldo_principal_agosto * fator_ipca
+
+                    var_selic_pct = (fator_selic_exato - 1) * 100
+                    var_ipca_pct = (fator_ipca_exato - 1) * 100
+                    juros_acumulados_pct = max(0, var_selic_pct - var_ipca_pct)
+                    juros_novos_val = valor_final_principal * (juros_acumulados_pct / 100)
+                else:
+                    fator_ipca, _, _, juros_acum = _pos_lei_mes(_mes(date(2024, 9, 1)), _mes(data_calculo))
+                    valor_final_principal = saldo_principal_agosto * fator_ipca
+                    juros_novos_val = valor_final_principal * (juros_acum / 100)
+            else:
+                valor_final_principal = saldo_principal_agosto
+                fator_ipca = 1.0
+        else:
+            fator_tjmg = 1.0
+            fator_ipca = fator_ipca_exato if usar_fatores_exatos else 1.0
+            valor_final_principal = diferenca_base * fator_ipca
+
+        total_linha = valor_final_principal + juros_antigo_val + juros_novos_val
+
+        dados.append({
+            "parcela": i, "vencimento": vencimento, "excluida": False, "fator_tjmg": fator_tjmg,
+            "dias_tjmg": dias_tjmg, "fator_ipca": fator_ipca, "dias_ipca": dias_ipca,
+            "valor_corrigido": valor_final_principal, "dias_juros_1pct": dias_antigos,
+            "juros_1pct": juros_antigo_val, "juros_selic": juros_novos_val, "total": total_linha,
+        })
+        totais["Principal"] += diferenca_base
+        totais["CM"] += (valor_final_principal - diferenca_base)
+        totais["Juros_1_pct"] += juros_antigo_val
+        totais["Juros_Selic"] += juros_novos_val
+    return dados, totais
@@ -0,0 +1,74 @@
+"""
+Núcleo de cálculo da Calculadora Revisional, sem dependência do Streamlit.
+
+Só importa NumPy; o pandas fica restrito às funções de entrada/saída (lote),
+para que jobs em lote e testes carreguem em milissegundos.
+"""
+
+from revisional.amortizacao import tabela_amortizacao, taxa_implicita, totais_amortizacao
+from revisional.carteira import AgregadorCarteira, agregar_carteira
+from revisional.centavos import cronograma_em_centavos, totalizar_centavos
+from revisional.cenarios import tabela_cenarios, varrer_cenarios
+from revisional.colunar import TabelaColunar
+from revisional.cronograma import (
+    calcular_cronograma_hibrido,
+    calcular_cronograma_tjmg,
+    datas_vencimento,
+    totalizar,
+)
+from revisional.dados import INDICES_POS_LEI, tabela_tjmg_fatores, tabela_tjmg_indices
+from revisional.diario import CalendarioUteis, FatoresDiarios, calendario_nacional, fatores_pos_lei_diarios
+from revisional.exportacao import abrir_exportador, exportar
+from revisional.financeiro import calcular_juros_mora, calcular_pmt, calcular_pmt_mensal
+from revisional.indices import TabelaIndice, ordinal_mes
+from revisional.lei14905 import (
+    DATA_CORTE,
+    INICIO_POS_LEI,
+    IndicesPosLei,
+    calcular_juros_lei_nova,
+    fatores_pos_lei,
+    taxa_selic_menos_ipca,
+)
+from revisional.relatorio import gerar_relatorio
+from revisional.series import RegistroIndices, SerieIndice, registro_padrao
+
+__all__ = [
+    "TabelaIndice",
+    "ordinal_mes",
+    "INDICES_POS_LEI",
+    "tabela_tjmg_fatores",
+    "tabela_tjmg_indices",
+    "calcular_cronograma_hibrido",
+    "calcular_cronograma_tjmg",
+    "datas_vencimento",
+    "varrer_cenarios",
+    "tabela_amortizacao",
+    "taxa_implicita",
+    "totais_amortizacao",
+    "tabela_cenarios",
+    "totalizar",
+    "AgregadorCarteira",
+    "agregar_carteira",
+    "TabelaColunar",
+    "cronograma_em_centavos",
+    "totalizar_centavos",
+    "CalendarioUteis",
+    "FatoresDiarios",
+    "calendario_nacional",
+    "fatores_pos_lei_diarios",
+    "abrir_exportador",
+    "exportar",
+    "calcular_pmt",
+    "calcular_pmt_mensal",
+    "calcular_juros_mora",
+    "DATA_CORTE",
+    "INICIO_POS_LEI",
+    "IndicesPosLei",
+    "calcular_juros_lei_nova",
+    "fatores_pos_lei",
+    "taxa_selic_menos_ipca",
+    "gerar_relatorio",
+    "RegistroIndices",
+    "SerieIndice",
+    "registro_padrao",
+]
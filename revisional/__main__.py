@@ -0,0 +1,3 @@
+from revisional.lote import main
+
+main()
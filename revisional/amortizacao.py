@@ -0,0 +1,140 @@
+import numpy as np
+
+# --- TABELAS DE AMORTIZAÇÃO (PRICE E SAC) ---
+# Todas as parcelas de todos os contratos saem de uma vez, em forma fechada:
+# nenhuma recorrência saldo a saldo. A parcela k de um contrato é uma linha;
+# "contrato" aponta a posição do contrato nas entradas (escalares ou arrays,
+# combinados por broadcast), no mesmo formato colunar dos cronogramas.
+#
+# Série antecipada: a 1ª parcela é paga no ato (sem juros) e cada parcela
+# seguinte paga os juros de um mês sobre o saldo após a anterior. Na Price, a
+# prestação é a de calcular_pmt_mensal(..., antecipada=True).
+
+SISTEMAS = ("price", "sac")
+COLUNAS_AMORTIZACAO = ("contrato", "parcela", "saldo_inicial", "juros", "amortizacao", "prestacao", "saldo_final")
+
+
+def _anuidade(taxa, log_taxa, periodos):
+    """Valor presente de `periodos` prestações de 1: (1 - (1 + i)^-m) / i, ou m quando i = 0."""
+    fator = -np.expm1(-periodos * log_taxa)
+    return np.divide(fator, taxa, out=periodos.astype(np.float64), where=taxa != 0)
+
+
+def prestacoes_price(principal, taxa_mensal_pct, meses, antecipada=False):
+    """PMT de cada contrato, vetorizado (mesma fórmula de calcular_pmt_mensal)."""
+    principal, taxa, meses, antecipada = np.broadcast_arrays(
+        np.asarray(principal, dtype=np.float64), np.asarray(taxa_mensal_pct, dtype=np.float64) / 100,
+        np.asarray(meses, dtype=np.int64), np.asarray(antecipada, dtype=bool))
+    potencia = (1 + taxa) ** meses
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pmt = np.where(taxa == 0, principal / meses, principal * (taxa * potencia) / (potencia - 1))
+    return np.where(antecipada, pmt / (1 + taxa), pmt)
+
+
+def _fator_anuidade(taxa, meses, antecipada):
+    """
+    Fator F(i) = PV / PMT da Price (vezes 1 + i na antecipada) e sua derivada dF/di.
+    Perto de i = 0, séries de Taylor no lugar das frações 0/0.
+    """
+    perto_de_zero = np.abs(taxa) < 1e-7
+    com_taxa = np.where(perto_de_zero, 1.0, taxa)
+    desconto = np.exp(-meses * np.log1p(taxa))
+    fator = np.where(perto_de_zero, meses - meses * (meses + 1) / 2 * taxa, -np.expm1(-meses * np.log1p(taxa)) / com_taxa)
+    derivada = np.where(perto_de_zero, -meses * (meses + 1) / 2 + meses * (meses + 1) * (meses + 2) / 3 * taxa,
+                        (meses * desconto / (1 + taxa) - fator) / com_taxa)
+    derivada = np.where(antecipada, derivada * (1 + taxa) + fator, derivada)
+    fator = np.where(antecipada, fator * (1 + taxa), fator)
+    return fator, derivada
+
+
+def taxa_implicita(principal, prestacao, meses, antecipada=False, tolerancia=1e-12, max_iteracoes=60):
+    """
+    Taxa mensal (%) embutida numa prestação: inverte calcular_pmt_mensal para
+    arrays de contratos, com iterações de Newton protegidas por bissecção.
+    NaN quando não existe taxa >= 0: prestações que não cobrem o principal
+    (n x PMT < PV) ou, na antecipada, entrada que já quita o principal.
+    """
+    principal, prestacao, meses, antecipada = np.broadcast_arrays(
+        np.asarray(principal, dtype=np.float64), np.asarray(prestacao, dtype=np.float64),
+        np.asarray(meses, dtype=np.int64), np.asarray(antecipada, dtype=bool))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # Soma das prestações igual ao principal (a menos do arredondamento): taxa zero
+        sem_juros = np.abs(meses * prestacao - principal) <= 1e-12 * np.abs(principal)
+        valida = ((principal > 0) & (prestacao > 0) & (meses >= 1) & ((meses * prestacao > principal) | sem_juros)
+                  & ~(antecipada & (prestacao >= principal) & ~sem_juros))
+        alvo = np.where(valida, principal / prestacao, 1.0)
+        # F(i) decresce com i: F(0) = n >= alvo e, no teto, F < alvo (a PMT cobre ao menos os juros do saldo)
+        piso = np.zeros(principal.shape)
+        teto = np.where(valida, np.where(antecipada, prestacao / (principal - prestacao), prestacao / principal), 1.0)
+        # Ponto de partida: aproximação (n PMT / PV)^(2 / (n + 1)) - 1
+        taxa = np.clip(np.where(valida, (meses / alvo) ** (2 / (meses + 1)) - 1, 0.0), piso, teto)
+
+        taxa = np.where(sem_juros, 0.0, taxa)
+        ativa = valida & ~sem_juros
+        for _ in range(max_iteracoes):
+            fator, derivada = _fator_anuidade(taxa, meses, antecipada)
+            erro = fator - alvo
+            piso = np.where(erro > 0, taxa, piso)
+            teto = np.where(erro < 0, taxa, teto)
+            nova = taxa - erro / derivada
+            # Passo de Newton que sai do intervalo [piso, teto] vira bissecção
+            nova = np.where((nova > piso) & (nova < teto), nova, (piso + teto) / 2)
+            ativa &= np.abs(nova - taxa) > tolerancia
+            taxa = np.where(ativa, nova, taxa)
+            if not ativa.any():
+                break
+    return np.where(valida, taxa * 100, np.nan)
+
+
+def tabela_amortizacao(principal, taxa_mensal_pct, meses, sistema="price", antecipada=False):
+    """
+    Tabela de amortização (dict coluna -> array) de um ou vários contratos:
+    contrato, parcela, saldo_inicial (saldo devedor antes da parcela), juros,
+    amortizacao, prestacao e saldo_final.
+    """
+    if sistema not in SISTEMAS:
+        raise ValueError(f"Sistema inválido: {sistema!r} (use {', '.join(SISTEMAS)})")
+    principal, taxa_mensal_pct, meses, antecipada = (np.ravel(a) for a in np.broadcast_arrays(
+        np.asarray(principal, dtype=np.float64), np.asarray(taxa_mensal_pct, dtype=np.float64),
+        np.asarray(meses, dtype=np.int64), np.asarray(antecipada, dtype=bool)))
+    if (meses < 1).any():
+        raise ValueError("O prazo deve ter ao menos 1 mês")
+
+    # Uma linha por parcela: índice do contrato e número da parcela (1..n)
+    contrato = np.repeat(np.arange(len(meses)), meses)
+    inicio = np.cumsum(meses) - meses
+    k = np.arange(len(contrato)) - inicio[contrato] + 1
+    pv, i, n = principal[contrato], taxa_mensal_pct[contrato] / 100, meses[contrato]
+    # Meses de juros corridos até a parcela k: a parcela paga no ato não tem juros
+    m = k - antecipada[contrato]
+
+    if sistema == "price":
+        prestacao = prestacoes_price(principal, taxa_mensal_pct, meses, antecipada)[contrato]
+        # O saldo após a parcela k é o valor presente das n - k prestações restantes, e a
+        # amortização é a prestação descontada pelos meses que faltam (n - k + 1); assim
+        # nenhuma conta subtrai valores quase iguais, mesmo em prazos longos
+        log_taxa = np.log1p(taxa_mensal_pct / 100)[contrato]
+        saldo_final = prestacao * _anuidade(i, log_taxa, n - k)
+        amortizacao = np.where(m >= 1, prestacao * np.exp(-(n - k + 1) * log_taxa), prestacao)
+        juros = prestacao - amortizacao
+    else:
+        amortizacao = pv / n
+        saldo_final = pv * (n - k) / n
+        juros = np.where(m >= 1, (saldo_final + amortizacao) * i, 0.0)
+        prestacao = amortizacao + juros
+
+    return {
+        "contrato": contrato,
+        "parcela": k,
+        "saldo_inicial": saldo_final + amortizacao,
+        "juros": juros,
+        "amortizacao": amortizacao,
+        "prestacao": prestacao,
+        "saldo_final": saldo_final,
+    }
+
+
+def totais_amortizacao(tabela):
+    """Somas por contrato (juros, amortização e prestações) de uma tabela_amortizacao."""
+    return {campo: np.bincount(tabela["contrato"], weights=tabela[campo])
+            for campo in ("juros", "amortizacao", "prestacao")}
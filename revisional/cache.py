@@ -0,0 +1,168 @@
+import hashlib
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from revisional.indices import TabelaIndice
+
+# --- CACHE BINÁRIO DAS TABELAS DE ÍNDICES ---
+# Cada tabela processada é gravada uma única vez como .npy (float64, 3 x n):
+#   linha 0 = ordinal do mês, linha 1 = fator acumulado, linha 2 = multiplicador.
+# Os processos seguintes abrem o arquivo com mmap (sem cópia e sem reprocessar o CSV).
+# O nome do arquivo leva o hash do conteúdo da tabela de origem: se o CSV mudar,
+# o hash muda e a tabela é recompilada automaticamente.
+#
+# Tabelas de vários arrays (calendário de dias úteis, fatores diários) seguem a
+# mesma ideia em arrays_em_cache: uma pasta <nome>.<hash>/ com um .npy por array.
+# Todos os processos (servidores do Streamlit, workers do lote, serviço) abrem os
+# mesmos arquivos com mmap somente leitura: o sistema guarda uma cópia só das
+# páginas, e a memória residente não cresce com o número de processos.
+# Com $REVISIONAL_CACHE_DIR em /dev/shm, o cache fica todo em memória compartilhada.
+# Como a chave é o conteúdo, várias versões de um mesmo nome podem estar em uso
+# ao mesmo tempo (ex.: a tabela padrão e uma editada na Planilha, ou processos
+# com versões diferentes do CSV): ficam as VERSOES_MANTIDAS usadas mais
+# recentemente (data de modificação do arquivo ou da pasta, renovada a cada abertura).
+
+# Incrementar se o layout do arquivo ou as regras de montagem mudarem
+VERSAO_FORMATO = 1
+VERSOES_MANTIDAS = 8
+
+
+def diretorio_cache():
+    """
+    Diretório do cache: $REVISIONAL_CACHE_DIR ou ~/.cache/revisional.
+    REVISIONAL_CACHE_DIR vazio desativa o cache em disco.
+    """
+    configurado = os.environ.get("REVISIONAL_CACHE_DIR")
+    if configurado is not None:
+        return Path(configurado) if configurado else None
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "revisional"
+
+
+def chave_conteudo(texto):
+    return hashlib.sha256(f"{VERSAO_FORMATO}\n{texto}".encode("utf-8")).hexdigest()[:16]
+
+
+def _de_array(dados):
+    if dados.shape[1] == 0:
+        return TabelaIndice(0, np.empty(0), np.empty(0))
+    return TabelaIndice(int(dados[0, 0]), dados[1], dados[2])
+
+
+def _gravar(caminho, tabela):
+    ordinais = np.arange(tabela.inicio, tabela.inicio + len(tabela.acumulado), dtype=np.float64)
+    dados = np.stack([ordinais, tabela.acumulado, tabela.multiplicador])
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    # Grava num temporário e renomeia: outro processo nunca lê um arquivo pela metade
+    with tempfile.NamedTemporaryFile(dir=caminho.parent, suffix=".tmp", delete=False) as tmp:
+        np.save(tmp, dados)
+    os.replace(tmp.name, caminho)
+    _podar(caminho)
+
+
+def _usar(caminho):
+    """Renova a data de modificação de uma versão aberta (mantida por _podar)."""
+    try:
+        os.utime(caminho)
+    except OSError:
+        pass
+
+
+def tabela_em_cache(nome, texto, montar):
+    """
+    Carrega a tabela `nome` do cache em disco (mmap, somente leitura) ou a monta
+    com montar(texto) e grava o resultado para os próximos processos.
+    Falhas de E/S no cache nunca impedem o cálculo: a tabela é montada em memória.
+    """
+    diretorio = diretorio_cache()
+    if diretorio is None:
+        return montar(texto)
+    caminho = diretorio / f"{nome}.{chave_conteudo(texto)}.npy"
+    try:
+        tabela = _de_array(np.load(caminho, mmap_mode="r"))
+    except (OSError, ValueError, IndexError):
+        pass
+    else:
+        _usar(caminho)
+        return tabela
+    tabela = montar(texto)
+    try:
+        _gravar(caminho, tabela)
+    except OSError:
+        pass
+    return tabela
+
+
+def _abrir_arrays(pasta):
+    if not pasta.is_dir():
+        raise FileNotFoundError(pasta)
+    return {arquivo.stem: np.load(arquivo, mmap_mode="r") for arquivo in sorted(pasta.glob("*.npy"))}
+
+
+def _publicar(pasta, arrays):
+    pasta.parent.mkdir(parents=True, exist_ok=True)
+    # Grava numa pasta temporária e renomeia: outro processo nunca abre uma pasta pela metade
+    temporaria = Path(tempfile.mkdtemp(dir=pasta.parent, suffix=".tmp"))
+    try:
+        for nome, array in arrays.items():
+            np.save(temporaria / f"{nome}.npy", np.ascontiguousarray(array))
+        os.rename(temporaria, pasta)
+    except OSError:
+        shutil.rmtree(temporaria, ignore_errors=True)
+        if not pasta.is_dir():
+            raise
+        # Outro processo publicou a mesma versão antes: vale a dele
+        return
+    _podar(pasta)
+
+
+def _podar(atual):
+    """
+    Apaga as versões (arquivos .npy ou pastas) do mesmo nome que `atual` além
+    das VERSOES_MANTIDAS usadas mais recentemente.
+    """
+    versoes = []
+    for versao in atual.parent.glob(f"{atual.name.split('.')[0]}.*"):
+        if versao != atual and not versao.name.endswith(".tmp"):
+            try:
+                versoes.append((versao.stat().st_mtime, versao))
+            except OSError:
+                pass
+    versoes.sort(reverse=True)
+    # Processos que ainda usam uma versão apagada seguem com o mmap aberto
+    for _, antiga in versoes[VERSOES_MANTIDAS - 1:]:
+        if antiga.is_dir():
+            shutil.rmtree(antiga, ignore_errors=True)
+        else:
+            antiga.unlink(missing_ok=True)
+
+
+def arrays_em_cache(nome, texto, montar):
+    """
+    Arrays nomeados (dict nome -> array não vazio) abertos do cache em disco com
+    mmap, somente leitura, ou montados com montar() e publicados para os próximos
+    processos. `texto` descreve a origem (dados e parâmetros) e entra no hash.
+    Falhas de E/S no cache nunca impedem o cálculo: ficam os arrays montados.
+    """
+    diretorio = diretorio_cache()
+    if diretorio is None:
+        return montar()
+    pasta = diretorio / f"{nome}.{chave_conteudo(texto)}"
+    try:
+        arrays = _abrir_arrays(pasta)
+    except (OSError, ValueError):
+        pass
+    else:
+        _usar(pasta)
+        return arrays
+    arrays = montar()
+    try:
+        _publicar(pasta, arrays)
+        # Quem publicou também passa a usar as páginas compartilhadas
+        return _abrir_arrays(pasta)
+    except (OSError, ValueError):
+        return arrays
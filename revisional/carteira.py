@@ -0,0 +1,162 @@
+from collections.abc import Mapping
+
+import numpy as np
+
+# --- AGREGAÇÃO DA CARTEIRA ---
+# Totais e distribuições dos resultados de um lote agrupados por cliente, por
+# ano de início do contrato e por ano da citação. Os resumos chegam em blocos
+# (os mesmos de revisional.lote.iterar_lote ou de uma Tarefa) e cada bloco é
+# agrupado de uma vez, em colunas (np.unique + np.bincount); só os acumuladores
+# por grupo ficam na memória, qualquer que seja o tamanho da carteira.
+#
+# Média e desvio de cada grupo são combinados bloco a bloco (fórmula de Chan
+# para variâncias por partes), sem somas de quadrados que percam precisão.
+
+DIMENSOES = {
+    "cliente": "nome_cliente",
+    "ano_inicio": "ano_inicio",
+    "ano_citacao": "ano_citacao",
+}
+CAMPOS_CARTEIRA = ("Principal", "CM", "Juros_1_pct", "Juros_Selic", "Total")
+SEM_CLIENTE = "(sem nome)"
+
+
+def _nomes_clientes(valores):
+    """Nomes como chave de grupo: sem espaços nas pontas; vazios e NaN viram SEM_CLIENTE."""
+    if not (isinstance(valores, np.ndarray) and valores.dtype.kind == "U"):
+        # Listas vindas do pandas misturam str, NaN e números: cada valor vira texto antes
+        valores = np.array([SEM_CLIENTE if v is None or (isinstance(v, float) and v != v) else str(v)
+                            for v in valores], dtype=str)
+    nomes = np.char.strip(valores)
+    return np.where(nomes == "", SEM_CLIENTE, nomes)
+
+
+class _Grupos:
+    """Acumuladores de uma dimensão, uma coluna por grupo (na ordem em que o grupo apareceu)."""
+
+    def __init__(self, n_campos):
+        self.chaves = []
+        self.posicoes = {}
+        self.contratos = np.zeros(0, dtype=np.int64)
+        self.parcelas = np.zeros(0, dtype=np.int64)
+        self.soma = np.zeros((n_campos, 0))
+        self.media = np.zeros((n_campos, 0))
+        self.m2 = np.zeros((n_campos, 0))
+        self.minimo = np.zeros((n_campos, 0))
+        self.maximo = np.zeros((n_campos, 0))
+
+    def _crescer(self, novas):
+        for chave in novas:
+            self.posicoes[chave] = len(self.chaves)
+            self.chaves.append(chave)
+        extra = len(novas)
+        self.contratos = np.concatenate([self.contratos, np.zeros(extra, dtype=np.int64)])
+        self.parcelas = np.concatenate([self.parcelas, np.zeros(extra, dtype=np.int64)])
+        for nome, inicial in (("soma", 0.0), ("media", 0.0), ("m2", 0.0), ("minimo", np.inf), ("maximo", -np.inf)):
+            atual = getattr(self, nome)
+            setattr(self, nome, np.concatenate([atual, np.full((len(atual), extra), inicial)], axis=1))
+
+    def adicionar(self, chaves, parcelas, valores):
+        """Agrupa um bloco: chaves (n,), parcelas (n,) e valores (campos, n)."""
+        unicas, inverso = np.unique(chaves, return_inverse=True)
+        unicas = unicas.tolist()
+        novas = [c for c in unicas if c not in self.posicoes]
+        if novas:
+            self._crescer(novas)
+        posicao = np.array([self.posicoes[c] for c in unicas], dtype=np.int64)
+        k = len(unicas)
+
+        n_bloco = np.bincount(inverso, minlength=k)
+        soma_bloco = np.stack([np.bincount(inverso, weights=v, minlength=k) for v in valores])
+        media_bloco = soma_bloco / n_bloco
+        m2_bloco = np.stack([np.bincount(inverso, weights=(v - m[inverso]) ** 2, minlength=k)
+                             for v, m in zip(valores, media_bloco)])
+        minimo_bloco = np.full((len(valores), k), np.inf)
+        maximo_bloco = np.full((len(valores), k), -np.inf)
+        for j, v in enumerate(valores):
+            np.minimum.at(minimo_bloco[j], inverso, v)
+            np.maximum.at(maximo_bloco[j], inverso, v)
+
+        n_antes = self.contratos[posicao]
+        n_total = n_antes + n_bloco
+        delta = media_bloco - self.media[:, posicao]
+        self.media[:, posicao] += delta * n_bloco / n_total
+        self.m2[:, posicao] += m2_bloco + delta ** 2 * n_antes * n_bloco / n_total
+        self.soma[:, posicao] += soma_bloco
+        self.minimo[:, posicao] = np.minimum(self.minimo[:, posicao], minimo_bloco)
+        self.maximo[:, posicao] = np.maximum(self.maximo[:, posicao], maximo_bloco)
+        self.contratos[posicao] = n_total
+        self.parcelas[posicao] += np.bincount(inverso, weights=parcelas, minlength=k).astype(np.int64)
+
+
+class AgregadorCarteira:
+    """
+    Acumula resumos de lote (listas de dicts ou colunas) em blocos e devolve,
+    por dimensão, contratos, parcelas e soma, média, desvio, mínimo e máximo
+    de cada campo.
+    """
+
+    def __init__(self, dimensoes=tuple(DIMENSOES), campos=CAMPOS_CARTEIRA):
+        invalidas = [d for d in dimensoes if d not in DIMENSOES]
+        if invalidas:
+            raise ValueError(f"Dimensões inválidas: {', '.join(invalidas)} (use {', '.join(DIMENSOES)})")
+        self.dimensoes = tuple(dimensoes)
+        self.campos = tuple(campos)
+        self.contratos = 0
+        self._grupos = {d: _Grupos(len(self.campos)) for d in self.dimensoes}
+
+    def adicionar(self, resumos):
+        """Agrupa um bloco de resumos (lista de dicts de calcular_caso ou colunas, como a TabelaColunar do lote)."""
+        if isinstance(resumos, Mapping):
+            colunas = resumos
+        else:
+            chaves = {DIMENSOES[d] for d in self.dimensoes} | set(self.campos) | {"parcelas_calculadas"}
+            colunas = {k: [r[k] for r in resumos] for k in chaves}
+        valores = np.array([np.asarray(colunas[c], dtype=np.float64) for c in self.campos]).reshape(len(self.campos), -1)
+        parcelas = np.asarray(colunas["parcelas_calculadas"], dtype=np.int64)
+        if not len(parcelas):
+            return
+        for dimensao, grupos in self._grupos.items():
+            chaves_bloco = colunas[DIMENSOES[dimensao]]
+            if dimensao == "cliente":
+                chaves_bloco = _nomes_clientes(chaves_bloco)
+            grupos.adicionar(np.asarray(chaves_bloco), parcelas, valores)
+        self.contratos += len(parcelas)
+
+    def tabela(self, dimensao):
+        """Grupos de uma dimensão em colunas, ordenados pela chave."""
+        grupos = self._grupos[dimensao]
+        ordem = sorted(range(len(grupos.chaves)), key=grupos.chaves.__getitem__)
+        contratos = grupos.contratos[ordem]
+        tabela = {
+            dimensao: [grupos.chaves[i] for i in ordem],
+            "contratos": contratos,
+            "parcelas": grupos.parcelas[ordem],
+        }
+        for j, campo in enumerate(self.campos):
+            tabela[campo] = grupos.soma[j, ordem]
+            tabela[f"{campo}_media"] = grupos.media[j, ordem]
+            tabela[f"{campo}_desvio"] = np.sqrt(grupos.m2[j, ordem] / np.maximum(contratos, 1))
+            tabela[f"{campo}_min"] = grupos.minimo[j, ordem]
+            tabela[f"{campo}_max"] = grupos.maximo[j, ordem]
+        return tabela
+
+    def tabelas(self):
+        """Todas as dimensões numa só tabela longa (dimensao, grupo, ...), para exportação."""
+        partes = []
+        for dimensao in self.dimensoes:
+            tabela = self.tabela(dimensao)
+            grupos = tabela.pop(dimensao)
+            partes.append({"dimensao": [dimensao] * len(grupos), "grupo": [str(g) for g in grupos], **tabela})
+        return {k: np.concatenate([np.asarray(p[k]) for p in partes]) for k in partes[0]}
+
+
+def agregar_carteira(blocos, dimensoes=tuple(DIMENSOES)):
+    """
+    Agrega um fluxo de blocos: listas de resumos ou os pares (resumos, parcelas)
+    de revisional.lote.iterar_lote. Devolve o AgregadorCarteira preenchido.
+    """
+    agregador = AgregadorCarteira(dimensoes)
+    for bloco in blocos:
+        agregador.adicionar(bloco[0] if isinstance(bloco, tuple) else bloco)
+    return agregador
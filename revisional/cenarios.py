@@ -0,0 +1,163 @@
+import numpy as np
+
+from revisional.cronograma import datas_vencimento
+from revisional.financeiro import calcular_pmt_mensal
+from revisional.indices import ordinais_mes, ordinal_mes
+from revisional.lei14905 import DATA_CORTE, INICIO_POS_LEI, IndicesPosLei, taxa_selic_menos_ipca
+
+# --- VARREDURA DE CENÁRIOS ---
+# Regra do Planilha.py (TJMG + 1% a.m. até o corte; IPCA + (Selic - IPCA) depois)
+# avaliada para uma grade taxas x citações x datas de cálculo numa só conta,
+# em arrays de eixo (taxa, citação, cálculo, parcela). O que não muda entre
+# cenários é calculado uma vez: vencimentos e fatores TJMG (só dependem do
+# contrato), dias de juros (só da citação), fatores pós-lei (só do cálculo).
+# Cada cenário bate com calcular_cronograma_hibrido + totalizar.
+
+
+FORMATOS_TAXAS = '"1.5, 2, 4,59", "1.5;2;4.59" ou "1:5:0.5"'
+
+
+def _taxa(texto, item):
+    try:
+        return float(texto.replace(",", "."))
+    except ValueError:
+        raise ValueError(f"Taxa inválida: {item!r} (use {FORMATOS_TAXAS})") from None
+
+
+def ler_taxas(texto):
+    """
+    Taxas da grade: lista ("1.5, 2, 4,59") ou faixa início:fim:passo ("1:5:0.5", fim incluso).
+    A vírgula é decimal, salvo em item que já tem ponto ("1.5,2" = 1.5 e 2).
+    """
+    itens = []
+    for item in texto.replace(";", " ").replace(", ", " ").split():
+        itens.extend(item.split(",") if "." in item else [item])
+    taxas = []
+    for item in filter(None, itens):
+        partes = [_taxa(p, item) for p in item.split(":")]
+        if len(partes) == 3:
+            inicio, fim, passo = partes
+            if passo <= 0:
+                raise ValueError(f"Passo inválido na faixa {item!r}")
+            taxas.extend(np.round(np.arange(inicio, fim + passo / 2, passo), 10).tolist())
+        elif len(partes) == 1:
+            taxas.append(partes[0])
+        else:
+            raise ValueError(f"Faixa inválida: {item!r} (use início:fim:passo)")
+    if not taxas:
+        raise ValueError("Informe ao menos uma taxa")
+    return np.unique(taxas)
+
+
+def ler_datas(texto):
+    """Datas da grade no formato brasileiro ou ISO, separadas por vírgula ou espaço."""
+    datas = []
+    for item in texto.replace(";", " ").replace(",", " ").split():
+        if "/" in item:
+            dia, mes, ano = item.split("/")
+            item = f"{int(ano):04d}-{int(mes):02d}-{int(dia):02d}"
+        datas.append(np.datetime64(item, "D"))
+    if not datas:
+        raise ValueError("Informe ao menos uma data")
+    return np.unique(np.array(datas, dtype="datetime64[D]"))
+
+
+def _soma_sequencial(valores, validas):
+    # Soma acumulada ao longo das parcelas (mesma ordem do sum() de totalizar);
+    # somar 0.0 nas parcelas fora do cenário não altera o acumulador
+    return np.cumsum(np.where(validas, valores, 0.0), axis=-1)[..., -1]
+
+
+def varrer_cenarios(tabela_tjmg, valor_emprestimo, valor_parcela, prazo_meses, data_inicio,
+                    taxas, datas_citacao, datas_calculo, antecipada=False, parcelas_excluidas=(),
+                    indices_pos_lei=None, pro_rata_diario=False, data_corte=DATA_CORTE):
+    """
+    Totais da condenação para cada combinação (taxa judicial % a.m., citação, cálculo).
+
+    Retorna um dict com os eixos ("taxa", "data_citacao", "data_calculo"), a parcela
+    revisada e a diferença por taxa, e os totais "Principal", "CM", "Juros_1_pct",
+    "Juros_Selic" e "Total" em arrays de forma (taxas, citações, cálculos).
+    indices_pos_lei: IndicesPosLei (padrão: séries IPCA e SELIC do registro).
+    """
+    taxas = np.atleast_1d(np.asarray(taxas, dtype=np.float64))
+    citacoes = np.atleast_1d(np.asarray(datas_citacao, dtype="datetime64[D]"))
+    calculos = np.atleast_1d(np.asarray(datas_calculo, dtype="datetime64[D]"))
+    if indices_pos_lei is None:
+        indices_pos_lei = IndicesPosLei.do_registro()
+    corte = np.datetime64(data_corte, "D")
+
+    # Por taxa (eixo 0)
+    parcela_revisada = np.array([
+        calcular_pmt_mensal(valor_emprestimo, taxa, prazo_meses, antecipada=antecipada) for taxa in taxas.tolist()
+    ])
+    diferenca_base = valor_parcela - parcela_revisada
+
+    # Só do contrato (eixo 3): reaproveitado por todos os cenários
+    parcelas = np.arange(1, int(prazo_meses) + 1)
+    vencimento = datas_vencimento(data_inicio, parcelas - 1)
+    excluida = np.isin(parcelas, np.asarray(list(parcelas_excluidas), dtype=np.int64))
+    antes_corte = vencimento <= corte
+    fator_tjmg = np.where(
+        antes_corte, tabela_tjmg.fatores_ate_corte(ordinais_mes(vencimento), ordinal_mes(data_corte)), 1.0
+    )
+    original = np.broadcast_to(diferenca_base[:, None, None, None], (len(taxas), 1, 1, len(parcelas)))
+    valor_corte = diferenca_base[:, None, None, None] * fator_tjmg
+
+    # Só da citação (eixo 1)
+    inicio_juros = np.maximum(vencimento, citacoes[:, None])
+    dias_juros = np.where(antes_corte & (inicio_juros < corte), (corte - inicio_juros).astype(np.int64), 0)
+    dias_juros = dias_juros[:, None, :]
+    taxa_juros = (dias_juros / 30) * 1.0
+    juros_1pct = np.where(dias_juros > 0, valor_corte * (taxa_juros / 100), 0.0)
+
+    # Só do cálculo (eixo 2): fatores pós-lei de 09/2024 (ou do corte, pro rata die) até cada data
+    pos_lei = antes_corte & (calculos[:, None] > corte)
+    if pro_rata_diario:
+        from revisional.diario import FatoresDiarios
+
+        fator_ipca_pos = FatoresDiarios.de_tabela_mensal(indices_pos_lei.ipca, "corridos").fatores(corte, calculos)
+        fator_selic_pos = FatoresDiarios.de_tabela_mensal(indices_pos_lei.selic, "uteis").fatores(corte, calculos)
+    else:
+        fator_ipca_pos, fator_selic_pos = indices_pos_lei.fatores(ordinal_mes(INICIO_POS_LEI), ordinais_mes(calculos))
+    fator_ipca_pos = np.where(calculos > corte, fator_ipca_pos, 1.0)
+    fator_selic_pos = np.where(calculos > corte, fator_selic_pos, 1.0)
+    _, _, taxa_selic_ipca = taxa_selic_menos_ipca(fator_selic_pos, fator_ipca_pos)
+
+    fator_ipca = np.where(pos_lei, fator_ipca_pos[:, None], 1.0)
+    valor_corrigido = valor_corte * fator_ipca[None, None]
+    juros_selic = np.where(pos_lei, valor_corrigido * (taxa_selic_ipca[:, None] / 100)[None, None], 0.0)
+
+    # Parcelas de cada cenário: vencidas até o cálculo e não excluídas
+    validas = (vencimento <= calculos[:, None]) & ~excluida
+    forma = (len(taxas), len(citacoes), len(calculos))
+    totais = {
+        "Principal": _soma_sequencial(original, validas),
+        "CM": _soma_sequencial(valor_corrigido - original, validas),
+        "Juros_1_pct": _soma_sequencial(juros_1pct, validas),
+        "Juros_Selic": _soma_sequencial(juros_selic, validas),
+    }
+    totais = {k: np.broadcast_to(v, forma).copy() for k, v in totais.items()}
+    totais["Total"] = totais["Principal"] + totais["CM"] + totais["Juros_1_pct"] + totais["Juros_Selic"]
+
+    return {
+        "taxa": taxas,
+        "data_citacao": citacoes,
+        "data_calculo": calculos,
+        "parcela_revisada": parcela_revisada,
+        "diferenca_base": diferenca_base,
+        **totais,
+    }
+
+
+def tabela_cenarios(resultado):
+    """Achata o resultado de varrer_cenarios em colunas (uma linha por cenário), prontas para um DataFrame."""
+    forma = resultado["Total"].shape
+    eixo_taxa, eixo_citacao, eixo_calculo = np.indices(forma).reshape(3, -1)
+    return {
+        "Taxa (% a.m.)": resultado["taxa"][eixo_taxa],
+        "Citação": resultado["data_citacao"][eixo_citacao],
+        "Cálculo": resultado["data_calculo"][eixo_calculo],
+        "Parcela Revisada": resultado["parcela_revisada"][eixo_taxa],
+        "Indébito Mensal": resultado["diferenca_base"][eixo_taxa],
+        **{k: resultado[k].reshape(-1) for k in ("Principal", "CM", "Juros_1_pct", "Juros_Selic", "Total")},
+    }
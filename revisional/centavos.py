@@ -0,0 +1,146 @@
+import numpy as np
+
+# --- MODO PONTO FIXO (CENTAVOS INTEIROS) ---
+# Valores em centavos (int64) e fatores inteiros escalados por 10**casas_fator.
+# Cada passo do cálculo arredonda explicitamente para o centavo, pela regra
+# escolhida, e os totais são somas exatas de inteiros: o resultado não depende
+# da ordem de soma nem do acúmulo de erro de ponto flutuante.
+#
+# Regras de arredondamento:
+#   "meio_para_cima": 0,5 centavo arredonda para longe do zero (padrão)
+#   "meio_par":       0,5 centavo vai para o centavo par (ABNT NBR 5891)
+#   "truncar":        descarta as frações de centavo
+
+ARREDONDAMENTOS = ("meio_para_cima", "meio_par", "truncar")
+CASAS_FATOR = 8
+CAMPOS_VALOR = ("original", "valor_corrigido", "juros_1pct", "juros_selic", "total")
+
+
+def _validar(arredondamento):
+    if arredondamento not in ARREDONDAMENTOS:
+        raise ValueError(f"Arredondamento inválido: {arredondamento!r} (use {', '.join(ARREDONDAMENTOS)})")
+
+
+def dividir(numerador, denominador, arredondamento="meio_para_cima"):
+    """Divisão inteira numerador / denominador (denominador > 0) com a regra de arredondamento."""
+    _validar(arredondamento)
+    numerador = np.asarray(numerador, dtype=np.int64)
+    sinal = np.sign(numerador)
+    quociente, resto = np.divmod(np.abs(numerador), denominador)
+    if arredondamento == "meio_para_cima":
+        quociente = quociente + (2 * resto >= denominador)
+    elif arredondamento == "meio_par":
+        quociente = quociente + ((2 * resto > denominador) | ((2 * resto == denominador) & (quociente % 2 == 1)))
+    return sinal * quociente
+
+
+def escalar(valores, escala, arredondamento="meio_para_cima"):
+    """Converte floats para inteiros na escala (100 = centavos; 10**8 = fator com 8 casas)."""
+    _validar(arredondamento)
+    # Limpa o ruído binário (ex.: 2.675 * 100 = 267.49999...) antes de aplicar a regra
+    escalado = np.round(np.asarray(valores, dtype=np.float64) * escala, 6)
+    if arredondamento == "meio_para_cima":
+        inteiro = np.sign(escalado) * np.floor(np.abs(escalado) + 0.5)
+    elif arredondamento == "meio_par":
+        inteiro = np.round(escalado)
+    else:
+        inteiro = np.trunc(escalado)
+    return inteiro.astype(np.int64)
+
+
+def para_centavos(valores, arredondamento="meio_para_cima"):
+    return escalar(valores, 100, arredondamento)
+
+
+def aplicar_fator(centavos, fator_escalado, escala, arredondamento="meio_para_cima"):
+    """
+    centavos * fator / escala arredondado para o centavo, sem estourar o int64:
+    separa centavos = q * escala + r, de modo que só r * fator / escala é fracionário.
+    """
+    centavos = np.asarray(centavos, dtype=np.int64)
+    fator_escalado = np.asarray(fator_escalado, dtype=np.int64)
+    sinal = np.sign(centavos)
+    quociente, resto = np.divmod(np.abs(centavos), escala)
+    return sinal * (quociente * fator_escalado + dividir(resto * fator_escalado, escala, arredondamento))
+
+
+def diferenca_centavos(valor_parcela, parcela_revisada, arredondamento="meio_para_cima"):
+    """Indébito mensal com as duas parcelas já arredondadas para o centavo."""
+    return int(para_centavos(valor_parcela, arredondamento) - para_centavos(parcela_revisada, arredondamento))
+
+
+def cronograma_em_centavos(cronograma, diferenca_base_centavos=None, arredondamento="meio_para_cima",
+                           casas_fator=CASAS_FATOR):
+    """
+    Refaz os valores de um cronograma (calcular_cronograma_tjmg ou _hibrido) em ponto fixo.
+
+    Usa as datas, dias e fatores do cronograma; os fatores são arredondados para
+    `casas_fator` casas e cada valor monetário é arredondado para o centavo:
+      valor corrigido = original x fator TJMG (x fator IPCA pós-lei)
+      juros 1% a.m.   = valor x dias / 3000
+      juros Lei 14.905 = valor corrigido x (fator Selic - fator IPCA), nunca negativo
+    Valores em centavos (int64); fatores inteiros na escala 10**casas_fator.
+    """
+    _validar(arredondamento)
+    escala = 10 ** casas_fator
+    n = len(cronograma["parcela"])
+    if diferenca_base_centavos is None:
+        original = para_centavos(cronograma["original"], arredondamento)
+    else:
+        original = np.full(n, int(diferenca_base_centavos), dtype=np.int64)
+
+    fator_tjmg = escalar(cronograma["fator_tjmg"], escala, arredondamento)
+    valor_corte = aplicar_fator(original, fator_tjmg, escala, arredondamento)
+    dias_juros = np.asarray(cronograma["dias_juros_1pct"], dtype=np.int64)
+    juros_1pct = np.where(dias_juros > 0, dividir(valor_corte * dias_juros, 3000, arredondamento), 0)
+
+    resultado = {
+        "parcela": cronograma["parcela"],
+        "vencimento": cronograma["vencimento"],
+        "excluida": cronograma["excluida"],
+        "original": original,
+        "fator_tjmg": fator_tjmg,
+        "escala_fator": escala,
+    }
+    if "fator_ipca" in cronograma:
+        fator_ipca = escalar(cronograma["fator_ipca"], escala, arredondamento)
+        valor_corrigido = aplicar_fator(valor_corte, fator_ipca, escala, arredondamento)
+        fator_ipca_pos = escalar(cronograma["fator_ipca_pos"], escala, arredondamento)
+        fator_selic_pos = escalar(cronograma["fator_selic_pos"], escala, arredondamento)
+        taxa_selic_ipca = np.maximum(fator_selic_pos - fator_ipca_pos, 0)
+        juros_selic = np.where(cronograma["pos_lei"],
+                               aplicar_fator(valor_corrigido, taxa_selic_ipca, escala, arredondamento), 0)
+        resultado["fator_ipca"] = fator_ipca
+    else:
+        valor_corrigido = valor_corte
+        juros_selic = np.zeros(n, dtype=np.int64)
+
+    resultado.update({
+        "valor_corrigido": valor_corrigido,
+        "juros_1pct": juros_1pct,
+        "juros_selic": juros_selic,
+        "total": valor_corrigido + juros_1pct + juros_selic,
+    })
+    return resultado
+
+
+def totalizar_centavos(cronograma):
+    """Totais exatos em centavos (int), sem as parcelas excluídas."""
+    validas = ~cronograma["excluida"]
+    original = cronograma["original"][validas]
+    return {
+        "Principal": int(original.sum()),
+        "CM": int((cronograma["valor_corrigido"][validas] - original).sum()),
+        "Juros_1_pct": int(cronograma["juros_1pct"][validas].sum()),
+        "Juros_Selic": int(cronograma["juros_selic"][validas].sum()),
+    }
+
+
+def em_reais(cronograma_centavos):
+    """Colunas monetárias em reais e fatores em float, para exibição e exportação."""
+    escala = cronograma_centavos["escala_fator"]
+    colunas = {k: cronograma_centavos[k] / 100 for k in CAMPOS_VALOR}
+    for k in ("fator_tjmg", "fator_ipca"):
+        if k in cronograma_centavos:
+            colunas[k] = cronograma_centavos[k] / escala
+    return colunas
@@ -0,0 +1,116 @@
+from collections.abc import Mapping
+
+import numpy as np
+
+# --- TABELA COLUNAR PRÉ-ALOCADA ---
+# Resultados de vários contratos em colunas NumPy alocadas de uma vez (uma por
+# campo, com o tipo do campo), preenchidas pelo cálculo linha a linha ou fatia a
+# fatia, sem um dict por linha: um resumo de contrato ocupa ~100 bytes e uma
+# parcela da memória de cálculo, ~120 (texto só nas colunas object: id e nome).
+#
+# A tabela é um Mapping coluna -> array (visões só das linhas preenchidas), o
+# mesmo formato dos cronogramas: exportacao, relatorio e formatacao a recebem
+# como recebem um cronograma. para_pandas e para_arrow entregam as mesmas
+# memórias, sem cópia; só as datas (e o texto, no Arrow) são convertidas.
+
+
+class TabelaColunar(Mapping):
+    """Colunas NumPy pré-alocadas segundo `esquema` (nome -> dtype); `tamanho` linhas preenchidas."""
+
+    def __init__(self, esquema, capacidade=0):
+        self.esquema = {nome: np.dtype(tipo) for nome, tipo in esquema.items()}
+        self._dados = {nome: np.empty(capacidade, dtype=tipo) for nome, tipo in self.esquema.items()}
+        self.tamanho = 0
+
+    @classmethod
+    def de_colunas(cls, colunas):
+        """Adota colunas já calculadas (arrays de mesmo tamanho), sem copiá-las."""
+        arrays = {nome: np.asarray(valores) for nome, valores in colunas.items()}
+        tabela = cls({nome: valores.dtype for nome, valores in arrays.items()})
+        tabela._dados = arrays
+        tabela.tamanho = len(next(iter(arrays.values()))) if arrays else 0
+        return tabela
+
+    @classmethod
+    def juntar(cls, tabelas):
+        """Uma tabela com as linhas de todas (uma alocação por coluna)."""
+        tabelas = [t for t in tabelas if t is not None]
+        if not tabelas:
+            return None
+        esquema = tabelas[0].esquema
+        juntas = cls(esquema, sum(t.tamanho for t in tabelas))
+        for tabela in tabelas:
+            juntas.acrescentar(tabela, tabela.tamanho)
+        return juntas
+
+    @property
+    def capacidade(self):
+        return len(next(iter(self._dados.values()))) if self._dados else 0
+
+    def reservar(self, n):
+        """Acrescenta n linhas (ainda não preenchidas) e devolve a fatia delas, para gravar direto nas colunas."""
+        necessario = self.tamanho + n
+        if necessario > self.capacidade:
+            # Cresce em dobro: acrescentar linha a linha custa O(1) amortizado
+            nova = max(necessario, 2 * self.capacidade)
+            for nome, coluna in self._dados.items():
+                maior = np.empty(nova, dtype=coluna.dtype)
+                maior[:self.tamanho] = coluna[:self.tamanho]
+                self._dados[nome] = maior
+        fatia = slice(self.tamanho, necessario)
+        self.tamanho = necessario
+        return fatia
+
+    def acrescentar(self, valores, n=None):
+        """
+        Acrescenta n linhas com os valores de cada coluna do esquema (arrays de n
+        elementos ou escalares, repetidos; sem n, vale o tamanho do primeiro array).
+        Chaves fora do esquema são ignoradas.
+        """
+        if n is None:
+            n = next((len(valores[nome]) for nome in self.esquema if isinstance(valores[nome], np.ndarray)), 1)
+        fatia = self.reservar(n)
+        for nome, coluna in self._dados.items():
+            coluna[fatia] = valores[nome]
+        return fatia
+
+    def fatia(self, inicio=0, fim=None):
+        """Tabela com as linhas [inicio, fim), sobre a mesma memória."""
+        return TabelaColunar.de_colunas({nome: coluna[inicio:fim] for nome, coluna in self.items()})
+
+    def linhas(self, inicio=0):
+        """Linhas a partir de `inicio` como dicts de tipos Python (para JSON ou comparação)."""
+        listas = {nome: coluna[inicio:self.tamanho].tolist() for nome, coluna in self._dados.items()}
+        return [dict(zip(listas, valores)) for valores in zip(*listas.values())]
+
+    @property
+    def nbytes(self):
+        """Bytes das linhas preenchidas (colunas object contam só os ponteiros)."""
+        return sum(self[nome].nbytes for nome in self._dados)
+
+    def __getitem__(self, nome):
+        return self._dados[nome][:self.tamanho]
+
+    def __iter__(self):
+        return iter(self._dados)
+
+    def __len__(self):
+        return len(self._dados)
+
+    def __repr__(self):
+        return f"TabelaColunar({self.tamanho} linhas x {len(self)} colunas)"
+
+    def para_pandas(self):
+        """DataFrame sobre as mesmas colunas (sem cópia; use no lugar de pd.DataFrame(tabela))."""
+        import pandas as pd
+
+        return pd.DataFrame(dict(self), copy=False)
+
+    def para_arrow(self):
+        """
+        Tabela do pyarrow; colunas numéricas e booleanas sem nulos apontam para a
+        mesma memória. Em colunas object, None e NaN viram nulos.
+        """
+        import pyarrow as pa
+
+        return pa.table({nome: pa.array(coluna, from_pandas=coluna.dtype == object) for nome, coluna in self.items()})
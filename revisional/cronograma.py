@@ -0,0 +1,183 @@
+import numpy as np
+
+from revisional.indices import ordinais_mes, ordinal_mes
+from revisional.lei14905 import taxa_selic_menos_ipca
+from revisional.medicao import etapa
+
+# --- CRONOGRAMA VETORIZADO ---
+# Calcula todas as parcelas de um contrato de uma só vez, em arrays NumPy.
+# As fórmulas (e a ordem das operações) são as mesmas dos laços originais
+# do app.py e do Planilha.py, para que os valores batam centavo a centavo.
+
+
+def datas_vencimento(data_inicio, deslocamentos_meses):
+    """
+    Equivalente vetorizado de data_inicio + relativedelta(months=k):
+    o dia é mantido e limitado ao último dia do mês (ex.: 31/01 + 1 mês = 28/02).
+    """
+    inicio = np.datetime64(data_inicio, "D")
+    mes_inicial = inicio.astype("datetime64[M]")
+    dia = (inicio - mes_inicial.astype("datetime64[D]")).astype(np.int64)
+    meses = mes_inicial + np.asarray(deslocamentos_meses, dtype=np.int64)
+    primeiro_dia = meses.astype("datetime64[D]")
+    ultimo_dia = ((meses + 1).astype("datetime64[D]") - primeiro_dia).astype(np.int64) - 1
+    return primeiro_dia + np.minimum(dia, ultimo_dia)
+
+
+def _dias(fim, inicio):
+    return (fim - inicio).astype(np.int64)
+
+
+@etapa("cronograma.tjmg")
+def calcular_cronograma_tjmg(tabela, diferenca_base, prazo_meses, data_inicio, data_citacao, data_calculo):
+    """
+    Regra do app.py: correção TJMG até a data do cálculo + juros de 1% a.m.
+    pro rata (dias/30) desde o vencimento ou a citação, o que for posterior.
+    1ª parcela vence um mês após o início; parcelas que vencem após o cálculo ficam de fora.
+    """
+    parcelas = np.arange(1, int(prazo_meses) + 1)
+    vencimento = datas_vencimento(data_inicio, parcelas)
+    calculo = np.datetime64(data_calculo, "D")
+    n = int(np.searchsorted(vencimento, calculo, side="right"))
+    parcelas, vencimento = parcelas[:n], vencimento[:n]
+
+    fator = tabela.fatores_correcao(ordinais_mes(vencimento), ordinal_mes(data_calculo))
+    valor_corrigido = diferenca_base * fator
+
+    inicio_juros = np.maximum(vencimento, np.datetime64(data_citacao, "D"))
+    dias_juros = np.maximum(_dias(calculo, inicio_juros), 0)
+    juros = np.where(dias_juros > 0, valor_corrigido * (dias_juros / 30) * 0.01, 0.0)
+
+    return {
+        "parcela": parcelas,
+        "vencimento": vencimento,
+        "excluida": np.zeros(n, dtype=bool),
+        "original": np.full(n, float(diferenca_base)),
+        "fator_tjmg": fator,
+        "valor_corrigido": valor_corrigido,
+        "dias_juros_1pct": dias_juros,
+        "juros_1pct": juros,
+        "juros_selic": np.zeros(n),
+        "total": valor_corrigido + juros,
+    }
+
+
+# --- REGRA HÍBRIDA EM ETAPAS ---
+# calcular_cronograma_hibrido é a composição das etapas abaixo. Cada etapa
+# depende só de parte das entradas (ex.: os fatores TJMG não dependem da data
+# do cálculo), o que permite ao revisional.grafo reaproveitar as que não mudaram.
+
+
+def vencimentos_hibrido(prazo_meses, data_inicio):
+    """Parcelas 1..prazo e vencimentos (1ª parcela vence na data de início), sem recorte."""
+    parcelas = np.arange(1, int(prazo_meses) + 1)
+    return parcelas, datas_vencimento(data_inicio, parcelas - 1)
+
+
+def fatores_tjmg_ate_corte(tabela_tjmg, vencimento, data_corte):
+    """(vence até o corte?, fator TJMG até o corte) por parcela."""
+    antes_corte = vencimento <= np.datetime64(data_corte, "D")
+    fator_tjmg = np.where(
+        antes_corte, tabela_tjmg.fatores_ate_corte(ordinais_mes(vencimento), ordinal_mes(data_corte)), 1.0
+    )
+    return antes_corte, fator_tjmg
+
+
+def juros_ate_corte(vencimento, antes_corte, data_citacao, data_corte):
+    """(dias, taxa %) de juros de 1% a.m. desde o vencimento ou a citação até o corte."""
+    corte = np.datetime64(data_corte, "D")
+    inicio_juros = np.maximum(vencimento, np.datetime64(data_citacao, "D"))
+    dias_juros = np.where(antes_corte & (inicio_juros < corte), _dias(corte, inicio_juros), 0)
+    taxa_juros = (dias_juros / 30) * 1.0
+    return dias_juros, taxa_juros
+
+
+def montar_cronograma_hibrido(parcelas, vencimento, antes_corte, fator_tjmg, dias_juros, taxa_juros,
+                              diferenca_base, data_calculo, data_corte, fator_ipca_pos=1.0, fator_selic_pos=1.0,
+                              fator_ipca_parcelas_novas=1.0, parcelas_excluidas=()):
+    """Recorta as parcelas vencidas até o cálculo e aplica valores, IPCA e Selic (etapa final)."""
+    calculo = np.datetime64(data_calculo, "D")
+    corte = np.datetime64(data_corte, "D")
+    n = int(np.searchsorted(vencimento, calculo, side="right"))
+    parcelas, vencimento, antes_corte = parcelas[:n], vencimento[:n], antes_corte[:n]
+    fator_tjmg, dias_juros, taxa_juros = fator_tjmg[:n], dias_juros[:n], taxa_juros[:n]
+
+    excluida = np.isin(parcelas, np.asarray(list(parcelas_excluidas), dtype=np.int64))
+    pos_lei = antes_corte & (calculo > corte)
+
+    # 1. TJMG até o corte
+    valor_corte = diferenca_base * fator_tjmg
+    dias_tjmg = np.where(antes_corte, _dias(min(calculo, corte), vencimento), 0)
+    dias_ipca = np.where(pos_lei, _dias(calculo, corte), 0)
+
+    # 2. Juros de 1% a.m. até o corte
+    juros_1pct = np.where(dias_juros > 0, valor_corte * (taxa_juros / 100), 0.0)
+
+    # 3. Lei 14.905: IPCA + (Selic - IPCA) após o corte
+    fator_ipca = np.where(pos_lei, fator_ipca_pos, np.where(antes_corte, 1.0, fator_ipca_parcelas_novas))
+    valor_corrigido = valor_corte * fator_ipca
+
+    var_selic_pct, var_ipca_pct, taxa_selic_ipca = taxa_selic_menos_ipca(fator_selic_pos, fator_ipca_pos)
+    juros_selic = np.where(pos_lei, valor_corrigido * (taxa_selic_ipca / 100), 0.0)
+
+    return {
+        "parcela": parcelas,
+        "vencimento": vencimento,
+        "excluida": excluida,
+        "original": np.full(n, float(diferenca_base)),
+        "dias_cm": _dias(calculo, vencimento),
+        "fator_tjmg": fator_tjmg,
+        "dias_tjmg": dias_tjmg,
+        "fator_ipca": fator_ipca,
+        "dias_ipca": dias_ipca,
+        "valor_corrigido": valor_corrigido,
+        "dias_juros_1pct": dias_juros,
+        "taxa_juros_1pct": taxa_juros,
+        "juros_1pct": juros_1pct,
+        "pos_lei": pos_lei,
+        "fator_ipca_pos": fator_ipca_pos,
+        "fator_selic_pos": fator_selic_pos,
+        "var_selic_pct": var_selic_pct,
+        "var_ipca_pct": var_ipca_pct,
+        "taxa_selic_ipca": taxa_selic_ipca,
+        "juros_selic": juros_selic,
+        "total": valor_corrigido + juros_1pct + juros_selic,
+    }
+
+
+@etapa("cronograma.hibrido")
+def calcular_cronograma_hibrido(tabela_tjmg, diferenca_base, prazo_meses, data_inicio, data_citacao,
+                                data_calculo, data_corte, fator_ipca_pos=1.0, fator_selic_pos=1.0,
+                                fator_ipca_parcelas_novas=1.0, parcelas_excluidas=()):
+    """
+    Regra do Planilha.py: TJMG + 1% a.m. até a data de corte; depois IPCA + (Selic - IPCA).
+
+    fator_ipca_pos / fator_selic_pos: fatores acumulados de 09/2024 até o cálculo,
+    aplicados às parcelas vencidas até o corte (iguais para todas as parcelas).
+    fator_ipca_parcelas_novas: fator aplicado às parcelas vencidas após o corte.
+    1ª parcela vence na data de início.
+    """
+    parcelas, vencimento = vencimentos_hibrido(prazo_meses, data_inicio)
+    # Só as parcelas vencidas até o cálculo entram; as etapas por parcela são elemento a elemento
+    n = int(np.searchsorted(vencimento, np.datetime64(data_calculo, "D"), side="right"))
+    parcelas, vencimento = parcelas[:n], vencimento[:n]
+    antes_corte, fator_tjmg = fatores_tjmg_ate_corte(tabela_tjmg, vencimento, data_corte)
+    dias_juros, taxa_juros = juros_ate_corte(vencimento, antes_corte, data_citacao, data_corte)
+    return montar_cronograma_hibrido(
+        parcelas, vencimento, antes_corte, fator_tjmg, dias_juros, taxa_juros, diferenca_base, data_calculo,
+        data_corte, fator_ipca_pos, fator_selic_pos, fator_ipca_parcelas_novas, parcelas_excluidas,
+    )
+
+
+def totalizar(cronograma):
+    """Totais do cronograma (parcelas excluídas ficam de fora), somados na ordem das parcelas."""
+    validas = ~cronograma["excluida"]
+    original = cronograma["original"][validas]
+    corrigido = cronograma["valor_corrigido"][validas]
+    # sum() sequencial em vez de np.sum (pairwise) para reproduzir os acumuladores originais
+    return {
+        "Principal": sum(original.tolist()),
+        "CM": sum((corrigido - original).tolist()),
+        "Juros_1_pct": sum(cronograma["juros_1pct"][validas].tolist()),
+        "Juros_Selic": sum(cronograma["juros_selic"][validas].tolist()),
+    }
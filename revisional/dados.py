@@ -0,0 +1,282 @@
+import functools
+from datetime import date
+
+import numpy as np
+
+from revisional.cache import tabela_em_cache
+from revisional.indices import TabelaIndice
+
+# --- DADOS DA TABELA TJ-MG (EMBUTIDOS) ---
+# Extraídos do arquivo fornecido pelo usuário.
+# Contém índices mensais (%) de Jan/2016 a Dez/2025 (usados pelo app.py).
+CSV_TJMG_INDICES = """Data,Indice
+2016-01-01,1.51
+2016-02-01,0.95
+2016-03-01,0.44
+2016-04-01,0.64
+2016-05-01,0.98
+2016-06-01,0.47
+2016-07-01,0.64
+2016-08-01,0.31
+2016-09-01,0.08
+2016-10-01,0.17
+2016-11-01,0.07
+2016-12-01,0.13
+2017-01-01,0.42
+2017-02-01,0.24
+2017-03-01,0.32
+2017-04-01,0.08
+2017-05-01,0.36
+2017-06-01,-0.3
+2017-07-01,0.17
+2017-08-01,-0.03
+2017-09-01,-0.02
+2017-10-01,0.37
+2017-11-01,0.18
+2017-12-01,0.26
+2018-01-01,0.23
+2018-02-01,0.18
+2018-03-01,0.07
+2018-04-01,0.21
+2018-05-01,0.43
+2018-06-01,1.43
+2018-07-01,0.25
+2018-08-01,0.0
+2018-09-01,0.3
+2018-10-01,0.4
+2018-11-01,-0.25
+2018-12-01,0.14
+2019-01-01,0.36
+2019-02-01,0.54
+2019-03-01,0.77
+2019-04-01,0.6
+2019-05-01,0.15
+2019-06-01,0.01
+2019-07-01,0.1
+2019-08-01,0.12
+2019-09-01,-0.05
+2019-10-01,0.04
+2019-11-01,0.54
+2019-12-01,1.22
+2020-01-01,0.19
+2020-02-01,0.17
+2020-03-01,0.18
+2020-04-01,-0.23
+2020-05-01,-0.25
+2020-06-01,0.3
+2020-07-01,0.44
+2020-08-01,0.36
+2020-09-01,0.87
+2020-10-01,0.89
+2020-11-01,0.95
+2020-12-01,1.46
+2021-01-01,0.27
+2021-02-01,0.82
+2021-03-01,0.86
+2021-04-01,0.38
+2021-05-01,0.96
+2021-06-01,0.6
+2021-07-01,1.02
+2021-08-01,0.88
+2021-09-01,1.2
+2021-10-01,1.16
+2021-11-01,0.84
+2021-12-01,0.73
+2022-01-01,0.67
+2022-02-01,1.0
+2022-03-01,1.71
+2022-04-01,1.04
+2022-05-01,0.45
+2022-06-01,0.62
+2022-07-01,-0.6
+2022-08-01,-0.31
+2022-09-01,-0.32
+2022-10-01,0.47
+2022-11-01,0.38
+2022-12-01,0.69
+2023-01-01,0.46
+2023-02-01,0.77
+2023-03-01,0.64
+2023-04-01,0.53
+2023-05-01,0.36
+2023-06-01,-0.1
+2023-07-01,-0.09
+2023-08-01,0.2
+2023-09-01,0.11
+2023-10-01,0.12
+2023-11-01,0.1
+2023-12-01,0.55
+2024-01-01,0.57
+2024-02-01,0.81
+2024-03-01,0.19
+2024-04-01,0.37
+2024-05-01,0.46
+2024-06-01,0.25
+2024-07-01,0.26
+2024-08-01,-0.14
+2024-09-01,0.48
+2024-10-01,0.61
+2024-11-01,0.33
+2024-12-01,0.48
+2025-01-01,0.0
+2025-02-01,1.48
+2025-03-01,0.51
+2025-04-01,0.48
+2025-05-01,0.35
+2025-06-01,0.23
+2025-07-01,0.21
+2025-08-01,-0.21
+2025-09-01,0.52
+2025-10-01,0.03
+2025-11-01,0.03
+"""
+
+# --- DADOS DA TABELA TJ-MG (Fatores Oficiais Acumulados para Ago/2024) ---
+# Usados pelo Planilha.py para corrigir até a data de corte da Lei 14.905/24.
+CSV_TJMG_FATORES = """Data,Fator_Acumulado
+2016-01-01,1.5444224
+2016-02-01,1.5214479
+2016-03-01,1.5071304
+2016-04-01,1.5005285
+2016-05-01,1.4909855
+2016-06-01,1.4765155
+2016-07-01,1.4696089
+2016-08-01,1.4602633
+2016-09-01,1.4557497
+2016-10-01,1.4545860
+2016-11-01,1.4521181
+2016-12-01,1.4511018
+2017-01-01,1.4490735
+2017-02-01,1.4430131
+2017-03-01,1.4395577
+2017-04-01,1.4349661
+2017-05-01,1.4338191
+2017-06-01,1.4286760
+2017-07-01,1.4329747
+2017-08-01,1.4305432
+2017-09-01,1.4309724
+2017-10-01,1.4312584
+2017-11-01,1.4259823
+2017-12-01,1.4234199
+2018-01-01,1.4197288
+2018-02-01,1.4164710
+2018-03-01,1.4139256
+2018-04-01,1.4129367
+2018-05-01,1.4099753
+2018-06-01,1.4039388
+2018-07-01,1.3841456
+2018-08-01,1.3806937
+2018-09-01,1.3806937
+2018-10-01,1.3765639
+2018-11-01,1.3710796
+2018-12-01,1.3745164
+2019-01-01,1.3725944
+2019-02-01,1.3676705
+2019-03-01,1.3603254
+2019-04-01,1.3499302
+2019-05-01,1.3418792
+2019-06-01,1.3398695
+2019-07-01,1.3397357
+2019-08-01,1.3383972
+2019-09-01,1.3367930
+2019-10-01,1.3374614
+2019-11-01,1.3369272
+2019-12-01,1.3297463
+2020-01-01,1.3137189
+2020-02-01,1.3112275
+2020-03-01,1.3090025
+2020-04-01,1.3066504
+2020-05-01,1.3096624
+2020-06-01,1.3129447
+2020-07-01,1.3090175
+2020-08-01,1.3032830
+2020-09-01,1.2986083
+2020-10-01,1.2874080
+2020-11-01,1.2760510
+2020-12-01,1.2640430
+2021-01-01,1.2458531
+2021-02-01,1.2424987
+2021-03-01,1.2323930
+2021-04-01,1.2218851
+2021-05-01,1.2172591
+2021-06-01,1.2056847
+2021-07-01,1.1984937
+2021-08-01,1.1863923
+2021-09-01,1.1760434
+2021-10-01,1.1620978
+2021-11-01,1.1487726
+2021-12-01,1.1392028
+2022-01-01,1.1309468
+2022-02-01,1.1234201
+2022-03-01,1.1122969
+2022-04-01,1.0935966
+2022-05-01,1.0823400
+2022-06-01,1.0774917
+2022-07-01,1.0708524
+2022-08-01,1.0773160
+2022-09-01,1.0806661
+2022-10-01,1.0841356
+2022-11-01,1.0790638
+2022-12-01,1.0749791
+2023-01-01,1.0676125
+2023-02-01,1.0627238
+2023-03-01,1.0546035
+2023-04-01,1.0478969
+2023-05-01,1.0423724
+2023-06-01,1.0386332
+2023-07-01,1.0396729
+2023-08-01,1.0406096
+2023-09-01,1.0385324
+2023-10-01,1.0373913
+2023-11-01,1.0361480
+2023-12-01,1.0351128
+2024-01-01,1.0294509
+2024-02-01,1.0236163
+2024-03-01,1.0153916
+2024-04-01,1.0134660
+2024-05-01,1.0097300
+2024-06-01,1.0051065
+2024-07-01,1.0026000
+2024-08-01,1.0000000
+"""
+
+# --- ÍNDICES PÓS-LEI 14.905 (Tabela Mensal Aproximada) ---
+INDICES_POS_LEI = [
+    {"Mes": date(2024, 9, 1),  "IPCA (%)": 0.44, "Selic Meta (%)": 0.84},
+    {"Mes": date(2024, 10, 1), "IPCA (%)": 0.56, "Selic Meta (%)": 0.93},
+    {"Mes": date(2024, 11, 1), "IPCA (%)": 0.39, "Selic Meta (%)": 0.79},
+    {"Mes": date(2024, 12, 1), "IPCA (%)": 0.52, "Selic Meta (%)": 0.93},
+    {"Mes": date(2025, 1, 1),  "IPCA (%)": 0.16, "Selic Meta (%)": 1.01},
+]
+
+
+def ler_csv_embutido(texto):
+    """Lê um CSV embutido de duas colunas (Data, valor) sem depender do pandas."""
+    linhas = [linha.split(",") for linha in texto.strip().splitlines()[1:] if linha.strip()]
+    datas = np.array([linha[0] for linha in linhas], dtype="datetime64[D]")
+    valores = np.array([float(linha[1]) for linha in linhas])
+    return datas, valores
+
+
+@functools.lru_cache(maxsize=None)
+def tabela_tjmg_indices():
+    """Tabela TJMG de índices mensais (app.py), lida do cache binário em disco quando possível."""
+    return tabela_em_cache(
+        "tjmg_indices", CSV_TJMG_INDICES, lambda texto: TabelaIndice.de_indices_mensais(*ler_csv_embutido(texto))
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def tabela_tjmg_fatores():
+    """Tabela TJMG de fatores acumulados até Ago/2024 (Planilha.py), lida do cache binário quando possível."""
+    return tabela_em_cache(
+        "tjmg_fatores", CSV_TJMG_FATORES, lambda texto: TabelaIndice.de_fatores_acumulados(*ler_csv_embutido(texto))
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def tabela_pos_lei(coluna):
+    """Tabela mensal de uma coluna de INDICES_POS_LEI ("IPCA (%)" ou "Selic Meta (%)"), do cache binário quando possível."""
+    texto = "Data,Indice\n" + "".join(f"{linha['Mes']},{linha[coluna]!r}\n" for linha in INDICES_POS_LEI)
+    nome = "pos_lei_" + coluna.split()[0].lower()
+    return tabela_em_cache(nome, texto, lambda texto: TabelaIndice.de_indices_mensais(*ler_csv_embutido(texto)))
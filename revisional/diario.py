@@ -0,0 +1,213 @@
+import functools
+from datetime import date, timedelta
+
+import numpy as np
+
+from revisional.cache import arrays_em_cache
+from revisional.medicao import contar
+
+# --- FATORES DIÁRIOS (PRO RATA DIE) ---
+# Fatores acumulados por dia num vetor contíguo: o fator entre duas datas é uma
+# divisão entre duas posições do vetor (O(1)), em lote via NumPy.
+# Convenção: o fator entre a e b acumula os dias d com a < d <= b, de modo que
+# o número de dias corridos é (b - a).days, como nas colunas de dias da Planilha.
+# O calendário nacional e os fatores diários pós-lei são publicados no cache em
+# disco (revisional.cache.arrays_em_cache) e abertos com mmap por todos os processos.
+
+ANO_INICIAL = 1990
+ANO_FINAL = 2100
+
+# Feriados nacionais de data fixa (mês, dia)
+FERIADOS_FIXOS = [(1, 1), (4, 21), (5, 1), (9, 7), (10, 12), (11, 2), (11, 15), (12, 25)]
+# Dia Nacional de Zumbi e da Consciência Negra: feriado nacional desde 2024 (Lei 14.759/2023)
+CONSCIENCIA_NEGRA_DESDE = 2024
+
+
+def _dia(data):
+    return np.datetime64(data, "D").astype(np.int64)
+
+
+def _dias(datas):
+    return np.asarray(datas, dtype="datetime64[D]").astype(np.int64)
+
+
+def pascoa(ano):
+    """Domingo de Páscoa (algoritmo de Meeus/Jones/Butcher)."""
+    a, b, c = ano % 19, ano // 100, ano % 100
+    d, e = b // 4, b % 4
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = c // 4, c % 4
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    mes, dia = divmod(h + l - 7 * m + 114, 31)
+    return date(ano, mes, dia + 1)
+
+
+def feriados_nacionais(ano_inicial=ANO_INICIAL, ano_final=ANO_FINAL):
+    """Feriados nacionais (incl. Carnaval, Sexta-feira Santa e Corpus Christi) como datetime64[D]."""
+    feriados = []
+    for ano in range(ano_inicial, ano_final + 1):
+        feriados.extend(date(ano, mes, dia) for mes, dia in FERIADOS_FIXOS)
+        if ano >= CONSCIENCIA_NEGRA_DESDE:
+            feriados.append(date(ano, 11, 20))
+        domingo = pascoa(ano)
+        for deslocamento in (-48, -47, -2, 60):
+            feriados.append(domingo + timedelta(days=deslocamento))
+    return np.unique(np.array(feriados, dtype="datetime64[D]"))
+
+
+class CalendarioUteis:
+    """Dias úteis (seg-sex menos feriados) com contagem acumulada para consultas O(1)."""
+
+    __slots__ = ("inicio", "feriados", "util", "_acum_uteis")
+
+    def __init__(self, feriados, data_inicial, data_final):
+        self.feriados = np.asarray(feriados, dtype="datetime64[D]")
+        self.inicio = _dia(data_inicial)
+        dias = np.arange(self.inicio, _dia(data_final) + 1).astype("datetime64[D]")
+        self.util = np.is_busday(dias, holidays=self.feriados)
+        self._acum_uteis = np.concatenate(([0], np.cumsum(self.util, dtype=np.int32)))
+
+    @classmethod
+    def de_arrays(cls, arrays):
+        """Reabre um calendário gravado com como_arrays (ex.: mmap do cache), sem recalcular."""
+        calendario = cls.__new__(cls)
+        calendario.feriados = arrays["feriados"]
+        calendario.inicio = int(arrays["inicio"][0])
+        calendario.util = arrays["util"]
+        calendario._acum_uteis = arrays["acum_uteis"]
+        return calendario
+
+    def como_arrays(self):
+        return {"feriados": self.feriados, "inicio": np.array([self.inicio], dtype=np.int64),
+                "util": self.util, "acum_uteis": self._acum_uteis}
+
+    def _posicao(self, dias):
+        return np.clip(dias - self.inicio + 1, 0, len(self.util))
+
+    def dias_uteis(self, datas_ini, datas_fim):
+        """Dias úteis d com ini < d <= fim (arrays ou escalares)."""
+        ini, fim = _dias(datas_ini), _dias(datas_fim)
+        contagem = self._acum_uteis[self._posicao(fim)] - self._acum_uteis[self._posicao(ini)]
+        return np.where(fim > ini, contagem, 0)
+
+    def eh_dia_util(self, data):
+        k = _dia(data) - self.inicio
+        return bool(0 <= k < len(self.util) and self.util[k])
+
+
+@functools.lru_cache(maxsize=None)
+def calendario_nacional():
+    """Calendário de dias úteis com os feriados nacionais de 1990 a 2100 (do cache em disco quando possível)."""
+    origem = f"{ANO_INICIAL}-{ANO_FINAL}\n{FERIADOS_FIXOS}\n{CONSCIENCIA_NEGRA_DESDE}"
+    return CalendarioUteis.de_arrays(arrays_em_cache("calendario_nacional", origem, lambda: CalendarioUteis(
+        feriados_nacionais(), date(ANO_INICIAL, 1, 1), date(ANO_FINAL, 12, 31)).como_arrays()))
+
+
+class FatoresDiarios:
+    """Produto acumulado de fatores diários; dias sem dado contam como fator 1."""
+
+    __slots__ = ("inicio", "acumulado")
+
+    def __init__(self, inicio, fatores_diarios):
+        self.inicio = int(inicio)
+        # acumulado[j] = produto dos fatores dos dias inicio .. inicio + j - 1
+        self.acumulado = np.concatenate(([1.0], np.cumprod(np.asarray(fatores_diarios, dtype=np.float64))))
+
+    @classmethod
+    def de_arrays(cls, arrays):
+        """Reabre fatores gravados com como_arrays (ex.: mmap do cache), sem recalcular."""
+        diarios = cls.__new__(cls)
+        diarios.inicio = int(arrays["inicio"][0])
+        diarios.acumulado = arrays["acumulado"]
+        return diarios
+
+    def como_arrays(self):
+        return {"inicio": np.array([self.inicio], dtype=np.int64), "acumulado": self.acumulado}
+
+    @classmethod
+    def de_fatores_diarios(cls, datas, fatores):
+        """Série diária já em fator (ex.: fator diário da Selic divulgado pelo Bacen)."""
+        dias = _dias(datas)
+        if len(dias) == 0:
+            return cls(0, [])
+        inicio = int(dias.min())
+        diarios = np.ones(int(dias.max()) - inicio + 1)
+        diarios[dias - inicio] = fatores
+        return cls(inicio, diarios)
+
+    @classmethod
+    def de_taxas_diarias(cls, datas, taxas_pct):
+        """Série diária em % ao dia."""
+        return cls.de_fatores_diarios(datas, 1 + np.asarray(taxas_pct, dtype=np.float64) / 100)
+
+    @classmethod
+    def de_tabela_mensal(cls, tabela, base="uteis", calendario=None):
+        """
+        Distribui o índice de cada mês de uma TabelaIndice pelos dias do mês:
+        base "uteis" (Selic): fator_mes ** (1 / dias úteis do mês) em cada dia útil;
+        base "corridos" (IPCA): fator_mes ** (1 / dias do mês) em cada dia.
+        """
+        if tabela.vazia:
+            return cls(0, [])
+        primeiro = np.datetime64(f"{tabela.inicio // 12:04d}-{tabela.inicio % 12 + 1:02d}", "M")
+        meses = primeiro + np.arange(len(tabela.multiplicador))
+        dias = np.arange(meses[0].astype("datetime64[D]"), (meses[-1] + 1).astype("datetime64[D]"))
+        mes_do_dia = (dias.astype("datetime64[M]") - primeiro).astype(np.int64)
+
+        if base == "uteis":
+            calendario = calendario or calendario_nacional()
+            conta = np.is_busday(dias, holidays=calendario.feriados)
+        elif base == "corridos":
+            conta = np.ones(len(dias), dtype=bool)
+        else:
+            raise ValueError(f"Base de contagem inválida: {base!r} (use 'uteis' ou 'corridos')")
+
+        dias_no_mes = np.bincount(mes_do_dia, weights=conta, minlength=len(meses))
+        multiplicador = np.nan_to_num(tabela.multiplicador, nan=1.0)
+        diario_mes = multiplicador ** (1 / np.maximum(dias_no_mes, 1))
+        diarios = np.where(conta, diario_mes[mes_do_dia], 1.0)
+        return cls(dias[0].astype(np.int64), diarios)
+
+    def _posicao(self, dias):
+        return np.clip(dias - self.inicio + 1, 0, len(self.acumulado) - 1)
+
+    def fatores(self, datas_ini, datas_fim):
+        """Fator acumulado nos dias d com ini < d <= fim, em lote (broadcasting)."""
+        ini, fim = _dias(datas_ini), _dias(datas_fim)
+        contar("fatores.diarios", np.broadcast(ini, fim).size)
+        fator = self.acumulado[self._posicao(fim)] / self.acumulado[self._posicao(ini)]
+        return np.where(fim > ini, fator, 1.0)
+
+    def fator(self, data_ini, data_fim):
+        return float(self.fatores(data_ini, data_fim))
+
+
+@functools.lru_cache(maxsize=64)
+def fatores_diarios_publicados(nome, tabela, base):
+    """
+    FatoresDiarios.de_tabela_mensal(tabela, base) no calendário nacional, publicado
+    no cache em disco como "diario_<nome>_<base>" e identificado pelo conteúdo da
+    tabela: processos com a mesma tabela mensal compartilham os mesmos fatores.
+    """
+    if tabela.vazia:
+        return FatoresDiarios(0, [])
+    origem = f"{base}\n{tabela.inicio}\n{tabela.multiplicador.tobytes().hex()}"
+    return FatoresDiarios.de_arrays(arrays_em_cache(
+        f"diario_{nome}_{base}", origem, lambda: FatoresDiarios.de_tabela_mensal(tabela, base).como_arrays()))
+
+
+def fatores_pos_lei_diarios(indices_pos_lei, data_corte, data_calculo, calendario=None):
+    """
+    Fatores (IPCA, Selic) pro rata die entre a data de corte e o cálculo:
+    Selic capitalizada por dia útil e IPCA distribuído por dia corrido.
+    `indices_pos_lei` é um revisional.lei14905.IndicesPosLei.
+    """
+    ipca = fatores_diarios_publicados("ipca", indices_pos_lei.ipca, "corridos")
+    if calendario is None:
+        selic = fatores_diarios_publicados("selic", indices_pos_lei.selic, "uteis")
+    else:
+        selic = FatoresDiarios.de_tabela_mensal(indices_pos_lei.selic, "uteis", calendario)
+    return ipca.fator(data_corte, data_calculo), selic.fator(data_corte, data_calculo)
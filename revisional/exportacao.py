@@ -0,0 +1,274 @@
+import csv
+import io
+import math
+import time
+import zipfile
+from datetime import date
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+import numpy as np
+
+# --- EXPORTAÇÃO EM FLUXO (CSV, XLSX, PARQUET) ---
+# As linhas são gravadas em blocos à medida que são calculadas: o arquivo
+# cresce no disco e a memória fica limitada ao bloco corrente, qualquer que
+# seja o total de linhas. Cada bloco é um dict coluna -> array (o mesmo formato
+# dos cronogramas); colunas numéricas continuam numéricas no arquivo. Valores
+# escalares do bloco (ex.: fatores pós-lei do cronograma híbrido) não são colunas
+# e ficam de fora.
+
+FORMATOS = ("csv", "xlsx", "parquet")
+
+
+def formato_do_caminho(caminho):
+    formato = Path(caminho).suffix.lower().lstrip(".")
+    return formato if formato in FORMATOS else "csv"
+
+
+def _colunas(colunas):
+    """Só as colunas do bloco (arrays e listas); escalares ficam de fora."""
+    return {nome: valores for nome, valores in colunas.items() if np.ndim(valores) > 0}
+
+
+def _listas(colunas):
+    """Colunas como listas Python; datas viram date e NaN vira None."""
+    listas = {}
+    for nome, valores in colunas.items():
+        valores = np.asarray(valores)
+        if valores.dtype.kind == "M":
+            listas[nome] = valores.astype("datetime64[D]").astype(object).tolist()
+        elif valores.dtype.kind == "f":
+            listas[nome] = [None if v != v else v for v in valores.tolist()]
+        else:
+            listas[nome] = [None if isinstance(v, float) and v != v else v for v in valores.tolist()]
+    return listas
+
+
+class _Exportador:
+    def __init__(self):
+        self.linhas = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *erro):
+        self.fechar()
+        return False
+
+    def escrever(self, colunas):
+        raise NotImplementedError
+
+    def fechar(self):
+        pass
+
+
+class ExportadorCSV(_Exportador):
+    """CSV no mesmo formato do DataFrame.to_csv(index=False) do pandas."""
+
+    def __init__(self, destino):
+        super().__init__()
+        self._proprio = not hasattr(destino, "write")
+        binario = destino if not self._proprio else open(destino, "wb")
+        self._arquivo = io.TextIOWrapper(binario, encoding="utf-8", newline="", write_through=True)
+        self._escritor = csv.writer(self._arquivo, lineterminator="\n")
+        self._cabecalho = None
+
+    def escrever(self, colunas):
+        colunas = _colunas(colunas)
+        if self._cabecalho is None:
+            self._cabecalho = list(colunas)
+            self._escritor.writerow(self._cabecalho)
+        listas = _listas(colunas)
+        self._escritor.writerows(zip(*(listas[nome] for nome in self._cabecalho)))
+        self.linhas += len(listas[self._cabecalho[0]]) if self._cabecalho else 0
+
+    def fechar(self):
+        self._arquivo.flush()
+        if self._proprio:
+            self._arquivo.close()
+        else:
+            self._arquivo.detach()
+
+
+# --- XLSX (escrita direta do SpreadsheetML, sem dependências) ---
+_XML = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+_NS_REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+_NS_PKG = "http://schemas.openxmlformats.org/package/2006/relationships"
+_EXCEL_EPOCA = date(1899, 12, 30).toordinal()
+LINHAS_POR_PLANILHA = 1_048_576
+
+
+def _celula(valor):
+    if valor is None:
+        return "<c/>"
+    if isinstance(valor, (bool, np.bool_)):
+        return f'<c t="b"><v>{int(valor)}</v></c>'
+    if isinstance(valor, (int, np.integer)):
+        return f"<c><v>{int(valor)}</v></c>"
+    if isinstance(valor, float):
+        return f"<c><v>{valor!r}</v></c>" if math.isfinite(valor) else "<c/>"
+    if isinstance(valor, date):
+        return f'<c s="1"><v>{valor.toordinal() - _EXCEL_EPOCA}</v></c>'
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{escape(str(valor))}</t></is></c>'
+
+
+class ExportadorXLSX(_Exportador):
+    """
+    Pasta de trabalho .xlsx gravada em fluxo (zip + XML, sem openpyxl).
+    Ao atingir o limite de linhas do Excel, continua numa nova planilha.
+    """
+
+    def __init__(self, destino):
+        super().__init__()
+        self._zip = zipfile.ZipFile(destino, "w", compression=zipfile.ZIP_DEFLATED)
+        self._planilhas = 0
+        self._folha = None
+        self._linhas_folha = 0
+        self._cabecalho = None
+
+    def _nova_planilha(self):
+        self._fechar_planilha()
+        self._planilhas += 1
+        info = zipfile.ZipInfo(f"xl/worksheets/sheet{self._planilhas}.xml", time.localtime()[:6])
+        info.compress_type = zipfile.ZIP_DEFLATED
+        self._folha = io.TextIOWrapper(self._zip.open(info, "w", force_zip64=True), encoding="utf-8")
+        self._folha.write(f'{_XML}<worksheet xmlns="{_NS}"><sheetData>')
+        self._folha.write(self._linha(self._cabecalho))
+        self._linhas_folha = 1
+
+    def _fechar_planilha(self):
+        if self._folha is not None:
+            self._folha.write("</sheetData></worksheet>")
+            self._folha.close()
+            self._folha = None
+
+    @staticmethod
+    def _linha(valores):
+        return "<row>" + "".join(map(_celula, valores)) + "</row>"
+
+    def escrever(self, colunas):
+        colunas = _colunas(colunas)
+        if self._cabecalho is None:
+            self._cabecalho = list(colunas)
+            self._nova_planilha()
+        listas = _listas(colunas)
+        for linha in zip(*(listas[nome] for nome in self._cabecalho)):
+            if self._linhas_folha >= LINHAS_POR_PLANILHA:
+                self._nova_planilha()
+            self._folha.write(self._linha(linha))
+            self._linhas_folha += 1
+            self.linhas += 1
+
+    def fechar(self):
+        if self._zip is None:
+            return
+        if self._planilhas == 0:
+            self._cabecalho = []
+            self._nova_planilha()
+        self._fechar_planilha()
+        folhas = range(1, self._planilhas + 1)
+        self._zip.writestr("[Content_Types].xml", (
+            f'{_XML}<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/xl/workbook.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+            '<Override PartName="/xl/styles.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+            + "".join(f'<Override PartName="/xl/worksheets/sheet{k}.xml" '
+                      'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+                      for k in folhas)
+            + "</Types>"))
+        self._zip.writestr("_rels/.rels", (
+            f'{_XML}<Relationships xmlns="{_NS_PKG}">'
+            f'<Relationship Id="rId1" Type="{_NS_REL}/officeDocument" Target="xl/workbook.xml"/></Relationships>'))
+        self._zip.writestr("xl/workbook.xml", (
+            f'{_XML}<workbook xmlns="{_NS}" xmlns:r="{_NS_REL}"><sheets>'
+            + "".join(f'<sheet name="Dados{"" if k == 1 else f" {k}"}" sheetId="{k}" r:id="rId{k}"/>'
+                      for k in folhas)
+            + "</sheets></workbook>"))
+        self._zip.writestr("xl/_rels/workbook.xml.rels", (
+            f'{_XML}<Relationships xmlns="{_NS_PKG}">'
+            + "".join(f'<Relationship Id="rId{k}" Type="{_NS_REL}/worksheet" Target="worksheets/sheet{k}.xml"/>'
+                      for k in folhas)
+            + f'<Relationship Id="rId{self._planilhas + 1}" Type="{_NS_REL}/styles" Target="styles.xml"/>'
+            "</Relationships>"))
+        # Estilo 1 = data (formato embutido 14, dd/mm/aaaa no Excel em português)
+        self._zip.writestr("xl/styles.xml", (
+            f'{_XML}<styleSheet xmlns="{_NS}">'
+            '<fonts count="1"><font/></fonts>'
+            '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+            '<fill><patternFill patternType="gray125"/></fill></fills>'
+            '<borders count="1"><border/></borders>'
+            '<cellStyleXfs count="1"><xf/></cellStyleXfs>'
+            '<cellXfs count="2"><xf/><xf numFmtId="14" applyNumberFormat="1"/></cellXfs>'
+            "</styleSheet>"))
+        self._zip.close()
+        self._zip = None
+
+
+def _array_arrow(pa, valores):
+    """Coluna do pyarrow; em colunas object (texto), None e NaN viram nulos."""
+    valores = np.asarray(valores)
+    return pa.array(valores, from_pandas=valores.dtype == object)
+
+
+class ExportadorParquet(_Exportador):
+    """Parquet via pyarrow (dependência opcional): cada bloco vira um row group."""
+
+    def __init__(self, destino):
+        super().__init__()
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("A exportação em Parquet requer o pyarrow (pip install pyarrow)") from None
+        self._pa = pa
+        self._pq = pq
+        self._destino = destino
+        self._escritor = None
+
+    def escrever(self, colunas):
+        tabela = self._pa.table({nome: _array_arrow(self._pa, valores) for nome, valores in _colunas(colunas).items()})
+        if self._escritor is None:
+            self._escritor = self._pq.ParquetWriter(self._destino, tabela.schema)
+        else:
+            tabela = tabela.cast(self._escritor.schema)
+        self._escritor.write_table(tabela)
+        self.linhas += tabela.num_rows
+
+    def fechar(self):
+        if self._escritor is not None:
+            self._escritor.close()
+            self._escritor = None
+
+
+EXPORTADORES = {"csv": ExportadorCSV, "xlsx": ExportadorXLSX, "parquet": ExportadorParquet}
+
+
+def abrir_exportador(destino, formato=None):
+    """
+    Exportador em fluxo para um caminho ou arquivo binário (ex.: io.BytesIO).
+    O formato vem da extensão do caminho quando não é informado.
+    """
+    if formato is None:
+        formato = formato_do_caminho(destino) if not hasattr(destino, "write") else "csv"
+    if formato not in EXPORTADORES:
+        raise ValueError(f"Formato inválido: {formato!r} (use {', '.join(FORMATOS)})")
+    return EXPORTADORES[formato](destino)
+
+
+def exportar(blocos, destino, formato=None):
+    """Grava um iterável de blocos (dicts coluna -> array). Retorna o número de linhas."""
+    with abrir_exportador(destino, formato) as exportador:
+        for colunas in blocos:
+            exportador.escrever(colunas)
+    return exportador.linhas
+
+
+def exportar_bytes(colunas, formato="csv"):
+    """Conteúdo do arquivo em memória (para downloads de uma tabela pequena)."""
+    buffer = io.BytesIO()
+    exportar([colunas], buffer, formato)
+    return buffer.getvalue()
@@ -0,0 +1,27 @@
+# --- FUNÇÕES FINANCEIRAS ---
+
+
+def calcular_pmt(principal, taxa_anual, meses):
+    """Parcela PRICE a partir da taxa ANUAL (convertida para a mensal equivalente)."""
+    taxa_mensal = (1 + taxa_anual/100)**(1/12) - 1
+    if taxa_mensal == 0: return principal / meses
+    pmt = principal * (taxa_mensal * (1 + taxa_mensal)**meses) / ((1 + taxa_mensal)**meses - 1)
+    return pmt
+
+
+def calcular_pmt_mensal(principal, taxa_mensal_pct, meses, antecipada=False):
+    """Parcela PRICE usando taxa MENSAL direta (série antecipada divide por 1 + i)."""
+    taxa = taxa_mensal_pct / 100
+    if taxa == 0: return principal / meses
+    pmt = principal * (taxa * (1 + taxa)**meses) / ((1 + taxa)**meses - 1)
+    if antecipada:
+        pmt = pmt / (1 + taxa)
+    return pmt
+
+
+def calcular_juros_mora(valor_atualizado, data_vencimento, data_citacao, data_hoje):
+    """1% a.m. pro rata die (padrão cível: dias/30 * 1%) desde o vencimento ou a citação."""
+    inicio_juros = max(data_vencimento, data_citacao)
+    if inicio_juros >= data_hoje: return 0.0
+    dias = (data_hoje - inicio_juros).days
+    return valor_atualizado * (dias / 30) * 0.01
@@ -0,0 +1,98 @@
+import re
+
+import numpy as np
+
+from revisional.medicao import etapa
+
+# --- FORMATAÇÃO BRASILEIRA VETORIZADA ---
+# O cronograma fica tipado (float64/int64/datetime64) durante todo o cálculo;
+# a formatação em texto só acontece aqui, sobre as linhas que vão ser exibidas
+# ou exportadas. Cada coluna é formatada de uma vez: um format por valor e um
+# único translate/sub sobre o texto do bloco inteiro, em vez de três
+# str.replace por valor.
+
+_TROCA_SEPARADORES = str.maketrans(",.", ".,")
+_DATA_ISO = re.compile(r"(\d{4})-(\d{2})-(\d{2})")
+
+COLUNAS_MEMORIA = (
+    "Nº", "Vencimento", "Original", "Tempo CM (Dias)", "Fator TJMG", "Fator IPCA", "Principal Atualizado",
+    "Taxa 1% (Dias)", "Juros 1% a.m.", "Taxa (Selic - IPCA)", "Juros Lei 14.905", "Total Devido",
+)
+
+
+def _linhas(texto, n):
+    return np.array(texto.split("\n") if n else [], dtype=object)
+
+
+def fmt_br(valores, casas=2):
+    """1234.5 -> "1.234,50" para um array inteiro; NaN vira "-"."""
+    valores = np.asarray(valores, dtype=np.float64)
+    texto = "\n".join(map(f"{{:,.{casas}f}}".format, valores.ravel().tolist()))
+    saida = _linhas(texto.translate(_TROCA_SEPARADORES), valores.size).reshape(valores.shape)
+    saida[np.isnan(valores)] = "-"
+    return saida
+
+
+def fmt_moeda(valores):
+    texto = fmt_br(valores)
+    return np.where(texto == "-", "-", "R$ " + texto).astype(object)
+
+
+def fmt_pct(valores, casas=2):
+    texto = fmt_br(valores, casas)
+    return np.where(texto == "-", "-", texto + "%").astype(object)
+
+
+def fmt_data(datas):
+    """datetime64 -> "dd/mm/aaaa"."""
+    datas = np.asarray(datas, dtype="datetime64[D]")
+    texto = _DATA_ISO.sub(r"\3/\2/\1", "\n".join(datas.astype(str).tolist()))
+    return _linhas(texto, datas.size)
+
+
+def fmt_dias(dias):
+    return np.char.add(np.asarray(dias).astype(str), "d").astype(object)
+
+
+def taxa_selic_ipca_texto(cronograma):
+    """Texto "Selic% - IPCA% = taxa%" do período pós-lei de um cronograma híbrido."""
+    return (f"{fmt_br(cronograma['var_selic_pct']).item()}% - {fmt_br(cronograma['var_ipca_pct']).item()}% "
+            f"= {fmt_br(cronograma['taxa_selic_ipca']).item()}%")
+
+
+@etapa("formatacao.memoria")
+def formatar_memoria(cronograma, linhas=None):
+    """
+    Colunas de texto da memória de cálculo de um cronograma híbrido (layout do
+    relatório da Planilha) para as `linhas` pedidas (índice, fatia ou máscara; todas por padrão).
+    """
+    colunas = {k: v if linhas is None else v[linhas]
+               for k, v in cronograma.items() if isinstance(v, np.ndarray)}
+    dias_cm = colunas["dias_cm"]
+    dias_tjmg = colunas["dias_tjmg"]
+    dias_juros = colunas["dias_juros_1pct"]
+    pos_lei = colunas.get("pos_lei", np.zeros(len(dias_cm), dtype=bool))
+    texto_selic = taxa_selic_ipca_texto(cronograma) if pos_lei.any() else "-"
+
+    saida = {
+        "Nº": colunas["parcela"],
+        "Vencimento": fmt_data(colunas["vencimento"]),
+        "Original": fmt_moeda(colunas["original"]),
+        "Tempo CM (Dias)": np.where(dias_cm > 0, fmt_dias(dias_cm), "0d").astype(object),
+        "Fator TJMG": np.where(dias_tjmg > 0, fmt_br(colunas["fator_tjmg"], 4) + " (" + fmt_dias(dias_tjmg) + ")",
+                               "-").astype(object),
+        "Fator IPCA": np.where(colunas["dias_ipca"] > 0, fmt_br(colunas["fator_ipca"], 4), "-").astype(object)
+        if "fator_ipca" in colunas else np.full(len(dias_cm), "-", dtype=object),
+        "Principal Atualizado": fmt_moeda(colunas["valor_corrigido"]),
+        "Taxa 1% (Dias)": np.where(dias_juros > 0, fmt_pct(colunas["taxa_juros_1pct"]) + " (" + fmt_dias(dias_juros)
+                                   + ")", "-").astype(object),
+        "Juros 1% a.m.": fmt_moeda(colunas["juros_1pct"]),
+        "Taxa (Selic - IPCA)": np.where(pos_lei, texto_selic, "-").astype(object),
+        "Juros Lei 14.905": fmt_moeda(colunas["juros_selic"]),
+        "Total Devido": fmt_moeda(colunas["total"]),
+    }
+    excluida = colunas["excluida"]
+    if excluida.any():
+        for nome in COLUNAS_MEMORIA[2:]:
+            saida[nome][excluida] = "-"
+    return saida
@@ -0,0 +1,151 @@
+from revisional.centavos import cronograma_em_centavos, diferenca_centavos, em_reais, totalizar_centavos
+from revisional.cronograma import (
+    fatores_tjmg_ate_corte,
+    juros_ate_corte,
+    montar_cronograma_hibrido,
+    totalizar,
+    vencimentos_hibrido,
+)
+from revisional.diario import fatores_pos_lei_diarios
+from revisional.financeiro import calcular_pmt_mensal
+from revisional.formatacao import formatar_memoria
+from revisional.lei14905 import INICIO_POS_LEI, IndicesPosLei
+from revisional.medicao import contar, etapa
+from revisional.memo import assinatura, chave, memo
+
+# --- GRAFO DE CÁLCULO INCREMENTAL ---
+# Cada etapa declara de quais entradas (ou outras etapas) depende e guarda o
+# último resultado junto com a assinatura dessas dependências. Num novo
+# cálculo, só as etapas cuja assinatura mudou são refeitas; as demais devolvem
+# o resultado guardado. Ex.: mudar só a data do cálculo não refaz a busca dos
+# fatores TJMG nem os dias de juros até o corte. As etapas refeitas são
+# medidas como "grafo.<nome>" (revisional.medicao).
+#
+# Os resultados guardados são compartilhados entre cálculos: não devem ser
+# alterados por quem os recebe.
+
+
+class GrafoCalculo:
+    def __init__(self):
+        self._etapas = {}
+        self._memoria = {}
+        self.recalculadas = []
+
+    def etapa(self, nome, *dependencias):
+        """Decorador: registra `funcao(*dependencias)` como a etapa `nome`."""
+        def registrar(funcao):
+            self._etapas[nome] = (funcao, dependencias)
+            return funcao
+        return registrar
+
+    def calcular(self, alvos, **entradas):
+        """
+        Resultados das etapas `alvos` para as `entradas`, refazendo só o que mudou.
+        As etapas refeitas neste cálculo ficam em self.recalculadas.
+        """
+        self.recalculadas = []
+        resolvidas = {}
+        return {alvo: self._resolver(alvo, entradas, resolvidas)[0] for alvo in alvos}
+
+    def _resolver(self, nome, entradas, resolvidas):
+        """(valor, assinatura) de uma entrada ou etapa, uma vez por cálculo."""
+        if nome in resolvidas:
+            return resolvidas[nome]
+        if nome in entradas:
+            resolvidas[nome] = (entradas[nome], assinatura(entradas[nome]))
+            return resolvidas[nome]
+        if nome not in self._etapas:
+            raise KeyError(f"Entrada ou etapa desconhecida: {nome!r}")
+
+        funcao, dependencias = self._etapas[nome]
+        resolvidos = [self._resolver(d, entradas, resolvidas) for d in dependencias]
+        assinaturas = tuple(a for _, a in resolvidos)
+        guardado = self._memoria.get(nome)
+        if guardado is not None and guardado[0] == assinaturas:
+            valor, versao = guardado[1], guardado[2]
+            contar("grafo.reaproveitadas")
+        else:
+            with etapa(f"grafo.{nome}"):
+                valor = funcao(*(v for v, _ in resolvidos))
+            contar("grafo.refeitas")
+            versao = guardado[2] + 1 if guardado is not None else 1
+            self._memoria[nome] = (assinaturas, valor, versao)
+            self.recalculadas.append(nome)
+        # Quem depende desta etapa compara a versão, não o conteúdo do resultado
+        resolvidas[nome] = (valor, ("etapa", nome, versao))
+        return resolvidas[nome]
+
+    def limpar(self):
+        self._memoria.clear()
+
+
+def grafo_hibrido():
+    """
+    Etapas da Planilha (regra híbrida):
+    vencimentos -> fatores TJMG até o corte -> juros até o corte -> fatores pós-lei
+    -> cronograma -> valores (centavos) / totais -> tabela formatada.
+    """
+    grafo = GrafoCalculo()
+
+    @grafo.etapa("parcela_revisada", "valor_emprestimo", "taxa_judicial", "prazo_meses", "antecipada")
+    def _parcela_revisada(valor_emprestimo, taxa_judicial, prazo_meses, antecipada):
+        return calcular_pmt_mensal(valor_emprestimo, taxa_judicial, prazo_meses, antecipada=antecipada)
+
+    @grafo.etapa("diferenca_base", "valor_parcela", "parcela_revisada")
+    def _diferenca_base(valor_parcela, parcela_revisada):
+        return valor_parcela - parcela_revisada
+
+    grafo.etapa("vencimentos", "prazo_meses", "data_inicio")(vencimentos_hibrido)
+
+    @grafo.etapa("fatores_tjmg", "tabela_tjmg", "vencimentos", "data_corte")
+    def _fatores_tjmg(tabela_tjmg, vencimentos, data_corte):
+        # Compartilhado entre sessões: mesmos vencimentos e corte dão os mesmos fatores
+        return memo("fatores_tjmg").obter(chave(tabela_tjmg, vencimentos[1], data_corte),
+                                          lambda: fatores_tjmg_ate_corte(tabela_tjmg, vencimentos[1], data_corte))
+
+    @grafo.etapa("juros_ate_corte", "vencimentos", "fatores_tjmg", "data_citacao", "data_corte")
+    def _juros(vencimentos, fatores_tjmg, data_citacao, data_corte):
+        return juros_ate_corte(vencimentos[1], fatores_tjmg[0], data_citacao, data_corte)
+
+    @grafo.etapa("indices_pos_lei", "registros_pos_lei")
+    def _indices(registros_pos_lei):
+        return None if registros_pos_lei is None else IndicesPosLei.de_registros(registros_pos_lei)
+
+    @grafo.etapa("fatores_pos_lei", "usar_fatores_exatos", "fator_ipca_exato", "fator_selic_exato",
+                 "indices_pos_lei", "pro_rata_diario", "data_calculo", "data_corte")
+    def _fatores_pos_lei(usar_fatores_exatos, fator_ipca_exato, fator_selic_exato, indices_pos_lei,
+                         pro_rata_diario, data_calculo, data_corte):
+        if usar_fatores_exatos:
+            return fator_ipca_exato, fator_selic_exato
+        if data_calculo > data_corte:
+            if pro_rata_diario:
+                return fatores_pos_lei_diarios(indices_pos_lei, data_corte, data_calculo)
+            return indices_pos_lei.fator(INICIO_POS_LEI, data_calculo)
+        return 1.0, 1.0
+
+    @grafo.etapa("cronograma", "vencimentos", "fatores_tjmg", "juros_ate_corte", "diferenca_base", "data_calculo",
+                 "data_corte", "fatores_pos_lei", "usar_fatores_exatos", "fator_ipca_exato", "parcelas_excluidas")
+    def _cronograma(vencimentos, fatores_tjmg, juros, diferenca_base, data_calculo, data_corte, fatores_pos_lei,
+                    usar_fatores_exatos, fator_ipca_exato, parcelas_excluidas):
+        fator_ipca_pos, fator_selic_pos = fatores_pos_lei
+        return montar_cronograma_hibrido(
+            *vencimentos, *fatores_tjmg, *juros, diferenca_base, data_calculo, data_corte,
+            fator_ipca_pos=fator_ipca_pos, fator_selic_pos=fator_selic_pos,
+            fator_ipca_parcelas_novas=fator_ipca_exato if usar_fatores_exatos else 1.0,
+            parcelas_excluidas=parcelas_excluidas,
+        )
+
+    @grafo.etapa("valores", "cronograma", "arredondamento", "valor_parcela", "parcela_revisada")
+    def _valores(cronograma, arredondamento, valor_parcela, parcela_revisada):
+        """(cronograma exibido, totais); em centavos quando há regra de arredondamento."""
+        if not arredondamento:
+            return cronograma, totalizar(cronograma)
+        centavos = cronograma_em_centavos(
+            cronograma, diferenca_centavos(valor_parcela, parcela_revisada, arredondamento), arredondamento)
+        return {**cronograma, **em_reais(centavos)}, {k: v / 100 for k, v in totalizar_centavos(centavos).items()}
+
+    @grafo.etapa("tabela", "valores")
+    def _tabela(valores):
+        return formatar_memoria(valores[0])
+
+    return grafo
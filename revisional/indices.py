@@ -0,0 +1,206 @@
+from datetime import date
+
+import numpy as np
+
+from revisional.medicao import contar
+
+# --- TABELA DE ÍNDICES INDEXADA POR MÊS ---
+# Os fatores ficam num vetor contíguo: a posição k corresponde ao mês
+# (inicio + k), onde o mês é o ordinal ano * 12 + (mês - 1).
+# Assim, a busca "fator do mês X" é um acesso direto ao vetor, sem varrer
+# o DataFrame com máscaras booleanas a cada parcela.
+
+
+def ordinal_mes(data):
+    """Converte uma data (date, datetime ou Timestamp) no ordinal do mês."""
+    return data.year * 12 + data.month - 1
+
+
+def data_do_ordinal(ordinal):
+    """Primeiro dia do mês correspondente ao ordinal."""
+    return date(ordinal // 12, ordinal % 12 + 1, 1)
+
+
+def ordinais_mes(datas):
+    """Versão vetorizada de ordinal_mes para listas/arrays de datas."""
+    meses = np.asarray(datas, dtype="datetime64[M]").astype(np.int64)
+    return meses + 1970 * 12
+
+
+class TabelaIndice:
+    """
+    Fatores acumulados de um índice mensal, prontos para busca em O(1).
+
+    Meses ausentes (lacunas na série) ficam como NaN e seguem as mesmas
+    regras de "linha não encontrada" dos scripts originais.
+    """
+
+    __slots__ = ("inicio", "acumulado", "multiplicador", "_acum_ffill")
+
+    def __init__(self, inicio, acumulado, multiplicador):
+        self.inicio = int(inicio)
+        self.acumulado = np.ascontiguousarray(acumulado, dtype=np.float64)
+        self.multiplicador = np.ascontiguousarray(multiplicador, dtype=np.float64)
+        # Sem cópias por processo (ex.: listas Python): os arrays podem ser o mmap
+        # do cache em disco, compartilhado entre os processos que leem a tabela.
+        # Último fator disponível até cada mês (cópia só quando há lacunas na série)
+        ffill = self.acumulado
+        if np.isnan(ffill).any():
+            ffill = ffill.copy()
+            for k in range(1, len(ffill)):
+                if ffill[k] != ffill[k]:
+                    ffill[k] = ffill[k - 1]
+        self._acum_ffill = ffill
+
+    # --- CONSTRUÇÃO ---
+    @classmethod
+    def _montar(cls, ordinais, acumulado, multiplicador):
+        ordinais = np.asarray(ordinais, dtype=np.int64)
+        if len(ordinais) == 0:
+            return cls(0, np.empty(0), np.empty(0))
+        # Mantém a primeira ocorrência de cada mês (como o .iloc[0] dos scripts)
+        _, primeiros = np.unique(ordinais, return_index=True)
+        primeiros.sort()
+        ordinais = ordinais[primeiros]
+        inicio = int(ordinais.min())
+        tamanho = int(ordinais.max()) - inicio + 1
+        acum = np.full(tamanho, np.nan)
+        mult = np.full(tamanho, np.nan)
+        acum[ordinais - inicio] = np.asarray(acumulado, dtype=np.float64)[primeiros]
+        mult[ordinais - inicio] = np.asarray(multiplicador, dtype=np.float64)[primeiros]
+        return cls(inicio, acum, mult)
+
+    @classmethod
+    def de_indices_mensais(cls, datas, indices_pct):
+        """Monta a tabela a partir de índices mensais em % (ex.: CSV_TJMG do app.py)."""
+        ordinais = ordinais_mes(datas)
+        ordem = np.argsort(ordinais, kind="stable")
+        multiplicador = 1 + np.asarray(indices_pct, dtype=np.float64)[ordem] / 100
+        return cls._montar(ordinais[ordem], np.cumprod(multiplicador), multiplicador)
+
+    @classmethod
+    def de_fatores_acumulados(cls, datas, fatores):
+        """Monta a tabela a partir de fatores já acumulados (ex.: CSV_TJMG do Planilha.py)."""
+        ordinais = ordinais_mes(datas)
+        ordem = np.argsort(ordinais, kind="stable")
+        acumulado = np.asarray(fatores, dtype=np.float64)[ordem]
+        multiplicador = np.empty_like(acumulado)
+        if len(acumulado):
+            multiplicador[0] = acumulado[0]
+            multiplicador[1:] = acumulado[1:] / acumulado[:-1]
+        return cls._montar(ordinais[ordem], acumulado, multiplicador)
+
+    @classmethod
+    def de_dataframe(cls, df):
+        """Monta a tabela a partir do DataFrame de carregar_tabela_interna / carregar_tabela_tjmg."""
+        if df.empty:
+            return cls._montar([], [], [])
+        ordinais = ordinais_mes(df["Data"].to_numpy())
+        if "Multiplicador" in df:
+            return cls._montar(ordinais, df["Fator_Acumulado"].to_numpy(), df["Multiplicador"].to_numpy())
+        return cls.de_fatores_acumulados(df["Data"].to_numpy(), df["Fator_Acumulado"].to_numpy())
+
+    # --- CONSULTAS ---
+    @property
+    def vazia(self):
+        return len(self.acumulado) == 0
+
+    @property
+    def data_inicial(self):
+        """Primeiro dia do primeiro mês da tabela."""
+        return data_do_ordinal(self.inicio)
+
+    @property
+    def fim(self):
+        """Ordinal do último mês da tabela."""
+        return self.inicio + len(self.acumulado) - 1
+
+    def fator_do_mes(self, ordinal, padrao=None):
+        """Fator acumulado do mês (ordinal) ou `padrao` se o mês não estiver na tabela."""
+        k = ordinal - self.inicio
+        if 0 <= k < len(self.acumulado):
+            valor = float(self.acumulado[k])
+            if valor == valor:
+                return valor
+        return padrao
+
+    def fator_correcao(self, data_vencimento, data_calculo):
+        """
+        Regra do app.py (índices mensais): Fator_DataCalculo / Fator_MesAnteriorAoVencimento.
+        Fallbacks: cálculo fora da tabela usa o último fator; vencimento antes do
+        início usa a base 1.0; vencimento após o fim usa o último fator (sem correção).
+        """
+        if self.vazia:
+            return 1.0
+        p_venc = ordinal_mes(data_vencimento)
+        p_calc = ordinal_mes(data_calculo)
+        if p_calc < p_venc:
+            return 1.0
+
+        fator_fim = self.fator_do_mes(p_calc)
+        if fator_fim is None:
+            fator_fim = float(self.acumulado[-1])
+
+        p_anterior = p_venc - 1
+        fator_inicio = self.fator_do_mes(p_anterior)
+        if fator_inicio is None:
+            if p_anterior < self.inicio:
+                fator_venc = self.fator_do_mes(p_venc)
+                fator_inicio = 1.0 if fator_venc is None else fator_venc / float(self.multiplicador[p_venc - self.inicio])
+            else:
+                fator_inicio = float(self._acum_ffill[min(p_anterior, self.fim) - self.inicio])
+
+        return fator_fim / fator_inicio
+
+    def fatores_correcao(self, ordinais_venc, ordinal_calc):
+        """Versão vetorizada de fator_correcao (ordinais de mês; ordinal_calc pode ser array)."""
+        ordinais_venc = np.asarray(ordinais_venc, dtype=np.int64)
+        ordinal_calc = np.asarray(ordinal_calc, dtype=np.int64)
+        contar("fatores.tjmg", ordinais_venc.size)
+        if self.vazia:
+            return np.ones(np.broadcast(ordinais_venc, ordinal_calc).shape)
+        n = len(self.acumulado)
+
+        k_calc = ordinal_calc - self.inicio
+        dentro = (k_calc >= 0) & (k_calc < n)
+        fim = self.acumulado[np.clip(k_calc, 0, n - 1)]
+        fim = np.where(dentro & ~np.isnan(fim), fim, self.acumulado[-1])
+
+        k_ant = ordinais_venc - 1 - self.inicio
+        inicio = self._acum_ffill[np.clip(k_ant, 0, n - 1)]
+        # Vencimento no primeiro mês da tabela (ou antes): fator do mês sem o próprio índice
+        k_venc = k_ant + 1
+        base = np.where(k_venc == 0, self.acumulado[0] / self.multiplicador[0], 1.0)
+        inicio = np.where(k_ant < 0, base, inicio)
+
+        return np.where(ordinal_calc < ordinais_venc, 1.0, fim / inicio)
+
+    def fator_ate_corte(self, data_vencimento, data_corte):
+        """
+        Regra do Planilha.py (fatores acumulados até a data de corte):
+        Fator_Vencimento / Fator_Corte, usando 1.0 para meses fora da tabela.
+        """
+        if self.vazia:
+            return 1.0
+        p_venc = ordinal_mes(data_vencimento)
+        p_corte = ordinal_mes(data_corte)
+        if p_venc > p_corte:
+            return 1.0
+        return self.fator_do_mes(p_venc, 1.0) / self.fator_do_mes(p_corte, 1.0)
+
+    def fatores_ate_corte(self, ordinais_venc, ordinal_corte):
+        """Versão vetorizada de fator_ate_corte."""
+        ordinais_venc = np.asarray(ordinais_venc, dtype=np.int64)
+        ordinal_corte = np.asarray(ordinal_corte, dtype=np.int64)
+        contar("fatores.tjmg", ordinais_venc.size)
+        if self.vazia:
+            return np.ones(np.broadcast(ordinais_venc, ordinal_corte).shape)
+        fator_venc = self._buscar(ordinais_venc, 1.0)
+        fator_corte = self._buscar(ordinal_corte, 1.0)
+        return np.where(ordinais_venc > ordinal_corte, 1.0, fator_venc / fator_corte)
+
+    def _buscar(self, ordinais, padrao):
+        n = len(self.acumulado)
+        k = ordinais - self.inicio
+        valores = self.acumulado[np.clip(k, 0, n - 1)]
+        return np.where((k >= 0) & (k < n) & ~np.isnan(valores), valores, padrao)
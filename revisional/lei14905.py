@@ -0,0 +1,123 @@
+from datetime import date
+
+import numpy as np
+
+from revisional.indices import TabelaIndice, ordinais_mes, ordinal_mes
+from revisional.medicao import contar
+
+# --- LEI 14.905/24: IPCA + (SELIC - IPCA) ---
+# DATA DE CORTE AJUSTADA PARA O ACÓRDÃO
+DATA_CORTE = date(2024, 8, 28)
+INICIO_POS_LEI = date(2024, 9, 1)
+
+
+class IndicesPosLei:
+    """
+    Produtos acumulados (prefixos) de IPCA e Selic por mês.
+
+    O fator de um intervalo de meses [ini, fim] é Prefixo[fim] / Prefixo[ini - 1]:
+    uma divisão por parcela, no lugar de filtrar a tabela e multiplicar linha a linha.
+    Meses fora da tabela (ou lacunas) contam como fator 1, como no filtro original.
+    """
+
+    __slots__ = ("ipca", "selic")
+
+    def __init__(self, tabela_ipca, tabela_selic):
+        self.ipca = tabela_ipca
+        self.selic = tabela_selic
+
+    @classmethod
+    def de_registros(cls, indices):
+        """Monta a partir de linhas no formato de INDICES_POS_LEI (ou do data_editor do Planilha.py)."""
+        linhas = [linha for linha in indices if linha["Mes"] is not None and linha["Mes"] == linha["Mes"]]
+        ordinais = ordinais_mes([linha["Mes"] for linha in linhas])
+        tabelas = []
+        for coluna in ("IPCA (%)", "Selic Meta (%)"):
+            if not linhas:
+                tabelas.append(TabelaIndice(0, np.empty(0), np.empty(0)))
+                continue
+            inicio = int(ordinais.min())
+            # Meses repetidos multiplicam (como no laço original); lacunas ficam com fator 1
+            mult = np.ones(int(ordinais.max()) - inicio + 1)
+            for k, linha in zip(ordinais - inicio, linhas):
+                mult[k] *= (1 + linha[coluna] / 100)
+            tabelas.append(TabelaIndice(inicio, np.cumprod(mult), mult))
+        return cls(*tabelas)
+
+    @classmethod
+    def do_registro(cls, registro=None):
+        """Usa as séries IPCA e SELIC do registro (por padrão, revisional.series.registro_padrao)."""
+        if registro is None:
+            from revisional.series import registro_padrao
+            registro = registro_padrao()
+        return cls(registro.tabela("IPCA"), registro.tabela("SELIC"))
+
+    @staticmethod
+    def _prefixo(tabela, ordinais):
+        if tabela.vazia:
+            return np.ones(np.shape(ordinais))
+        k = np.minimum(ordinais, tabela.fim) - tabela.inicio
+        return np.where(k >= 0, tabela.acumulado[np.maximum(k, 0)], 1.0)
+
+    def fatores(self, ordinais_ini, ordinais_fim):
+        """
+        Versão em lote: fatores (IPCA, Selic) de cada intervalo [ini, fim] de meses
+        (ordinais; arrays ou escalares, combinados por broadcasting).
+        """
+        ordinais_ini = np.asarray(ordinais_ini, dtype=np.int64)
+        ordinais_fim = np.asarray(ordinais_fim, dtype=np.int64)
+        vazio = ordinais_fim < ordinais_ini
+        contar("fatores.pos_lei", vazio.size)
+        resultado = []
+        for tabela in (self.ipca, self.selic):
+            fator = self._prefixo(tabela, ordinais_fim) / self._prefixo(tabela, ordinais_ini - 1)
+            resultado.append(np.where(vazio, 1.0, fator))
+        return tuple(resultado)
+
+    def fator(self, data_inicio_novo, data_fim_calculo):
+        """Fatores (IPCA, Selic) entre duas datas, como floats."""
+        fator_ipca, fator_selic = self.fatores(ordinal_mes(data_inicio_novo), ordinal_mes(data_fim_calculo))
+        return float(fator_ipca), float(fator_selic)
+
+    def taxas(self, ordinais_ini, ordinais_fim):
+        """Versão em lote: (fator IPCA, var. Selic %, var. IPCA %, juros Selic - IPCA %) por intervalo."""
+        fator_ipca, fator_selic = self.fatores(ordinais_ini, ordinais_fim)
+        return (fator_ipca, *taxa_selic_menos_ipca(fator_selic, fator_ipca))
+
+    def por_parcela(self, vencimentos, data_calculo, data_corte=DATA_CORTE):
+        """
+        Valores pós-lei de cada parcela de uma vez: parcelas vencidas até o corte
+        acumulam do mês seguinte ao corte até o cálculo; as demais ficam com fator 1.
+        Retorna (fator IPCA, var. Selic %, var. IPCA %, juros Selic - IPCA %).
+        """
+        vencimentos = np.asarray(vencimentos, dtype="datetime64[D]")
+        antes_corte = vencimentos <= np.datetime64(data_corte, "D")
+        ini = np.where(antes_corte, ordinal_mes(data_corte) + 1, ordinal_mes(data_calculo) + 1)
+        return self.taxas(ini, ordinal_mes(data_calculo))
+
+
+def fatores_pos_lei(indices, data_inicio_novo, data_fim_calculo):
+    """
+    Fatores acumulados (IPCA, Selic) dos meses da tabela entre data_inicio_novo
+    e data_fim_calculo (inclusive). `indices` segue o formato de INDICES_POS_LEI.
+    Para muitas consultas, monte IndicesPosLei uma vez e use fator/fatores.
+    """
+    return IndicesPosLei.de_registros(indices).fator(data_inicio_novo, data_fim_calculo)
+
+
+def taxa_selic_menos_ipca(fator_selic, fator_ipca):
+    """Variações acumuladas (%) e a taxa de juros reais Selic - IPCA, nunca negativa."""
+    var_selic_pct = (fator_selic - 1) * 100
+    var_ipca_pct = (fator_ipca - 1) * 100
+    if np.ndim(var_selic_pct) or np.ndim(var_ipca_pct):
+        juros_acumulados_pct = np.maximum(0.0, var_selic_pct - var_ipca_pct)
+    else:
+        juros_acumulados_pct = max(0, var_selic_pct - var_ipca_pct)
+    return var_selic_pct, var_ipca_pct, juros_acumulados_pct
+
+
+def calcular_juros_lei_nova(valor_corrigido_ipca, fator_selic, fator_ipca):
+    """Juros (Selic - IPCA) sobre o valor já corrigido pelo IPCA."""
+    var_selic_pct, var_ipca_pct, juros_acumulados_pct = taxa_selic_menos_ipca(fator_selic, fator_ipca)
+    valor_juros_reais = valor_corrigido_ipca * (juros_acumulados_pct / 100)
+    return valor_juros_reais, var_selic_pct, var_ipca_pct, juros_acumulados_pct
@@ -0,0 +1,344 @@
+"""
+Cálculo revisional em lote, sem Streamlit.
+
+Lê um arquivo de casos (CSV ou Parquet), calcula cada contrato em paralelo e
+grava os totais por caso e, opcionalmente, a memória de cálculo por parcela
+(CSV, XLSX ou Parquet, em fluxo: a memória não cresce com o número de linhas).
+
+Colunas do arquivo de entrada (mesmos dados da barra lateral):
+    valor_emprestimo, prazo_meses, taxa (judicial, mensal %), valor_parcela,
+    data_inicio, data_citacao, data_calculo
+Opcionais:
+    id, nome_cliente, parcelas_excluidas ("44, 45"), antecipada,
+    fator_ipca_exato, fator_selic_exato,
+    pro_rata_diario (Selic por dia útil e IPCA por dia corrido após o corte)
+
+Uso:
+    python -m revisional casos.csv -o totais.xlsx --detalhe parcelas.parquet
+    python -m revisional casos.csv -o totais.csv --relatorios relatorios/ --formato-relatorio pdf
+    python -m revisional casos.csv -o totais.csv --carteira carteira.xlsx
+    python -m revisional casos.csv -o totais.csv --tempos tempos.jsonl
+"""
+import argparse
+import itertools
+import json
+import os
+import re
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+from pathlib import Path
+
+import numpy as np
+
+from revisional.amortizacao import taxa_implicita
+from revisional.carteira import AgregadorCarteira
+from revisional.centavos import (
+    ARREDONDAMENTOS,
+    cronograma_em_centavos,
+    diferenca_centavos,
+    em_reais,
+    totalizar_centavos,
+)
+from revisional.colunar import TabelaColunar
+from revisional.cronograma import calcular_cronograma_hibrido, calcular_cronograma_tjmg, totalizar
+from revisional.diario import fatores_pos_lei_diarios
+from revisional.exportacao import FORMATOS, abrir_exportador
+from revisional.financeiro import calcular_pmt_mensal
+from revisional.lei14905 import DATA_CORTE, INICIO_POS_LEI, IndicesPosLei
+from revisional.medicao import etapa, iniciar, medir
+from revisional.relatorio import FORMATOS_RELATORIO, gerar_relatorio, informacoes_caso, resumo_totais
+from revisional.series import registro_padrao
+
+COLUNAS_OBRIGATORIAS = [
+    "valor_emprestimo", "prazo_meses", "taxa", "valor_parcela",
+    "data_inicio", "data_citacao", "data_calculo",
+]
+REGRAS = ("hibrida", "tjmg")
+# Colunas (e tipos) do resumo de cada caso, na ordem do resumo de calcular_caso
+ESQUEMA_RESUMO = {
+    "id": object, "nome_cliente": object, "ano_inicio": np.int16, "ano_citacao": np.int16,
+    "parcela_revisada": np.float64, "diferenca_base": np.float64, "parcelas_calculadas": np.int32,
+    "Principal": np.float64, "CM": np.float64, "Juros_1_pct": np.float64, "Juros_Selic": np.float64,
+    "Total": np.float64, "taxa_implicita": np.float64,
+}
+
+
+def _vazio(valor):
+    return valor is None or (isinstance(valor, float) and valor != valor)
+
+
+def ler_parcelas_excluidas(valor):
+    """Converte "44, 45" (ou um número isolado) na lista de parcelas excluídas."""
+    if _vazio(valor):
+        return []
+    if isinstance(valor, (int, float)):
+        return [int(valor)]
+    return [int(x.strip()) for x in str(valor).split(",") if x.strip().isdigit()]
+
+
+def ler_flag(valor):
+    if _vazio(valor):
+        return False
+    if isinstance(valor, str):
+        return valor.strip().lower() in ("1", "s", "sim", "true", "verdadeiro", "x")
+    return bool(valor)
+
+
+def calcular_caso(caso, regra="hibrida", arredondamento=None):
+    """
+    Calcula um contrato. Retorna (resumo com os totais, cronograma com as parcelas).
+    Com `arredondamento` (ver revisional.centavos), os valores são refeitos em
+    centavos inteiros, arredondados a cada passo, e devolvidos em reais.
+    """
+    parcela_revisada = calcular_pmt_mensal(
+        caso["valor_emprestimo"], caso["taxa"], caso["prazo_meses"], antecipada=caso["antecipada"]
+    )
+    diferenca_base = caso["valor_parcela"] - parcela_revisada
+
+    if regra == "tjmg":
+        cronograma = calcular_cronograma_tjmg(
+            registro_padrao().tabela("TJMG"), diferenca_base, caso["prazo_meses"],
+            caso["data_inicio"], caso["data_citacao"], caso["data_calculo"],
+        )
+    else:
+        usar_fatores_exatos = not _vazio(caso.get("fator_ipca_exato")) and not _vazio(caso.get("fator_selic_exato"))
+        if usar_fatores_exatos:
+            fator_ipca_pos, fator_selic_pos = caso["fator_ipca_exato"], caso["fator_selic_exato"]
+        elif caso["data_calculo"] > DATA_CORTE and caso.get("pro_rata_diario"):
+            fator_ipca_pos, fator_selic_pos = fatores_pos_lei_diarios(
+                IndicesPosLei.do_registro(), DATA_CORTE, caso["data_calculo"])
+        elif caso["data_calculo"] > DATA_CORTE:
+            fator_ipca_pos, fator_selic_pos = IndicesPosLei.do_registro().fator(INICIO_POS_LEI, caso["data_calculo"])
+        else:
+            fator_ipca_pos = fator_selic_pos = 1.0
+        cronograma = calcular_cronograma_hibrido(
+            registro_padrao().tabela("TJMG_FATORES"), diferenca_base, caso["prazo_meses"],
+            caso["data_inicio"], caso["data_citacao"], caso["data_calculo"], DATA_CORTE,
+            fator_ipca_pos=fator_ipca_pos, fator_selic_pos=fator_selic_pos,
+            fator_ipca_parcelas_novas=fator_ipca_pos if usar_fatores_exatos else 1.0,
+            parcelas_excluidas=caso["parcelas_excluidas"],
+        )
+
+    if arredondamento:
+        centavos = cronograma_em_centavos(
+            cronograma, diferenca_centavos(caso["valor_parcela"], parcela_revisada, arredondamento), arredondamento)
+        cronograma = {**cronograma, **em_reais(centavos)}
+        totais_centavos = totalizar_centavos(centavos)
+        totais = {k: v / 100 for k, v in totais_centavos.items()}
+        total = sum(totais_centavos.values()) / 100
+    else:
+        totais = totalizar(cronograma)
+        total = totais["Principal"] + totais["CM"] + totais["Juros_1_pct"] + totais["Juros_Selic"]
+    resumo = {
+        "id": caso["id"],
+        "nome_cliente": caso.get("nome_cliente", ""),
+        "ano_inicio": caso["data_inicio"].year,
+        "ano_citacao": caso["data_citacao"].year,
+        "parcela_revisada": parcela_revisada,
+        "diferenca_base": diferenca_base,
+        "parcelas_calculadas": int((~cronograma["excluida"]).sum()),
+        **totais,
+        "Total": total,
+    }
+    return resumo, cronograma
+
+
+def nome_relatorio(id_caso):
+    """Nome de arquivo seguro para o relatório de um caso."""
+    return re.sub(r"[^\w.-]+", "_", str(id_caso)).strip("._") or "caso"
+
+
+def calcular_bloco(tarefa):
+    """
+    Calcula um bloco de dividir_em_blocos (roda nos processos do pool).
+    Retorna (resumos, parcelas ou None, medição do bloco em dict; ver revisional.medicao),
+    com resumos e parcelas em TabelaColunar, preenchidas caso a caso.
+    """
+    casos, regra, detalhe, arredondamento, relatorios = tarefa
+    resumos = TabelaColunar(ESQUEMA_RESUMO, len(casos))
+    parcelas = None
+    with medir() as medicao:
+        # Taxa embutida na parcela cobrada, de uma vez para o bloco todo
+        with etapa("lote.taxa_implicita"):
+            taxas_implicitas = taxa_implicita(*([c[k] for c in casos] for k in
+                                                ("valor_emprestimo", "valor_parcela", "prazo_meses", "antecipada")))
+        for caso, taxa_implicita_caso in zip(casos, taxas_implicitas.tolist()):
+            with etapa("lote.caso"):
+                resumo, cronograma = calcular_caso(caso, regra, arredondamento)
+            resumo["taxa_implicita"] = taxa_implicita_caso
+            resumos.acrescentar(resumo, 1)
+            if relatorios:
+                pasta, formato = relatorios
+                gerar_relatorio(Path(pasta) / f"{nome_relatorio(caso['id'])}.{formato}", cronograma,
+                                informacoes_caso(caso, resumo["parcela_revisada"]), resumo_totais(resumo), formato)
+            if detalhe:
+                if parcelas is None:
+                    # Uma alocação para o bloco: cada cronograma tem no máximo prazo_meses parcelas
+                    esquema = {k: v.dtype for k, v in cronograma.items() if isinstance(v, np.ndarray)}
+                    parcelas = TabelaColunar({"id": object, **esquema}, sum(c["prazo_meses"] for c in casos))
+                parcelas.acrescentar({"id": caso["id"], **cronograma}, len(cronograma["parcela"]))
+    return resumos, parcelas, medicao.como_dict()
+
+
+def ler_casos(caminho):
+    """
+    Lê o arquivo de casos (caminho ou arquivo aberto com .name, como o upload do
+    Streamlit) e devolve uma lista de dicts com tipos Python simples.
+    """
+    import pandas as pd
+
+    nome = Path(getattr(caminho, "name", caminho))
+    df = pd.read_parquet(caminho) if nome.suffix == ".parquet" else pd.read_csv(caminho)
+    faltando = [c for c in COLUNAS_OBRIGATORIAS if c not in df.columns]
+    if faltando:
+        raise ValueError(f"Colunas obrigatórias ausentes em {nome}: {', '.join(faltando)}")
+
+    for coluna in ("data_inicio", "data_citacao", "data_calculo"):
+        # Aceita ISO (2020-07-16) ou o formato brasileiro (16/07/2020)
+        brasileiro = df[coluna].astype(str).str.contains("/").any()
+        df[coluna] = pd.to_datetime(df[coluna], format="%d/%m/%Y" if brasileiro else None).dt.date
+    if "id" not in df.columns:
+        df["id"] = range(1, len(df) + 1)
+
+    casos = []
+    for caso in df.to_dict("records"):
+        caso["prazo_meses"] = int(caso["prazo_meses"])
+        caso["parcelas_excluidas"] = ler_parcelas_excluidas(caso.get("parcelas_excluidas"))
+        caso["antecipada"] = ler_flag(caso.get("antecipada"))
+        caso["pro_rata_diario"] = ler_flag(caso.get("pro_rata_diario"))
+        if "nome_cliente" in caso:
+            # Célula vazia chega como NaN do pandas: vira "" (como a coluna ausente)
+            caso["nome_cliente"] = "" if _vazio(caso["nome_cliente"]) else str(caso["nome_cliente"])
+        casos.append(caso)
+    return casos
+
+
+def dividir_em_blocos(casos, regra, detalhe, arredondamento, relatorios, tamanho_bloco):
+    """Tarefas de até `tamanho_bloco` casos para calcular_bloco."""
+    for i in range(0, len(casos), tamanho_bloco):
+        yield casos[i:i + tamanho_bloco], regra, detalhe, arredondamento, relatorios
+
+
+def iterar_lote(casos, regra="hibrida", detalhe=False, processos=None, tamanho_bloco=200, arredondamento=None,
+                relatorios=None):
+    """
+    Calcula os casos em blocos e entrega (resumos, parcelas, medição) de cada bloco, na
+    ordem de entrada, assim que fica pronto. Só alguns blocos ficam em voo por
+    processo, de modo que a memória não cresce com o tamanho do lote.
+    Com `relatorios` = (pasta, "pdf" | "html"), cada processo grava o relatório
+    de cada caso (regra híbrida) na pasta.
+    """
+    blocos = dividir_em_blocos(casos, regra, detalhe, arredondamento, relatorios, tamanho_bloco)
+    if processos == 1 or len(casos) <= tamanho_bloco:
+        yield from map(calcular_bloco, blocos)
+        return
+    em_voo = 2 * (processos or os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=processos) as executor:
+        pendentes = deque()
+        for bloco in blocos:
+            pendentes.append(executor.submit(calcular_bloco, bloco))
+            if len(pendentes) >= em_voo:
+                yield pendentes.popleft().result()
+        while pendentes:
+            yield pendentes.popleft().result()
+
+
+def calcular_lote(casos, regra="hibrida", detalhe=False, processos=None, tamanho_bloco=200, arredondamento=None,
+                  relatorios=None):
+    """
+    Calcula todos os casos, distribuindo blocos entre processos.
+    Retorna (resumos, parcelas) em TabelaColunar, na ordem de entrada (parcelas: None sem `detalhe`).
+    """
+    resumos, parcelas = [], []
+    for resumos_bloco, parcelas_bloco, _ in iterar_lote(casos, regra, detalhe, processos, tamanho_bloco,
+                                                        arredondamento, relatorios):
+        resumos.append(resumos_bloco)
+        parcelas.append(parcelas_bloco)
+    return TabelaColunar.juntar(resumos), TabelaColunar.juntar(parcelas)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m revisional",
+        description="Cálculo revisional em lote (TJMG + 1% a.m. / Lei 14.905), sem Streamlit.",
+    )
+    parser.add_argument("entrada", help="arquivo de casos (.csv ou .parquet)")
+    parser.add_argument("-o", "--saida", required=True,
+                        help=f"arquivo de totais por caso ({', '.join('.' + f for f in FORMATOS)})")
+    parser.add_argument("--detalhe",
+                        help="arquivo com a memória de cálculo por parcela, gravado em fluxo (mesmos formatos)")
+    parser.add_argument("--regra", choices=REGRAS, default="hibrida",
+                        help="hibrida: Planilha.py (padrão); tjmg: app.py (TJMG + 1%% a.m.)")
+    parser.add_argument("--centavos", choices=ARREDONDAMENTOS, metavar="ARREDONDAMENTO",
+                        help="calcula em centavos inteiros, arredondando cada passo "
+                             f"({', '.join(ARREDONDAMENTOS)})")
+    parser.add_argument("--carteira", metavar="ARQUIVO",
+                        help="totais e distribuições por cliente, ano de início e ano de citação "
+                             "(mesmos formatos)")
+    parser.add_argument("--relatorios", metavar="PASTA",
+                        help="grava o relatório de cada caso nesta pasta (<id>.pdf ou <id>.html; só regra híbrida)")
+    parser.add_argument("--formato-relatorio", choices=FORMATOS_RELATORIO, default="pdf",
+                        help="formato dos relatórios (padrão: pdf)")
+    parser.add_argument("--tempos", metavar="ARQUIVO",
+                        help="tempos por etapa e contadores em JSON, uma linha por bloco e uma de total "
+                             "(- para a saída de erros)")
+    parser.add_argument("--processos", type=int, default=os.cpu_count(), help="processos em paralelo")
+    parser.add_argument("--bloco", type=int, default=200, help="casos por tarefa enviada a cada processo")
+    args = parser.parse_args(argv)
+    if args.relatorios and args.regra != "hibrida":
+        parser.error("--relatorios usa o layout da Planilha e requer --regra hibrida")
+
+    # Etapas do processo principal (leitura, espera pelos blocos, gravação); as dos blocos chegam com eles
+    medicao = iniciar()
+    try:
+        with etapa("lote.leitura"):
+            casos = ler_casos(args.entrada)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+
+    relatorios = None
+    if args.relatorios:
+        Path(args.relatorios).mkdir(parents=True, exist_ok=True)
+        relatorios = (args.relatorios, args.formato_relatorio)
+
+    # Resumos e parcelas vão para os arquivos bloco a bloco, à medida que são calculados
+    n_casos = 0
+    carteira = AgregadorCarteira() if args.carteira else None
+    with ExitStack() as pilha:
+        saida = pilha.enter_context(abrir_exportador(args.saida))
+        detalhe = pilha.enter_context(abrir_exportador(args.detalhe)) if args.detalhe else None
+        tempos = None
+        if args.tempos:
+            tempos = sys.stderr if args.tempos == "-" else pilha.enter_context(open(args.tempos, "w"))
+        blocos = iterar_lote(casos, args.regra, detalhe is not None, args.processos, args.bloco, args.centavos,
+                             relatorios)
+        for numero in itertools.count():
+            with etapa("lote.espera"):
+                bloco = next(blocos, None)
+            if bloco is None:
+                break
+            resumos, parcelas, medicao_bloco = bloco
+            medicao.juntar(medicao_bloco)
+            with etapa("lote.gravacao"):
+                if resumos.tamanho:
+                    saida.escrever(resumos)
+                    if carteira is not None:
+                        carteira.adicionar(resumos)
+                    n_casos += resumos.tamanho
+                if parcelas is not None and parcelas.tamanho:
+                    detalhe.escrever(parcelas)
+            if tempos is not None:
+                print(json.dumps({"bloco": numero, "casos": resumos.tamanho, **medicao_bloco}), file=tempos)
+        if carteira is not None and carteira.contratos:
+            with etapa("lote.carteira"), abrir_exportador(args.carteira) as arquivo:
+                arquivo.escrever(carteira.tabelas())
+        if tempos is not None:
+            print(json.dumps({"total": True, "casos": n_casos, "processos": args.processos,
+                              "decorrido_ms": medicao.decorrido_ms, **medicao.como_dict()}), file=tempos)
+    print(f"{n_casos} casos calculados -> {args.saida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+# --- MEDIÇÃO DAS ETAPAS ---
+# Tempo de cada etapa do cálculo e contadores (consultas de fatores, acertos do
+# cache, etapas do grafo refeitas ou reaproveitadas), baratos o bastante para
+# ficarem sempre ligados: cada registro é um perf_counter_ns e uma soma num dict.
+#
+# Cada execução (rerun do Streamlit, bloco do lote) abre a sua Medicao; o que é
+# registrado vai para a medição corrente (ContextVar: cada thread ou sessão
+# enxerga só a sua) e para os totais do processo. Etapas aninhadas contam o
+# tempo inclusivo (a etapa de fora inclui o das de dentro).
+#
+# $REVISIONAL_MEDICAO=0 desliga os registros.
+
+ATIVA = os.environ.get("REVISIONAL_MEDICAO", "1") != "0"
+
+
+class Medicao:
+    """Tempos (chamadas e nanossegundos por etapa) e contadores de uma execução."""
+
+    def __init__(self):
+        self.etapas = {}
+        self.contadores = {}
+        self.inicio = time.perf_counter_ns()
+        self._trava = threading.Lock()
+
+    def registrar(self, nome, nanossegundos, chamadas=1):
+        with self._trava:
+            acumulado = self.etapas.get(nome)
+            if acumulado is None:
+                self.etapas[nome] = [chamadas, nanossegundos]
+            else:
+                acumulado[0] += chamadas
+                acumulado[1] += nanossegundos
+
+    def contar(self, nome, quantidade=1):
+        with self._trava:
+            self.contadores[nome] = self.contadores.get(nome, 0) + quantidade
+
+    def juntar(self, dados):
+        """Soma uma medição em dict (como_dict de outro processo ou bloco)."""
+        for nome, etapa in dados["etapas"].items():
+            self.registrar(nome, round(etapa["ms"] * 1e6), etapa["chamadas"])
+        for nome, quantidade in dados["contadores"].items():
+            self.contar(nome, quantidade)
+
+    @property
+    def decorrido_ms(self):
+        return (time.perf_counter_ns() - self.inicio) / 1e6
+
+    def como_dict(self):
+        """Etapas e contadores em tipos simples (JSON ou pickle entre processos)."""
+        with self._trava:
+            return {
+                "etapas": {nome: {"chamadas": c, "ms": ns / 1e6} for nome, (c, ns) in self.etapas.items()},
+                "contadores": dict(self.contadores),
+            }
+
+    def tabela(self):
+        """Etapas em colunas, da mais demorada para a mais rápida."""
+        with self._trava:
+            linhas = sorted(self.etapas.items(), key=lambda item: -item[1][1])
+        return {
+            "etapa": [nome for nome, _ in linhas],
+            "chamadas": [c for _, (c, _) in linhas],
+            "total_ms": [ns / 1e6 for _, (_, ns) in linhas],
+            "media_ms": [ns / 1e6 / c for _, (c, ns) in linhas],
+        }
+
+
+_atual = ContextVar("revisional_medicao", default=None)
+_PROCESSO = Medicao()
+
+
+class _Etapa:
+    __slots__ = ("nome", "_inicio")
+
+    def __init__(self, nome):
+        self.nome = nome
+
+    def __enter__(self):
+        self._inicio = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *erro):
+        registrar(self.nome, time.perf_counter_ns() - self._inicio)
+
+    def __call__(self, funcao):
+        @wraps(funcao)
+        def medida(*args, **kwargs):
+            with _Etapa(self.nome):
+                return funcao(*args, **kwargs)
+        return medida
+
+
+def etapa(nome):
+    """Mede um bloco (`with etapa("nome"):`) ou, como decorador, cada chamada de uma função."""
+    return _Etapa(nome)
+
+
+def registrar(nome, nanossegundos):
+    if not ATIVA:
+        return
+    medicao = _atual.get()
+    if medicao is not None:
+        medicao.registrar(nome, nanossegundos)
+    _PROCESSO.registrar(nome, nanossegundos)
+
+
+def contar(nome, quantidade=1):
+    if not ATIVA:
+        return
+    medicao = _atual.get()
+    if medicao is not None:
+        medicao.contar(nome, quantidade)
+    _PROCESSO.contar(nome, quantidade)
+
+
+def iniciar():
+    """Nova Medicao corrente até o fim do contexto atual (ex.: um rerun do script do Streamlit)."""
+    medicao = Medicao()
+    _atual.set(medicao)
+    return medicao
+
+
+@contextmanager
+def medir():
+    """Medicao corrente só dentro do bloco `with` (restaura a anterior na saída)."""
+    medicao = Medicao()
+    token = _atual.set(medicao)
+    try:
+        yield medicao
+    finally:
+        _atual.reset(token)
+
+
+def totais_processo():
+    """Medição acumulada do processo desde que foi iniciado."""
+    return _PROCESSO
@@ -0,0 +1,148 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from revisional.medicao import contar
+
+# --- MEMOIZAÇÃO LRU COMPARTILHADA NO PROCESSO ---
+# Caches nomeados, thread-safe e com limite de entradas: o servidor do
+# Streamlit atende todas as sessões no mesmo processo, então contratos e
+# vetores de fatores já calculados para um usuário servem aos demais.
+# Os resultados guardados são congelados (arrays somente leitura), porque
+# passam a ser compartilhados entre sessões.
+#
+# Limite padrão por cache: $REVISIONAL_MEMO_TAMANHO (0 desativa a memoização).
+
+TAMANHO_PADRAO = 1024
+
+
+def tamanho_configurado(padrao=TAMANHO_PADRAO):
+    valor = os.environ.get("REVISIONAL_MEMO_TAMANHO")
+    return int(valor) if valor not in (None, "") else padrao
+
+
+def chave(*partes):
+    """Chave hasheável para entradas quaisquer (arrays entram pelo conteúdo)."""
+    return tuple(map(assinatura, partes))
+
+
+def assinatura(valor):
+    """Representação comparável e hasheável de um valor (objetos não hasheáveis entram pela identidade)."""
+    if isinstance(valor, np.ndarray):
+        return ("ndarray", valor.dtype.str, valor.shape, hashlib.blake2b(valor.tobytes(), digest_size=16).digest())
+    if isinstance(valor, (list, tuple)):
+        return tuple(map(assinatura, valor))
+    if isinstance(valor, dict):
+        return tuple((k, assinatura(v)) for k, v in valor.items())
+    try:
+        hash(valor)
+    except TypeError:
+        return ("id", id(valor))
+    # Objetos hasheáveis (ex.: TabelaIndice) entram na chave e ficam vivos enquanto ela existir
+    return valor
+
+
+def congelar(valor):
+    """Marca como somente leitura os arrays de um resultado (dicts, tuplas e listas)."""
+    if isinstance(valor, np.ndarray):
+        valor.flags.writeable = False
+    elif isinstance(valor, dict):
+        for v in valor.values():
+            congelar(v)
+    elif isinstance(valor, (list, tuple)):
+        for v in valor:
+            congelar(v)
+    return valor
+
+
+class MemoLRU:
+    """Cache LRU thread-safe com contadores de acertos, falhas e descartes."""
+
+    def __init__(self, nome, tamanho_maximo=None):
+        self.nome = nome
+        self.tamanho_maximo = tamanho_configurado() if tamanho_maximo is None else int(tamanho_maximo)
+        self._dados = OrderedDict()
+        self._trava = threading.Lock()
+        self.acertos = self.falhas = self.descartes = 0
+        self._contador_acertos = f"memo.{nome}.acertos"
+        self._contador_falhas = f"memo.{nome}.falhas"
+
+    def obter(self, chave, calcular):
+        """
+        Valor guardado para `chave` ou calcular(), que é guardado em seguida.
+        O cálculo roda fora da trava: duas threads com a mesma chave nova podem
+        calcular em paralelo, e a segunda apenas sobrescreve um valor igual.
+        """
+        with self._trava:
+            if chave in self._dados:
+                self._dados.move_to_end(chave)
+                self.acertos += 1
+                contar(self._contador_acertos)
+                return self._dados[chave]
+            self.falhas += 1
+        contar(self._contador_falhas)
+        valor = congelar(calcular())
+        if self.tamanho_maximo > 0:
+            with self._trava:
+                self._dados[chave] = valor
+                self._dados.move_to_end(chave)
+                while len(self._dados) > self.tamanho_maximo:
+                    self._dados.popitem(last=False)
+                    self.descartes += 1
+        return valor
+
+    def redimensionar(self, tamanho_maximo):
+        with self._trava:
+            self.tamanho_maximo = int(tamanho_maximo)
+            while len(self._dados) > max(self.tamanho_maximo, 0):
+                self._dados.popitem(last=False)
+                self.descartes += 1
+
+    def limpar(self):
+        with self._trava:
+            self._dados.clear()
+            self.acertos = self.falhas = self.descartes = 0
+
+    def __len__(self):
+        return len(self._dados)
+
+    def estatisticas(self):
+        with self._trava:
+            consultas = self.acertos + self.falhas
+            return {
+                "cache": self.nome,
+                "entradas": len(self._dados),
+                "limite": self.tamanho_maximo,
+                "acertos": self.acertos,
+                "falhas": self.falhas,
+                "descartes": self.descartes,
+                "taxa_acerto": self.acertos / consultas if consultas else 0.0,
+            }
+
+
+_CACHES = {}
+_TRAVA_REGISTRO = threading.Lock()
+
+
+def memo(nome, tamanho_maximo=None):
+    """Cache nomeado do processo (criado no primeiro uso)."""
+    with _TRAVA_REGISTRO:
+        if nome not in _CACHES:
+            _CACHES[nome] = MemoLRU(nome, tamanho_maximo)
+        return _CACHES[nome]
+
+
+def estatisticas():
+    """Contadores de todos os caches do processo."""
+    with _TRAVA_REGISTRO:
+        caches = list(_CACHES.values())
+    return [c.estatisticas() for c in caches]
+
+
+def memorizar(nome, funcao, *args, **kwargs):
+    """funcao(*args, **kwargs) pelo cache `nome`, com a chave tirada da função e das entradas."""
+    return memo(nome).obter(chave(funcao.__module__, funcao.__qualname__, args, kwargs),
+                            lambda: funcao(*args, **kwargs))
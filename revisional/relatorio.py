@@ -0,0 +1,411 @@
+import html
+import io
+import math
+import unicodedata
+from pathlib import Path
+from string import Template
+
+import numpy as np
+
+from revisional.formatacao import COLUNAS_MEMORIA, fmt_br, fmt_data, fmt_moeda, formatar_memoria
+from revisional.medicao import etapa
+
+# --- RELATÓRIO DA MEMÓRIA DE CÁLCULO (HTML E PDF) ---
+# O relatório é escrito em fluxo, bloco a bloco de linhas já formatadas
+# (formatar_memoria sobre fatias do cronograma): nenhum DataFrame.to_html nem
+# string com a tabela inteira. O PDF é gerado no servidor, sem rede e sem
+# dependências, com as fontes padrão do PDF (Helvetica, WinAnsiEncoding),
+# paginado e com o cabeçalho da tabela repetido em cada página.
+
+TITULO = "Relatório de Cálculo Revisional"
+REGRA_HIBRIDA = "Regra: TJMG + 1% a.m. até 28/08/2024 | IPCA + (Selic - IPCA) após 29/08/2024 (Lei 14.905/24)"
+FORMATOS_RELATORIO = ("html", "pdf")
+LINHAS_POR_BLOCO = 500
+
+
+def _texto(valor, formatador=fmt_moeda):
+    return formatador(valor).item()
+
+
+def _data(valor):
+    return fmt_data(np.array([valor], dtype="datetime64[D]"))[0]
+
+
+def informacoes_caso(caso, parcela_revisada):
+    """Parâmetros da liquidação (pares rótulo/valor) a partir de um caso no formato do lote."""
+    nome = caso.get("nome_cliente")
+    informacoes = [("Cliente", str(nome))] if nome and nome == nome else []  # nome == nome descarta NaN
+    informacoes += [
+        ("Valor Financiado", _texto(caso["valor_emprestimo"])),
+        ("Prazo do Contrato", f"{caso['prazo_meses']} meses"),
+        ("Data da Citação", _data(caso["data_citacao"])),
+        ("Atualizado até", _data(caso["data_calculo"])),
+        ("Parcela do Contrato", _texto(caso["valor_parcela"])),
+        (f"Parcela Judicial ({_texto(caso['taxa'], fmt_br)}% a.m.)", _texto(parcela_revisada)),
+        ("Indébito Mensal (Diferença)", _texto(caso["valor_parcela"] - parcela_revisada)),
+    ]
+    return informacoes
+
+
+def resumo_totais(totais):
+    """Resumo da condenação (pares rótulo/valor) a partir dos totais de totalizar()."""
+    total = totais["Principal"] + totais["CM"] + totais["Juros_1_pct"] + totais["Juros_Selic"]
+    return [
+        ("Principal Original", _texto(totais["Principal"])),
+        ("Correção (TJMG+IPCA)", _texto(totais["CM"])),
+        ("Juros Mora (1% a.m.)", _texto(totais["Juros_1_pct"])),
+        ("Juros (Selic - IPCA)", _texto(totais["Juros_Selic"])),
+        ("TOTAL FINAL", _texto(total)),
+    ]
+
+
+def blocos_memoria(cronograma, linhas_por_bloco=LINHAS_POR_BLOCO):
+    """Linhas formatadas da memória de cálculo, um bloco por vez."""
+    n = len(cronograma["parcela"])
+    for inicio in range(0, n, linhas_por_bloco):
+        yield formatar_memoria(cronograma, slice(inicio, inicio + linhas_por_bloco))
+
+
+class _Saida:
+    """Caminho ou arquivo binário aberto (ex.: io.BytesIO), fechado só se foi aberto aqui."""
+
+    def __init__(self, destino):
+        self._proprio = not hasattr(destino, "write")
+        self.arquivo = open(destino, "wb") if self._proprio else destino
+
+    def __enter__(self):
+        return self.arquivo
+
+    def __exit__(self, *erro):
+        if self._proprio:
+            self.arquivo.close()
+        return False
+
+
+# --- HTML ---
+_INICIO_HTML = Template("""<!DOCTYPE html>
+<html lang="pt-BR">
+<head>
+<meta charset="utf-8">
+<title>$titulo</title>
+<style>
+@page { size: A4 landscape; margin: 12mm; }
+body { font-family: 'Source Sans Pro', Arial, sans-serif; color: #1f2937; margin: 24px; }
+h1 { font-size: 20px; margin: 0 0 4px 0; }
+.regra { font-size: 12px; margin: 0 0 16px 0; }
+.info, .resumo { background-color: #f8f9fa; border-left: 4px solid #1f77b4; padding: 10px 15px; border-radius: 5px;
+    margin-bottom: 16px; font-size: 12px; }
+.info span, .resumo span { display: inline-block; margin-right: 24px; }
+.resumo { border-left-color: #2e7d32; page-break-inside: avoid; }
+table { width: 100%; border-collapse: collapse; font-size: 11px; text-align: center; margin-bottom: 16px; }
+thead { display: table-header-group; }
+tr { page-break-inside: avoid; }
+th { background-color: #f0f2f6; border: 1px solid #dcdcdc; padding: 6px; }
+td { border: 1px solid #dcdcdc; padding: 4px; }
+</style>
+</head>
+<body>
+<h1>$titulo</h1>
+<p class="regra">$subtitulo</p>
+<div class="info">$informacoes</div>
+<h3>Memória de Cálculo Parcelada</h3>
+<table>
+<thead><tr>$colunas</tr></thead>
+<tbody>
+""")
+_FIM_HTML = Template("""</tbody>
+</table>
+<h3>Resumo da Condenação a Executar</h3>
+<div class="resumo">$resumo</div>
+</body>
+</html>
+""")
+
+
+def _pares_html(pares):
+    return "".join(f"<span><strong>{html.escape(r)}:</strong> {html.escape(v)}</span>" for r, v in pares)
+
+
+def _escapar_coluna(valores):
+    # Um único escape para a coluna inteira ("\n" nunca aparece nos valores formatados)
+    return html.escape("\n".join(map(str, valores))).split("\n")
+
+
+def relatorio_html(destino, blocos, informacoes=(), resumo=(), titulo=TITULO, subtitulo=REGRA_HIBRIDA,
+                   colunas=COLUNAS_MEMORIA):
+    """Escreve o relatório HTML em `destino` (caminho ou arquivo binário), bloco a bloco."""
+    with _Saida(destino) as binario:
+        saida = io.TextIOWrapper(binario, encoding="utf-8", newline="\n", write_through=True)
+        saida.write(_INICIO_HTML.substitute(
+            titulo=html.escape(titulo), subtitulo=html.escape(subtitulo), informacoes=_pares_html(informacoes),
+            colunas="".join(f"<th>{html.escape(c)}</th>" for c in colunas)))
+        for bloco in blocos:
+            celulas = [_escapar_coluna(bloco[c]) for c in colunas]
+            saida.writelines("<tr>" + "".join(f"<td>{v}</td>" for v in linha) + "</tr>\n" for linha in zip(*celulas))
+        saida.write(_FIM_HTML.substitute(resumo=_pares_html(resumo)))
+        saida.flush()
+        saida.detach()
+
+
+# --- PDF ---
+# Larguras (1/1000 em) da Helvetica e da Helvetica-Bold para ASCII 32..126 (AFM da Adobe)
+_LARGURAS = {
+    "F1": [278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333, 278, 278,
+           556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 278, 278, 584, 584, 584, 556,
+           1015, 667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833, 722, 778,
+           667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 278, 278, 278, 469, 556,
+           333, 556, 556, 500, 556, 556, 278, 556, 556, 222, 222, 500, 222, 833, 556, 556,
+           556, 556, 333, 500, 278, 556, 500, 722, 500, 500, 500, 334, 260, 334, 584],
+    "F2": [278, 333, 474, 556, 556, 889, 722, 238, 333, 333, 389, 584, 278, 333, 278, 278,
+           556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 333, 333, 584, 584, 584, 611,
+           975, 722, 722, 722, 722, 667, 611, 778, 722, 278, 556, 722, 611, 833, 722, 778,
+           667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 333, 278, 333, 584, 556,
+           333, 556, 611, 556, 611, 556, 333, 611, 611, 278, 278, 556, 278, 889, 611, 611,
+           611, 611, 389, 556, 333, 611, 556, 778, 556, 556, 500, 389, 280, 389, 584],
+}
+_LARGURAS_EXTRAS = {"º": 365, "ª": 370, "°": 400}
+
+A4_PAISAGEM = (842, 595)
+MARGEM = 36
+FONTE = 7.0
+FONTE_MINIMA = 5.0
+RESPIRO = 6
+
+
+def _largura(texto, fonte, tamanho):
+    tabela = _LARGURAS[fonte]
+    total = 0
+    for c in texto:
+        if c in _LARGURAS_EXTRAS:
+            total += _LARGURAS_EXTRAS[c]
+            continue
+        base = unicodedata.normalize("NFD", c)[0]
+        total += tabela[ord(base) - 32] if 32 <= ord(base) <= 126 else 556
+    return total * tamanho / 1000
+
+
+def _pdf_texto(texto):
+    bruto = texto.encode("cp1252", errors="replace")
+    return bruto.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+
+
+def _quebrar(texto, largura, fonte, tamanho):
+    linhas, atual = [], ""
+    for palavra in texto.split():
+        candidato = f"{atual} {palavra}".strip()
+        if atual and _largura(candidato, fonte, tamanho) > largura:
+            linhas.append(atual)
+            atual = palavra
+        else:
+            atual = candidato
+    return linhas + [atual]
+
+
+class _EscritorPDF:
+    """PDF 1.4 gravado objeto a objeto; só os offsets e os ids das páginas ficam em memória."""
+
+    def __init__(self, arquivo):
+        self.arquivo = arquivo
+        self.offsets = {}
+        self.proximo = 1
+        self.posicao = 0
+        self._gravar(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+
+    def _gravar(self, dados):
+        self.arquivo.write(dados)
+        self.posicao += len(dados)
+
+    def reservar(self):
+        numero = self.proximo
+        self.proximo += 1
+        return numero
+
+    def objeto(self, numero, corpo, fluxo=None):
+        self.offsets[numero] = self.posicao
+        if fluxo is not None:
+            corpo = corpo[:-2].rstrip() + f" /Length {len(fluxo)} >>".encode()
+            self._gravar(b"%d 0 obj\n%s\nstream\n%s\nendstream\nendobj\n" % (numero, corpo, fluxo))
+        else:
+            self._gravar(b"%d 0 obj\n%s\nendobj\n" % (numero, corpo))
+
+    def fechar(self, raiz):
+        inicio_xref = self.posicao
+        linhas = [b"xref\n0 %d\n0000000000 65535 f \n" % self.proximo]
+        linhas += [b"%010d 00000 n \n" % self.offsets[k] for k in range(1, self.proximo)]
+        self._gravar(b"".join(linhas))
+        self._gravar(b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+                     % (self.proximo, raiz, inicio_xref))
+
+
+class _PaginasPDF:
+    def __init__(self, arquivo, titulo, colunas, larguras, tamanho):
+        self.pdf = _EscritorPDF(arquivo)
+        self.raiz, self.paginas, self.total = (self.pdf.reservar() for _ in range(3))
+        self.fontes = {"F1": self.pdf.reservar(), "F2": self.pdf.reservar()}
+        self.ids_paginas = []
+        self.titulo = titulo
+        self.colunas = colunas
+        self.larguras = larguras
+        self.tamanho = tamanho
+        self.altura_linha = tamanho * 2
+        self.cabecalhos = [_quebrar(c, w - RESPIRO, "F2", tamanho) for c, w in zip(colunas, larguras)]
+        self.altura_cabecalho = self.altura_linha * max(map(len, self.cabecalhos)) * 0.75 + tamanho
+        self.fluxo = None
+        self.y = 0
+
+    # Comandos de desenho da página corrente
+    def texto(self, x, y, texto, fonte="F1", tamanho=None):
+        tamanho = tamanho or self.tamanho
+        self.fluxo.append(b"BT /%s %.2f Tf %.2f %.2f Td (%s) Tj ET" % (
+            fonte.encode(), tamanho, x, y, _pdf_texto(texto)))
+
+    def centralizado(self, x, largura, y, texto, fonte="F1"):
+        self.texto(x + (largura - _largura(texto, fonte, self.tamanho)) / 2, y, texto, fonte)
+
+    def nova_pagina(self):
+        self.fechar_pagina()
+        self.fluxo = [b"0.5 w 0.86 0.86 0.86 RG"]
+        largura, altura = A4_PAISAGEM
+        numero = len(self.ids_paginas) + 1
+        rodape = f"{self.titulo} - Página {numero} de "
+        self.texto(MARGEM, MARGEM / 2, rodape, tamanho=7)
+        self.fluxo.append(b"q 1 0 0 1 %.2f %.2f cm /Tot Do Q" % (MARGEM + _largura(rodape, "F1", 7), MARGEM / 2))
+        self.y = altura - MARGEM
+
+    def cabecalho_tabela(self):
+        x = MARGEM
+        largura_total = sum(self.larguras)
+        self.y -= self.altura_cabecalho
+        self.fluxo.append(b"0.94 0.95 0.96 rg %.2f %.2f %.2f %.2f re f 0 g"
+                          % (MARGEM, self.y, largura_total, self.altura_cabecalho))
+        for linhas, largura in zip(self.cabecalhos, self.larguras):
+            self.fluxo.append(b"%.2f %.2f %.2f %.2f re S" % (x, self.y, largura, self.altura_cabecalho))
+            topo = self.y + self.altura_cabecalho / 2 + (len(linhas) - 1) * self.tamanho * 0.6 - self.tamanho / 3
+            for k, linha in enumerate(linhas):
+                self.centralizado(x, largura, topo - k * self.tamanho * 1.2, linha, "F2")
+            x += largura
+
+    def linha_tabela(self, valores):
+        if self.y - self.altura_linha < MARGEM:
+            self.nova_pagina()
+            self.cabecalho_tabela()
+        self.y -= self.altura_linha
+        x = MARGEM
+        base = self.y + self.altura_linha / 2 - self.tamanho / 3
+        for valor, largura in zip(valores, self.larguras):
+            self.fluxo.append(b"%.2f %.2f %.2f %.2f re S" % (x, self.y, largura, self.altura_linha))
+            self.centralizado(x, largura, base, valor)
+            x += largura
+
+    def pares(self, titulo, pares):
+        """Bloco de rótulos e valores (parâmetros ou resumo), em quatro colunas."""
+        altura = 14 + 11 * math.ceil(len(pares) / 4) + 8
+        if self.y - altura < MARGEM:
+            self.nova_pagina()
+        self.y -= 14
+        self.texto(MARGEM, self.y, titulo, "F2", 10)
+        coluna = (A4_PAISAGEM[0] - 2 * MARGEM) / 4
+        for k, (rotulo, valor) in enumerate(pares):
+            if k % 4 == 0:
+                self.y -= 11
+            self.texto(MARGEM + (k % 4) * coluna, self.y, f"{rotulo}: ", "F2", 8)
+            self.texto(MARGEM + (k % 4) * coluna + _largura(f"{rotulo}: ", "F2", 8), self.y, valor, "F1", 8)
+        self.y -= 8
+
+    def fechar_pagina(self):
+        if self.fluxo is None:
+            return
+        conteudo, pagina = self.pdf.reservar(), self.pdf.reservar()
+        self.pdf.objeto(conteudo, b"<< >>", b"\n".join(self.fluxo))
+        self.pdf.objeto(pagina, b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %d %d] /Contents %d 0 R "
+                                b"/Resources << /Font << /F1 %d 0 R /F2 %d 0 R >> /XObject << /Tot %d 0 R >> >> >>"
+                        % (self.paginas, *A4_PAISAGEM, conteudo, self.fontes["F1"], self.fontes["F2"], self.total))
+        self.ids_paginas.append(pagina)
+        self.fluxo = None
+
+    def fechar(self):
+        self.fechar_pagina()
+        pdf = self.pdf
+        for nome, fonte in (("F1", "Helvetica"), ("F2", "Helvetica-Bold")):
+            pdf.objeto(self.fontes[nome], b"<< /Type /Font /Subtype /Type1 /BaseFont /%s "
+                                          b"/Encoding /WinAnsiEncoding >>" % fonte.encode())
+        # Total de páginas: um Form XObject referenciado por todas as páginas e gravado só no fim
+        pdf.objeto(self.total, b"<< /Type /XObject /Subtype /Form /BBox [0 0 40 10] "
+                               b"/Resources << /Font << /F1 %d 0 R >> >> >>" % self.fontes["F1"],
+                   b"BT /F1 7 Tf 0 0 Td (%d) Tj ET" % len(self.ids_paginas))
+        kids = b" ".join(b"%d 0 R" % k for k in self.ids_paginas)
+        pdf.objeto(self.paginas, b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(self.ids_paginas)))
+        pdf.objeto(self.raiz, b"<< /Type /Catalog /Pages %d 0 R >>" % self.paginas)
+        pdf.fechar(self.raiz)
+
+
+def _larguras_colunas(colunas, amostra):
+    """Larguras proporcionais ao maior texto de cada coluna (na amostra), ajustadas à página."""
+    disponivel = A4_PAISAGEM[0] - 2 * MARGEM
+    naturais = []
+    for c in colunas:
+        palavras = max((_largura(p, "F2", FONTE) for p in c.split()), default=0)
+        celulas = max((_largura(str(v), "F1", FONTE) for v in amostra.get(c, ())), default=0)
+        naturais.append(max(palavras, celulas) + RESPIRO)
+    soma = sum(naturais)
+    tamanho = max(FONTE_MINIMA, min(FONTE, FONTE * disponivel / soma))
+    return [w * disponivel / soma for w in naturais], tamanho
+
+
+def relatorio_pdf(destino, blocos, informacoes=(), resumo=(), titulo=TITULO, subtitulo=REGRA_HIBRIDA,
+                  colunas=COLUNAS_MEMORIA):
+    """Escreve o relatório PDF (A4 paisagem) em `destino`, bloco a bloco."""
+    blocos = iter(blocos)
+    primeiro = next(blocos, {})
+    larguras, tamanho = _larguras_colunas(colunas, primeiro)
+    with _Saida(destino) as arquivo:
+        paginas = _PaginasPDF(arquivo, titulo, colunas, larguras, tamanho)
+        paginas.nova_pagina()
+        paginas.y -= 14
+        paginas.texto(MARGEM, paginas.y, titulo, "F2", 14)
+        paginas.y -= 12
+        paginas.texto(MARGEM, paginas.y, subtitulo, "F1", 8)
+        paginas.y -= 4
+        if informacoes:
+            paginas.pares("Parâmetros da Liquidação", informacoes)
+        paginas.y -= 6
+        paginas.cabecalho_tabela()
+        for bloco in _encadear(primeiro, blocos):
+            for linha in zip(*(map(str, bloco[c]) for c in colunas)):
+                paginas.linha_tabela(linha)
+        paginas.y -= 6
+        if resumo:
+            paginas.pares("Resumo da Condenação a Executar", resumo)
+        paginas.fechar()
+
+
+def _encadear(primeiro, restantes):
+    if primeiro:
+        yield primeiro
+    yield from restantes
+
+
+def formato_relatorio(caminho):
+    formato = Path(caminho).suffix.lower().lstrip(".")
+    return formato if formato in FORMATOS_RELATORIO else "html"
+
+
+def gerar_relatorio(destino, cronograma, informacoes=(), resumo=(), formato=None, titulo=TITULO,
+                    subtitulo=REGRA_HIBRIDA, linhas_por_bloco=LINHAS_POR_BLOCO):
+    """
+    Relatório da memória de cálculo de um cronograma híbrido em HTML ou PDF.
+    O formato vem da extensão do caminho quando não é informado.
+    """
+    if formato is None:
+        formato = formato_relatorio(destino) if not hasattr(destino, "write") else "html"
+    if formato not in FORMATOS_RELATORIO:
+        raise ValueError(f"Formato de relatório inválido: {formato!r} (use {', '.join(FORMATOS_RELATORIO)})")
+    gerador = relatorio_pdf if formato == "pdf" else relatorio_html
+    with etapa(f"relatorio.{formato}"):
+        gerador(destino, blocos_memoria(cronograma, linhas_por_bloco), informacoes, resumo, titulo, subtitulo)
+
+
+def relatorio_bytes(cronograma, informacoes=(), resumo=(), formato="pdf", **opcoes):
+    buffer = io.BytesIO()
+    gerar_relatorio(buffer, cronograma, informacoes, resumo, formato, **opcoes)
+    return buffer.getvalue()
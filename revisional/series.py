@@ -0,0 +1,182 @@
+import functools
+import threading
+
+import numpy as np
+
+from revisional.indices import TabelaIndice, ordinais_mes
+
+# --- REGISTRO DE SÉRIES DE ÍNDICES ---
+# Cada série nomeada (TJMG, IPCA, SELIC, INPC, IGP-M...) guarda os fatores
+# acumulados num buffer que cresce por dobra de capacidade. Acrescentar meses
+# novos só calcula os meses novos (O(meses novos)); os meses já publicados são
+# somente leitura e as tabelas entregues antes do acréscimo continuam válidas.
+
+TIPOS = ("indices", "fatores")
+
+
+def _adotar(array):
+    """
+    Arrays somente leitura (ex.: mmap do cache em disco, compartilhado entre
+    processos) entram sem cópia: o buffer só é escrito depois de _reservar,
+    que realoca ao primeiro acréscimo. Os demais são copiados.
+    """
+    return array if not array.flags.writeable else np.array(array)
+
+
+class SerieIndice:
+    """
+    Série mensal de um índice.
+
+    tipo "indices": valores em % ao mês (fator acumulado = produto de 1 + i/100).
+    tipo "fatores": valores já acumulados (ex.: tabela TJMG de fatores até Ago/2024).
+    """
+
+    def __init__(self, nome, tipo="indices", descricao=""):
+        if tipo not in TIPOS:
+            raise ValueError(f"Tipo de série inválido: {tipo!r} (use {' ou '.join(TIPOS)})")
+        self.nome = nome
+        self.tipo = tipo
+        self.descricao = descricao
+        self.inicio = None
+        self._n = 0
+        self._acum = np.empty(0)
+        self._mult = np.empty(0)
+        self._tabela = None
+        self._trava = threading.Lock()
+
+    @classmethod
+    def de_tabela(cls, nome, tabela, tipo="indices", descricao=""):
+        """Cria a série a partir de uma TabelaIndice já montada (ex.: revisional.dados)."""
+        serie = cls(nome, tipo, descricao)
+        if not tabela.vazia:
+            serie.inicio = tabela.inicio
+            serie._n = len(tabela.acumulado)
+            serie._acum = _adotar(tabela.acumulado)
+            serie._mult = _adotar(tabela.multiplicador)
+        return serie
+
+    def __len__(self):
+        return self._n
+
+    @property
+    def fim(self):
+        """Ordinal do último mês publicado (None se a série estiver vazia)."""
+        return None if self.inicio is None else self.inicio + self._n - 1
+
+    def _reservar(self, total):
+        if total <= len(self._acum):
+            return
+        capacidade = max(total, 2 * len(self._acum), 16)
+        for atributo in ("_acum", "_mult"):
+            novo = np.empty(capacidade)
+            novo[:self._n] = getattr(self, atributo)[:self._n]
+            setattr(self, atributo, novo)
+
+    def acrescentar(self, datas, valores):
+        """
+        Acrescenta meses consecutivos ao fim da série. Meses já publicados não
+        podem ser reescritos (ValueError); corrija-os criando uma nova série.
+        """
+        ordinais = ordinais_mes(datas)
+        valores = np.asarray(valores, dtype=np.float64)
+        if len(ordinais) != len(valores):
+            raise ValueError("datas e valores devem ter o mesmo tamanho")
+        if len(ordinais) == 0:
+            return self
+        with self._trava:
+            esperado = ordinais[0] if self.inicio is None else self.fim + 1
+            if ordinais[0] < esperado:
+                raise ValueError(f"{self.nome}: meses históricos são somente leitura")
+            if ordinais[0] != esperado or np.any(np.diff(ordinais) != 1):
+                raise ValueError(f"{self.nome}: os meses acrescentados devem ser consecutivos ao fim da série")
+
+            k = self._n
+            novos = len(valores)
+            self._reservar(k + novos)
+            if self.tipo == "indices":
+                mult = 1 + valores / 100
+                anterior = self._acum[k - 1] if k else 1.0
+                # Produto sequencial a partir do último fator: idêntico ao cumprod da série inteira
+                acum = np.cumprod(np.concatenate(([anterior], mult)))[1:]
+            else:
+                acum = valores
+                anterior = self._acum[k - 1] if k else None
+                mult = np.empty(novos)
+                mult[0] = acum[0] if anterior is None else acum[0] / anterior
+                mult[1:] = acum[1:] / acum[:-1]
+
+            self._acum[k:k + novos] = acum
+            self._mult[k:k + novos] = mult
+            if self.inicio is None:
+                self.inicio = int(ordinais[0])
+            self._n = k + novos
+            self._tabela = None
+        return self
+
+    def tabela(self):
+        """TabelaIndice (somente leitura) com os meses publicados até agora."""
+        tabela = self._tabela
+        if tabela is None:
+            with self._trava:
+                acum = self._acum[:self._n]
+                mult = self._mult[:self._n]
+                acum.flags.writeable = False
+                mult.flags.writeable = False
+                tabela = TabelaIndice(self.inicio or 0, acum, mult)
+                self._tabela = tabela
+        return tabela
+
+
+class RegistroIndices:
+    """Registro de séries nomeadas; a busca por nome ignora maiúsculas/minúsculas."""
+
+    def __init__(self):
+        self._series = {}
+
+    def registrar(self, serie):
+        chave = serie.nome.upper()
+        if chave in self._series:
+            raise ValueError(f"Série já registrada: {serie.nome}")
+        self._series[chave] = serie
+        return serie
+
+    def __getitem__(self, nome):
+        try:
+            return self._series[nome.upper()]
+        except KeyError:
+            raise KeyError(f"Série não registrada: {nome}") from None
+
+    def __contains__(self, nome):
+        return nome.upper() in self._series
+
+    def nomes(self):
+        return [serie.nome for serie in self._series.values()]
+
+    def acrescentar(self, nome, datas, valores):
+        return self[nome].acrescentar(datas, valores)
+
+    def tabela(self, nome):
+        return self[nome].tabela()
+
+
+@functools.lru_cache(maxsize=None)
+def registro_padrao():
+    """
+    Registro do processo com as séries embutidas em revisional.dados:
+    TJMG (índices mensais), TJMG_FATORES (acumulados até Ago/2024), IPCA e SELIC
+    (tabela pós-lei). INPC e IGP-M começam vazias, prontas para receber dados.
+    É daqui que os cálculos (apps, lote, serviço) leem as tabelas TJMG e pós-lei:
+    meses acrescentados a uma série valem para os cálculos seguintes.
+    """
+    from revisional.dados import tabela_pos_lei, tabela_tjmg_fatores, tabela_tjmg_indices
+
+    registro = RegistroIndices()
+    registro.registrar(SerieIndice.de_tabela("TJMG", tabela_tjmg_indices(), "indices", "Tabela CGJ/TJMG (% a.m.)"))
+    registro.registrar(SerieIndice.de_tabela("TJMG_FATORES", tabela_tjmg_fatores(), "fatores",
+                                             "Fatores TJMG acumulados até Ago/2024"))
+    registro.registrar(SerieIndice.de_tabela("IPCA", tabela_pos_lei("IPCA (%)"), "indices", "IPCA (% a.m.)"))
+    registro.registrar(SerieIndice.de_tabela("SELIC", tabela_pos_lei("Selic Meta (%)"), "indices",
+                                             "Selic Meta (% a.m.)"))
+    registro.registrar(SerieIndice("INPC", "indices", "INPC (% a.m.)"))
+    registro.registrar(SerieIndice("IGP-M", "indices", "IGP-M (% a.m.)"))
+    return registro
@@ -0,0 +1,343 @@
+"""
+Serviço local de cálculo revisional (HTTP/JSON), sem Streamlit.
+
+Expõe as duas regras como rotas JSON para outros sistemas internos:
+    POST /calcular/hibrida   Planilha.py: TJMG + 1% a.m. até 28/08/2024, depois IPCA + (Selic - IPCA)
+    POST /calcular/tjmg      app.py: TJMG + 1% a.m. (com a taxa mensal, como no lote; o app pede a anual)
+    GET  /saude              situação do processo, contadores do cache e tempos por etapa
+
+O corpo é um caso (mesmos campos do arquivo do lote, datas em AAAA-MM-DD ou
+DD/MM/AAAA, "taxa" judicial em % ao mês nas duas rotas) ou {"casos": [...]} para
+calcular vários numa só requisição; a resposta traz {"resumo": {...}} por caso,
+na ordem de entrada. Na query:
+    detalhe=1               inclui a memória de cálculo por parcela (colunas)
+    centavos=meio_par       calcula em centavos inteiros (ver revisional.centavos)
+
+As tabelas de índices são carregadas (e o cálculo aquecido) antes de abrir os
+processos, que herdam tudo pronto e aceitam conexões do mesmo socket; cada
+processo atende as conexões em threads, com keep-alive. Tabelas, calendário e
+fatores diários vêm do cache em disco (revisional.cache) com mmap somente
+leitura, compartilhado com os servidores do Streamlit e os workers do lote da
+mesma máquina; com $REVISIONAL_CACHE_DIR=/dev/shm/revisional, em memória.
+
+Uso:
+    python -m revisional.servico --porta 8765 --processos 4
+    curl -s localhost:8765/calcular/hibrida -d '{"valor_emprestimo": 10000, "prazo_meses": 48, ...}'
+"""
+import argparse
+import json
+import os
+import signal
+import sys
+from datetime import date, datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+
+from revisional.centavos import ARREDONDAMENTOS
+from revisional.diario import calendario_nacional
+from revisional.lote import COLUNAS_OBRIGATORIAS, REGRAS, calcular_caso, ler_flag
+from revisional.medicao import totais_processo
+from revisional.memo import chave, estatisticas, memo
+from revisional.series import registro_padrao
+
+PORTA_PADRAO = 8765
+MAX_CORPO = 32 * 1024 * 1024
+
+CASO_EXEMPLO = {
+    "id": "exemplo", "valor_emprestimo": 10_000.0, "prazo_meses": 48, "taxa": 2.0, "valor_parcela": 400.0,
+    "data_inicio": date(2019, 1, 10), "data_citacao": date(2021, 3, 1), "data_calculo": date(2025, 6, 30),
+    "antecipada": False, "pro_rata_diario": False, "parcelas_excluidas": [],
+}
+
+
+# --- ENTRADA (JSON -> caso no formato do lote) ---
+def _numero(valor, campo):
+    if isinstance(valor, (int, float)) and not isinstance(valor, bool):
+        return float(valor)
+    if isinstance(valor, str):
+        try:
+            return float(valor)
+        except ValueError:
+            pass
+    raise ValueError(f"Valor numérico inválido em {campo!r}: {valor!r}")
+
+
+def _data(valor, campo):
+    if isinstance(valor, str):
+        texto = valor.strip()
+        try:
+            if "/" in texto:
+                return datetime.strptime(texto, "%d/%m/%Y").date()
+            return date.fromisoformat(texto)
+        except ValueError:
+            pass
+    raise ValueError(f"Data inválida em {campo!r}: {valor!r} (use AAAA-MM-DD ou DD/MM/AAAA)")
+
+
+def _parcela(valor):
+    numero = _numero(valor, "parcelas_excluidas")
+    if not numero.is_integer() or numero < 1:
+        raise ValueError(f"Parcela excluída inválida: {valor!r} (números inteiros, a partir de 1)")
+    return int(numero)
+
+
+def ler_caso(dados, indice=1):
+    """Valida um caso recebido em JSON e devolve o dict no formato de revisional.lote.ler_casos."""
+    if not isinstance(dados, dict):
+        raise ValueError("Cada caso deve ser um objeto JSON")
+    faltando = [c for c in COLUNAS_OBRIGATORIAS if dados.get(c) is None]
+    if faltando:
+        raise ValueError(f"Campos obrigatórios ausentes: {', '.join(faltando)}")
+
+    if "taxa_anual" in dados:
+        raise ValueError('Use "taxa" com a taxa judicial em % ao mês ("taxa_anual" não é aceita)')
+
+    caso = dict(dados)
+    caso.setdefault("id", indice)
+    for campo in ("valor_emprestimo", "valor_parcela"):
+        caso[campo] = _numero(dados[campo], campo)
+    caso["taxa"] = _numero(dados["taxa"], "taxa (% ao mês)")
+    prazo = _numero(dados["prazo_meses"], "prazo_meses")
+    if prazo != int(prazo) or prazo < 1:
+        raise ValueError(f"Prazo inválido: {dados['prazo_meses']!r} (meses inteiros, a partir de 1)")
+    caso["prazo_meses"] = int(prazo)
+    for campo in ("data_inicio", "data_citacao", "data_calculo"):
+        caso[campo] = _data(dados[campo], campo)
+    for campo in ("fator_ipca_exato", "fator_selic_exato"):
+        if dados.get(campo) is not None:
+            caso[campo] = _numero(dados[campo], campo)
+
+    excluidas = dados.get("parcelas_excluidas")
+    if isinstance(excluidas, str):
+        excluidas = [p for p in excluidas.split(",") if p.strip()]
+    elif excluidas is not None and not isinstance(excluidas, list):
+        excluidas = [excluidas]
+    caso["parcelas_excluidas"] = [_parcela(p) for p in excluidas or []]
+    caso["antecipada"] = ler_flag(dados.get("antecipada"))
+    caso["pro_rata_diario"] = ler_flag(dados.get("pro_rata_diario"))
+    return caso
+
+
+# --- CÁLCULO E SAÍDA ---
+def parcelas_json(cronograma):
+    """Memória de cálculo em colunas JSON: datas em ISO e NaN como null."""
+    colunas = {}
+    for nome, valores in cronograma.items():
+        if not isinstance(valores, np.ndarray):
+            colunas[nome] = None if valores != valores else valores
+        elif valores.dtype.kind == "M":
+            colunas[nome] = np.datetime_as_string(valores, unit="D").tolist()
+        elif valores.dtype.kind == "f":
+            colunas[nome] = [None if v != v else v for v in valores.tolist()]
+        else:
+            colunas[nome] = valores.tolist()
+    return colunas
+
+
+def calcular_json(caso, regra="hibrida", detalhe=False, arredondamento=None):
+    """Resultado de um caso já validado; contratos repetidos saem do cache do processo."""
+    # As tabelas do registro entram na chave: meses acrescentados geram tabelas novas e invalidam o cache
+    registro = registro_padrao()
+    tabelas = tuple(registro.tabela(nome) for nome in ("TJMG", "TJMG_FATORES", "IPCA", "SELIC"))
+    resumo, cronograma = memo("servico").obter(chave(caso, regra, arredondamento, tabelas),
+                                               lambda: calcular_caso(caso, regra, arredondamento))
+    resultado = {"resumo": resumo}
+    if detalhe:
+        resultado["parcelas"] = parcelas_json(cronograma)
+    return resultado
+
+
+def calcular_requisicao(dados, regra="hibrida", detalhe=False, arredondamento=None):
+    """
+    Resposta para o corpo de uma requisição: um caso ou {"casos": [...]}.
+    Num lote, um caso inválido vira {"id", "erro"} na sua posição sem derrubar os demais.
+    """
+    if regra not in REGRAS:
+        raise ValueError(f"Regra inválida: {regra!r} (use {', '.join(REGRAS)})")
+    if arredondamento is not None and arredondamento not in ARREDONDAMENTOS:
+        raise ValueError(f"Arredondamento inválido: {arredondamento!r} (use {', '.join(ARREDONDAMENTOS)})")
+    if not (isinstance(dados, dict) and "casos" in dados):
+        return calcular_json(ler_caso(dados), regra, detalhe, arredondamento)
+    if not isinstance(dados["casos"], list):
+        raise ValueError('"casos" deve ser uma lista de objetos')
+
+    resultados = []
+    for indice, bruto in enumerate(dados["casos"], start=1):
+        try:
+            resultados.append(calcular_json(ler_caso(bruto, indice), regra, detalhe, arredondamento))
+        except (ValueError, TypeError, IndexError) as e:
+            id_caso = bruto.get("id", indice) if isinstance(bruto, dict) else indice
+            resultados.append({"id": id_caso, "erro": str(e)})
+    return {"resultados": resultados}
+
+
+def _json_padrao(valor):
+    if isinstance(valor, (date, np.datetime64)):
+        return str(valor)
+    if isinstance(valor, np.generic):
+        return valor.item()
+    raise TypeError(f"Tipo não serializável: {type(valor).__name__}")
+
+
+def precarregar():
+    """Carrega as séries do registro (TJMG e pós-lei) e o calendário e aquece as duas regras."""
+    registro_padrao()
+    calendario_nacional()
+    for regra in REGRAS:
+        calcular_caso(CASO_EXEMPLO, regra)
+
+
+# --- HTTP ---
+class ManipuladorCalculo(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "Revisional/1.0"
+    # Cabeçalho e corpo saem em escritas separadas: sem Nagle, nada espera o ACK atrasado
+    disable_nagle_algorithm = True
+    registrar = False
+
+    def _responder(self, status, conteudo):
+        corpo = json.dumps(conteudo, ensure_ascii=False, separators=(",", ":"), default=_json_padrao).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def _erro(self, status, mensagem):
+        self._responder(status, {"erro": mensagem})
+
+    def do_GET(self):
+        if urlsplit(self.path).path.rstrip("/") != "/saude":
+            return self._erro(404, f"Rota inexistente: {self.path}")
+        self._responder(200, {"status": "ok", "pid": os.getpid(), "regras": list(REGRAS), "caches": estatisticas(),
+                              "medicao": totais_processo().como_dict()})
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        partes = url.path.strip("/").split("/")
+        if len(partes) != 2 or partes[0] != "calcular" or partes[1] not in REGRAS:
+            return self._erro(404, f"Rota inexistente: {url.path} (use /calcular/{'|'.join(REGRAS)})")
+        parametros = parse_qs(url.query)
+        detalhe = ler_flag(parametros.get("detalhe", [None])[-1])
+        arredondamento = parametros.get("centavos", [None])[-1]
+
+        try:
+            tamanho = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            tamanho = -1
+        if not 0 <= tamanho <= MAX_CORPO:
+            # O corpo não é lido: a conexão não pode ser reaproveitada
+            self.close_connection = True
+            return self._erro(413, f"Corpo ausente ou maior que {MAX_CORPO} bytes")
+        try:
+            dados = json.loads(self.rfile.read(tamanho))
+        except ValueError as e:
+            return self._erro(400, f"JSON inválido: {e}")
+
+        try:
+            resposta = calcular_requisicao(dados, partes[1], detalhe, arredondamento)
+        except (ValueError, TypeError, IndexError) as e:
+            return self._erro(400, str(e))
+        except Exception as e:
+            self.log_error("Falha no cálculo: %r", e)
+            return self._erro(500, f"Falha no cálculo: {e}")
+        self._responder(200, resposta)
+
+    def log_message(self, formato, *args):
+        if self.registrar:
+            super().log_message(formato, *args)
+
+    def log_error(self, formato, *args):
+        super().log_message(formato, *args)
+
+
+class ServidorCalculo(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def get_request(self):
+        # O socket de escuta fica não bloqueante (vários processos disputam o accept);
+        # as conexões aceitas voltam a ser bloqueantes em qualquer sistema
+        conexao, endereco = super().get_request()
+        conexao.setblocking(True)
+        return conexao, endereco
+
+
+def _atender(servidor):
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+def servir(host="127.0.0.1", porta=PORTA_PADRAO, processos=None, registrar=False):
+    """
+    Atende até ser interrompido. Com mais de um processo (sistemas com fork),
+    os filhos herdam as tabelas já carregadas e compartilham o socket de escuta.
+    """
+    precarregar()
+    ManipuladorCalculo.registrar = registrar
+    servidor = ServidorCalculo((host, porta), ManipuladorCalculo)
+    processos = max(1, processos or os.cpu_count() or 1)
+    if not hasattr(os, "fork"):
+        processos = 1
+    print(f"Servindo em http://{host}:{servidor.server_address[1]} ({processos} processo(s))", flush=True)
+    if processos == 1:
+        signal.signal(signal.SIGTERM, signal.default_int_handler)
+        with servidor:
+            _atender(servidor)
+        return
+
+    servidor.socket.setblocking(False)
+    vivos = set()
+    for _ in range(processos):
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            _atender(servidor)
+            os._exit(0)
+        vivos.add(pid)
+
+    def encerrar(*_):
+        for pid in vivos:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, encerrar)
+    try:
+        while vivos:
+            try:
+                pid, _ = os.wait()
+            except KeyboardInterrupt:
+                encerrar()
+                continue
+            except ChildProcessError:
+                break
+            vivos.discard(pid)
+    finally:
+        servidor.server_close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m revisional.servico",
+        description="Serviço local HTTP/JSON do cálculo revisional (regras hibrida e tjmg), sem Streamlit.",
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="endereço de escuta (padrão: só a máquina local)")
+    parser.add_argument("--porta", type=int, default=PORTA_PADRAO, help=f"porta (padrão: {PORTA_PADRAO})")
+    parser.add_argument("--processos", type=int, default=os.cpu_count(),
+                        help="processos atendendo em paralelo (padrão: um por CPU)")
+    parser.add_argument("--log", action="store_true", help="registra cada requisição no stderr")
+    args = parser.parse_args(argv)
+    try:
+        servir(args.host, args.porta, args.processos, args.log)
+    except OSError as e:
+        sys.exit(f"Não foi possível abrir {args.host}:{args.porta}: {e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+import asyncio
+import functools
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures.process import BrokenProcessPool, ProcessPoolExecutor
+
+from revisional.carteira import AgregadorCarteira
+from revisional.colunar import TabelaColunar
+from revisional.lote import calcular_bloco, dividir_em_blocos
+from revisional.medicao import Medicao
+
+# --- FILA DE LOTES (ASYNCIO + PROCESSOS) ---
+# Um laço asyncio numa thread própria recebe os lotes e distribui os blocos de
+# contratos por um pool de processos compartilhado. Quem submete (o script do
+# Streamlit, a cada rerun) recebe na hora uma Tarefa e só consulta o progresso e
+# os resumos já prontos: o cálculo nunca roda na thread do script, e cancelar
+# descarta os blocos ainda na fila do pool.
+
+ESTADOS_ATIVOS = ("pendente", "executando")
+CAMPOS_TOTAIS = ("Principal", "CM", "Juros_1_pct", "Juros_Selic", "Total")
+
+
+class Tarefa:
+    """Lote submetido ao gerenciador: progresso, resumos parciais (na ordem de entrada) e cancelamento."""
+
+    def __init__(self, total, regra):
+        self.id = uuid.uuid4().hex[:12]
+        self.total = total
+        self.regra = regra
+        self.estado = "pendente"
+        self.erro = None
+        self.feitos = 0
+        self.totais = dict.fromkeys(CAMPOS_TOTAIS, 0.0)
+        self.carteira = AgregadorCarteira()
+        self.medicao = Medicao()
+        self.inicio = time.perf_counter()
+        self.fim = None
+        self._blocos = []
+        self._trava = threading.Lock()
+        self._concluida = threading.Event()
+        self._futuro = None
+
+    @property
+    def ativa(self):
+        return self.estado in ESTADOS_ATIVOS
+
+    @property
+    def progresso(self):
+        return self.feitos / self.total if self.total else 1.0
+
+    @property
+    def decorrido(self):
+        return (self.fim or time.perf_counter()) - self.inicio
+
+    def colunas(self, desde=0):
+        """
+        Resumos já calculados a partir da posição `desde`, numa TabelaColunar
+        (para_pandas ou revisional.exportacao); None enquanto não há nenhum.
+        """
+        with self._trava:
+            blocos = list(self._blocos)
+        # Só os blocos que alcançam `desde` são copiados para a tabela devolvida
+        selecionados = []
+        inicio = 0
+        for bloco in blocos:
+            if inicio + bloco.tamanho > desde:
+                selecionados.append(bloco.fatia(max(desde - inicio, 0)))
+            inicio += bloco.tamanho
+        return TabelaColunar.juntar(selecionados)
+
+    def resumos(self, desde=0):
+        """Resumos já calculados a partir da posição `desde`, como dicts."""
+        tabela = self.colunas(desde)
+        return tabela.linhas() if tabela is not None else []
+
+    def agrupado(self, dimensao):
+        """Totais por grupo (revisional.carteira) dos resumos já calculados."""
+        with self._trava:
+            return self.carteira.tabela(dimensao)
+
+    def cancelar(self):
+        if self._futuro is not None and self.ativa:
+            self._futuro.cancel()
+
+    def aguardar(self, timeout=None):
+        """Bloqueia até a tarefa terminar (concluída, cancelada ou com falha); False se estourar o tempo."""
+        return self._concluida.wait(timeout)
+
+    def _receber(self, bloco):
+        resumos, _, medicao = bloco
+        self.medicao.juntar(medicao)
+        with self._trava:
+            self._blocos.append(resumos)
+            for campo in CAMPOS_TOTAIS:
+                self.totais[campo] = sum(resumos[campo].tolist(), self.totais[campo])
+            self.carteira.adicionar(resumos)
+            self.feitos += resumos.tamanho
+
+    def _encerrar(self, estado, erro=None):
+        if not self.ativa:
+            return
+        self.estado = estado
+        self.erro = erro
+        self.fim = time.perf_counter()
+        self._concluida.set()
+
+
+class GerenciadorTarefas:
+    """Laço asyncio em thread própria + pool de processos reaproveitado entre lotes."""
+
+    def __init__(self, processos=None):
+        self.processos = processos or os.cpu_count() or 1
+        self._executor = None
+        self._tarefas = {}
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="revisional-tarefas", daemon=True)
+        self._thread.start()
+
+    def _pool(self):
+        # O servidor do Streamlit tem várias threads: os processos saem de um forkserver
+        # (processo limpo) onde ele existe, em vez de um fork do próprio servidor
+        if self._executor is None:
+            metodos = multiprocessing.get_all_start_methods()
+            contexto = multiprocessing.get_context("forkserver" if "forkserver" in metodos else None)
+            self._executor = ProcessPoolExecutor(max_workers=self.processos, mp_context=contexto)
+        return self._executor
+
+    def submeter(self, casos, regra="hibrida", arredondamento=None, tamanho_bloco=200):
+        """Enfileira o lote (casos no formato de revisional.lote.ler_casos) e devolve a Tarefa na hora."""
+        tarefa = Tarefa(len(casos), regra)
+        self._tarefas[tarefa.id] = tarefa
+        tarefa._futuro = asyncio.run_coroutine_threadsafe(
+            self._executar(tarefa, list(casos), regra, arredondamento, tamanho_bloco), self._loop)
+        # Cancelada antes de começar, a corrotina nem chega a rodar
+        tarefa._futuro.add_done_callback(lambda futuro: futuro.cancelled() and tarefa._encerrar("cancelada"))
+        return tarefa
+
+    def tarefa(self, id_tarefa):
+        return self._tarefas.get(id_tarefa)
+
+    def esquecer(self, id_tarefa):
+        """Cancela (se ainda ativa) e descarta a tarefa e seus resultados."""
+        tarefa = self._tarefas.pop(id_tarefa, None)
+        if tarefa is not None:
+            tarefa.cancelar()
+
+    async def _executar(self, tarefa, casos, regra, arredondamento, tamanho_bloco):
+        loop = asyncio.get_running_loop()
+        # Poucos blocos em voo por processo: o cancelamento não espera uma fila longa
+        em_voo = 2 * self.processos
+        pendentes = deque()
+        tarefa.estado = "executando"
+        try:
+            executor = self._pool()
+            for bloco in dividir_em_blocos(casos, regra, False, arredondamento, None, tamanho_bloco):
+                pendentes.append(loop.run_in_executor(executor, calcular_bloco, bloco))
+                if len(pendentes) >= em_voo:
+                    tarefa._receber(await pendentes.popleft())
+            while pendentes:
+                tarefa._receber(await pendentes.popleft())
+        except asyncio.CancelledError:
+            for futuro in pendentes:
+                futuro.cancel()
+            tarefa._encerrar("cancelada")
+            raise
+        except Exception as e:
+            for futuro in pendentes:
+                futuro.cancel()
+            if isinstance(e, BrokenProcessPool):
+                self._executor = None
+            tarefa._encerrar("falhou", f"{type(e).__name__}: {e}")
+        else:
+            tarefa._encerrar("concluida")
+
+    def encerrar(self):
+        """Cancela as tarefas ativas e libera o pool e o laço."""
+        for tarefa in list(self._tarefas.values()):
+            tarefa.cancelar()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+
+@functools.lru_cache(maxsize=None)
+def gerenciador():
+    """Gerenciador do processo (compartilhado pelas sessões do Streamlit)."""
+    return GerenciadorTarefas()
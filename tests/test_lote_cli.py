@@ -0,0 +1,56 @@
+import csv
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+RAIZ = Path(__file__).resolve().parent.parent
+
+# Mais casos que o bloco padrão (--bloco 200): o lote passa por vários blocos e pelo pool de processos
+N_CASOS = 450
+
+
+def _gravar_casos(caminho):
+    campos = ["id", "nome_cliente", "valor_emprestimo", "prazo_meses", "taxa", "valor_parcela",
+              "data_inicio", "data_citacao", "data_calculo"]
+    with open(caminho, "w", newline="") as arquivo:
+        escritor = csv.writer(arquivo)
+        escritor.writerow(campos)
+        for i in range(N_CASOS):
+            # Dois em cada três casos sem nome do cliente (célula vazia)
+            nome = f"Cliente {i % 7}" if i % 3 == 0 else ""
+            escritor.writerow([i + 1, nome, 10_000 + 10 * i, 24 + i % 60, 2.0, 450.0,
+                               "2019-01-10", "2021-03-01", "2025-06-30"])
+
+
+def _rodar(*argumentos):
+    return subprocess.run([sys.executable, "-m", "revisional", *map(str, argumentos)],
+                          cwd=RAIZ, capture_output=True, text=True, check=True)
+
+
+def test_parquet_com_nome_cliente_vazio(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    casos = tmp_path / "casos.csv"
+    _gravar_casos(casos)
+
+    _rodar(casos, "-o", tmp_path / "totais.parquet", "--detalhe", tmp_path / "parcelas.parquet")
+
+    totais = pq.read_table(tmp_path / "totais.parquet")
+    assert totais.num_rows == N_CASOS
+    nomes = totais.column("nome_cliente").to_pylist()
+    assert nomes[:3] == ["Cliente 0", "", ""]
+    assert "nan" not in nomes
+    assert pq.read_table(tmp_path / "parcelas.parquet").num_rows > N_CASOS
+
+
+def test_csv_com_nome_cliente_vazio(tmp_path):
+    casos = tmp_path / "casos.csv"
+    _gravar_casos(casos)
+
+    _rodar(casos, "-o", tmp_path / "totais.csv")
+
+    with open(tmp_path / "totais.csv", newline="") as arquivo:
+        linhas = list(csv.DictReader(arquivo))
+    assert len(linhas) == N_CASOS
+    assert [linha["nome_cliente"] for linha in linhas[:3]] == ["Cliente 0", "", ""]